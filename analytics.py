@@ -0,0 +1,458 @@
+"""
+Statistics over the game history.
+
+GameStats keeps one row per recorded game in NumPy columns (player id,
+mode, attempts budget, hints, won, guesses, range size) and folds every
+batch of new rows into running totals as it arrives, so adding games
+never recomputes what is already counted:
+
+    per (mode, attempts budget, hints)  games, wins, guesses and a
+                                        guess-count histogram
+    per player                          games, wins, guesses, best score
+                                        and the current and longest
+                                        winning streak
+
+Those totals answer the difficulty table, the hint comparison and the
+player summaries in O(number of keys).  Guess-count histograms of a single
+player are one vectorised pass over the columns.
+
+Games come from binary recordings (see game_record); ingest_recording()
+remembers how far it read each file and only reads what was appended
+since.  Best scores from the high score store are merged in with
+ingest_store(), which likewise keeps the store's changes() cursor and only
+merges the players whose best score changed since the last call.
+
+    python analytics.py games.rec [--player NAME]
+"""
+import argparse
+
+import numpy as np
+
+from game_engine import INT64_MAX
+from game_record import MODES, HINTS, WON_FLAG, RecordReader
+
+# Histograms count 1 .. HISTOGRAM_BINS - 1 guesses; the last bin holds
+# everything from HISTOGRAM_BINS - 1 guesses up.
+HISTOGRAM_BINS = 64
+CHUNK_ROWS = 65536
+
+_COLUMNS = (
+    ("player", np.int32),
+    ("mode", np.int8),
+    ("max_attempts", np.int32),
+    ("hints", np.bool_),
+    ("won", np.bool_),
+    ("guesses", np.int32),
+    ("range_size", np.int64),
+)
+
+
+class GameStats:
+    """
+    Columnar game history with incrementally updated aggregates.
+    """
+
+    def __init__(self):
+        self.names = [""]
+        self.player_ids = {"": 0}
+        self.size = 0
+        self.columns = {name: np.zeros(1024, dtype=dtype) for name, dtype in _COLUMNS}
+        # (mode, max attempts, hints) -> [games, wins, guesses, histogram...]
+        self.groups = {}
+        self.player_games = np.zeros(1, dtype=np.int64)
+        self.player_wins = np.zeros(1, dtype=np.int64)
+        self.player_guesses = np.zeros(1, dtype=np.int64)
+        self.player_best = np.full(1, np.iinfo(np.int64).max, dtype=np.int64)
+        self.current_streak = np.zeros(1, dtype=np.int64)
+        self.best_streak = np.zeros(1, dtype=np.int64)
+        self._offsets = {}
+        self._score_cursors = {}
+        self._pending = []
+
+    def __len__(self):
+        self._flush()
+        return self.size
+
+    def player_id(self, name):
+        """
+        Returns the id of a player name, adding the name if it is new.
+        """
+        player = self.player_ids.get(name)
+        if player is None:
+            player = self.player_ids[name] = len(self.names)
+            self.names.append(name)
+        return player
+
+    def add(self, player, mode, max_attempts, hints_enabled, won, guesses, range_size):
+        """
+        Adds one game.  Games are buffered and folded in by the next query.
+        Args:
+            player: The player's name ("" if unknown).
+            mode: One of game_record.MODES.
+            max_attempts: The attempts budget (0 means unlimited).
+            hints_enabled: Whether hints were on.
+            won: Whether the game was won.
+            guesses: The number of guesses made.
+            range_size: How many numbers the secret could be.
+        """
+        self._pending.append((self.player_id(player), MODES.index(mode), max_attempts,
+                              hints_enabled, won, guesses, min(range_size, INT64_MAX)))
+        if len(self._pending) >= CHUNK_ROWS:
+            self._flush()
+
+    def add_records(self, records):
+        """
+        Adds GameRecords.
+        """
+        for record in records:
+            self.add(record.player, record.mode, record.max_attempts, record.hints_enabled,
+                     record.won, len(record.guesses), record.high - record.low + 1)
+
+    def ingest_recording(self, path):
+        """
+        Adds the games of a recording file that were not read before and
+        returns how many there were.
+        """
+        added = 0
+        with RecordReader(path) as reader:
+            offset = self._offsets.get(path)
+            if offset is not None and offset > len(reader):
+                raise ValueError(f"{path} shrank since it was last read.")
+            pending = self._pending
+            player_id = self.player_id
+            for mode, flags, player, span, max_attempts, count, offset in reader.headers(offset):
+                pending.append((player_id(player), mode, max_attempts, bool(flags & HINTS),
+                                bool(flags & WON_FLAG), count, min(span + 1, INT64_MAX)))
+                added += 1
+                if len(pending) >= CHUNK_ROWS:
+                    self._flush()
+                    pending = self._pending
+            if added:
+                self._offsets[path] = offset
+        self._flush()
+        return added
+
+    def ingest_scores(self, scores):
+        """
+        Merges (name, best score) pairs, such as the items of a high score
+        store, into the best score of each player.
+        """
+        player_id = self.player_id
+        players = []
+        best = []
+        for name, score in scores:
+            players.append(player_id(name))
+            best.append(score)
+        self._grow_players()
+        np.minimum.at(self.player_best, np.asarray(players, dtype=np.int64),
+                      np.asarray(best, dtype=np.int64))
+
+    def ingest_store(self, store):
+        """
+        Merges the best scores of a high score store that changed since the
+        last call for that store, and returns how many there were.
+        """
+        cursor, scores = store.changes(self._score_cursors.get(id(store)))
+        self.ingest_scores(scores)
+        self._score_cursors[id(store)] = cursor
+        return len(scores)
+
+    def _grow_players(self):
+        missing = len(self.names) - len(self.player_games)
+        if missing <= 0:
+            return
+        missing = max(missing, len(self.player_games))  # grow geometrically
+        for attribute, fill in (("player_games", 0), ("player_wins", 0), ("player_guesses", 0),
+                                ("player_best", np.iinfo(np.int64).max),
+                                ("current_streak", 0), ("best_streak", 0)):
+            column = getattr(self, attribute)
+            setattr(self, attribute, np.concatenate([column, np.full(missing, fill, dtype=np.int64)]))
+
+    def _flush(self):
+        """
+        Appends the buffered games to the columns and folds them into the
+        aggregates.
+        """
+        if not self._pending:
+            return
+        rows = self._pending
+        self._pending = []
+        chunk = {name: np.fromiter((row[i] for row in rows), dtype=dtype, count=len(rows))
+                 for i, (name, dtype) in enumerate(_COLUMNS)}
+        count = len(rows)
+        capacity = len(self.columns["player"])
+        if self.size + count > capacity:
+            capacity = max(capacity * 2, self.size + count)
+            for name, column in self.columns.items():
+                grown = np.zeros(capacity, dtype=column.dtype)
+                grown[:self.size] = column[:self.size]
+                self.columns[name] = grown
+        for name, values in chunk.items():
+            self.columns[name][self.size:self.size + count] = values
+        self.size += count
+        self._fold_groups(chunk)
+        self._fold_players(chunk)
+
+    def _fold_groups(self, chunk):
+        won = chunk["won"]
+        guesses = chunk["guesses"]
+        keys = np.stack([chunk["mode"].astype(np.int64), chunk["max_attempts"].astype(np.int64),
+                         chunk["hints"].astype(np.int64)], axis=1)
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        groups = len(unique)
+        games = np.bincount(inverse, minlength=groups)
+        wins = np.bincount(inverse, weights=won, minlength=groups)
+        totals = np.bincount(inverse, weights=guesses, minlength=groups)
+        bins = np.minimum(guesses, HISTOGRAM_BINS - 1)
+        histograms = np.bincount(inverse * HISTOGRAM_BINS + bins, weights=won,
+                                 minlength=groups * HISTOGRAM_BINS).reshape(groups, HISTOGRAM_BINS)
+        for i, (mode, max_attempts, hints) in enumerate(unique.tolist()):
+            key = (MODES[mode], max_attempts, bool(hints))
+            figures = self.groups.get(key)
+            if figures is None:
+                figures = self.groups[key] = np.zeros(3 + HISTOGRAM_BINS, dtype=np.int64)
+            figures[0] += games[i]
+            figures[1] += int(wins[i])
+            figures[2] += int(totals[i])
+            figures[3:] += histograms[i].astype(np.int64)
+
+    def _fold_players(self, chunk):
+        self._grow_players()
+        players = chunk["player"]
+        won = chunk["won"]
+        guesses = chunk["guesses"]
+        known = len(self.player_games)
+        self.player_games += np.bincount(players, minlength=known)
+        self.player_wins += np.bincount(players, weights=won, minlength=known).astype(np.int64)
+        self.player_guesses += np.bincount(players, weights=guesses, minlength=known).astype(np.int64)
+        if won.any():
+            np.minimum.at(self.player_best, players[won], guesses[won].astype(np.int64))
+        self._fold_streaks(players, won)
+
+    def _fold_streaks(self, players, won):
+        """
+        Updates the winning streaks with a chunk of games, in order.  The
+        chunk is grouped by player (keeping each player's order), and the
+        streak at every game is the wins since that player's last loss,
+        plus the streak carried over from earlier chunks when there was
+        no loss in this one yet.
+        """
+        order = np.argsort(players, kind="stable")
+        players = players[order]
+        wins = won[order].astype(np.int64)
+        count = len(players)
+        starts = np.flatnonzero(np.r_[True, players[1:] != players[:-1]])
+        group_players = players[starts]
+        total = np.cumsum(wins)
+        # The cumulative win count just before the run that includes
+        # each game: set at losses and at group starts.
+        marks = np.full(count, -1, dtype=np.int64)
+        losses = np.flatnonzero(wins == 0)
+        marks[losses] = total[losses]
+        marks[starts] = total[starts] - wins[starts]
+        streak = total - np.maximum.accumulate(marks)
+        # Games with no loss since their group started continue the carry.
+        mark_positions = np.full(count, -1, dtype=np.int64)
+        mark_positions[losses] = losses
+        mark_positions[starts] = starts
+        last_mark = np.maximum.accumulate(mark_positions)
+        group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, count]))
+        unbroken = (last_mark == starts[group]) & (wins[starts][group] == 1)
+        streak = streak + np.where(unbroken, self.current_streak[group_players][group], 0)
+        longest = np.maximum.reduceat(streak, starts)
+        self.best_streak[group_players] = np.maximum(self.best_streak[group_players], longest)
+        ends = np.r_[starts[1:], count] - 1
+        self.current_streak[group_players] = streak[ends]
+
+    def column(self, name):
+        """
+        Returns a view of one column of all games so far.
+        """
+        self._flush()
+        return self.columns[name][:self.size]
+
+    def guess_histogram(self, player=None, mode=None, won_only=True):
+        """
+        Returns the counts of games by number of guesses (index 0 unused).
+        Args:
+            player: Only count this player's games (optional).
+            mode: Only count games of this mode (optional).
+            won_only: Only count won games.
+        """
+        self._flush()
+        mask = np.ones(self.size, dtype=np.bool_)
+        if player is not None:
+            player_id = self.player_ids.get(player)
+            if player_id is None:
+                return np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+            mask &= self.column("player") == player_id
+        if mode is not None:
+            mask &= self.column("mode") == MODES.index(mode)
+        if won_only:
+            mask &= self.column("won")
+        guesses = np.minimum(self.column("guesses")[mask], HISTOGRAM_BINS - 1)
+        return np.bincount(guesses, minlength=HISTOGRAM_BINS)
+
+    def difficulty_table(self, mode="single"):
+        """
+        Returns a row per attempts budget: games, wins, win rate, mean
+        guesses and the guess-count histogram of won games.
+        """
+        self._flush()
+        merged = {}
+        for (group_mode, max_attempts, _), figures in self.groups.items():
+            if mode is None or group_mode == mode:
+                merged[max_attempts] = merged.get(max_attempts, 0) + figures
+        return [_row(figures, max_attempts=max_attempts)
+                for max_attempts, figures in sorted(merged.items())]
+
+    def hint_effect(self, mode="single"):
+        """
+        Compares games with and without hints, per attempts budget.
+        Returns rows with the win rate and mean guesses of each, and the
+        change the hints make.
+        """
+        self._flush()
+        rows = []
+        budgets = sorted({max_attempts for group_mode, max_attempts, _ in self.groups
+                          if group_mode == mode})
+        for max_attempts in budgets:
+            without = self.groups.get((mode, max_attempts, False))
+            with_hints = self.groups.get((mode, max_attempts, True))
+            if without is None or with_hints is None:
+                continue
+            plain, hinted = _row(without), _row(with_hints)
+            rows.append({
+                "max_attempts": max_attempts,
+                "games_without": plain["games"],
+                "games_with": hinted["games"],
+                "win_rate_without": plain["win_rate"],
+                "win_rate_with": hinted["win_rate"],
+                "win_rate_change": hinted["win_rate"] - plain["win_rate"],
+                "mean_guesses_without": plain["mean_guesses"],
+                "mean_guesses_with": hinted["mean_guesses"],
+            })
+        return rows
+
+    def player_summary(self, name):
+        """
+        Returns a player's games, wins, win rate, mean guesses, best score
+        and streaks, or None for an unknown player.
+        """
+        self._flush()
+        player = self.player_ids.get(name)
+        if player is None:
+            return None
+        self._grow_players()
+        games = int(self.player_games[player])
+        best = int(self.player_best[player])
+        return {
+            "player": name,
+            "games": games,
+            "wins": int(self.player_wins[player]),
+            "win_rate": int(self.player_wins[player]) / games if games else 0.0,
+            "mean_guesses": int(self.player_guesses[player]) / games if games else 0.0,
+            "best_score": None if best == np.iinfo(np.int64).max else best,
+            "current_streak": int(self.current_streak[player]),
+            "best_streak": int(self.best_streak[player]),
+        }
+
+    def top_players(self, limit=10, by="wins"):
+        """
+        Returns the summaries of the players with the most wins (or
+        "games" or "best_streak").
+        """
+        self._flush()
+        self._grow_players()
+        values = {"wins": self.player_wins, "games": self.player_games,
+                  "best_streak": self.best_streak}[by][:len(self.names)].copy()
+        values[0] = -1  # unnamed games
+        limit = min(limit, len(values))
+        best = np.argpartition(-values, limit - 1)[:limit] if limit else []
+        best = sorted(best, key=lambda player: (-values[player], self.names[player]))
+        return [self.player_summary(self.names[player]) for player in best if values[player] > 0]
+
+
+def _row(figures, **extra):
+    games, wins, guesses = (int(value) for value in figures[:3])
+    return dict(extra, games=games, wins=wins,
+                win_rate=wins / games if games else 0.0,
+                mean_guesses=guesses / games if games else 0.0,
+                histogram=figures[3:].copy())
+
+
+_default_stats = None
+
+
+def default_stats():
+    """
+    Returns the shared GameStats, creating it on first use.
+    """
+    global _default_stats
+    if _default_stats is None:
+        _default_stats = GameStats()
+    return _default_stats
+
+
+def refresh(stats=None, recording=None, store=None):
+    """
+    Brings stats (the shared GameStats by default) up to date with a
+    recording file and a high score store, reading only what is new in
+    either.
+    """
+    if stats is None:
+        stats = default_stats()
+    if recording is not None:
+        stats.ingest_recording(recording)
+    if store is not None:
+        stats.ingest_store(store)
+    return stats
+
+
+def format_report(stats, player=None, mode="single"):
+    """
+    Returns the statistics screen as a list of lines.
+    """
+    lines = [f"{len(stats)} games recorded."]
+    table = stats.difficulty_table(mode)
+    if table:
+        lines.append(f"{'attempts':>8} {'games':>9} {'win rate':>9} {'mean guesses':>13}")
+        for row in table:
+            budget = row["max_attempts"] or "any"
+            lines.append(f"{budget:>8} {row['games']:>9} {row['win_rate']:>9.1%} {row['mean_guesses']:>13.2f}")
+    for row in stats.hint_effect(mode):
+        lines.append(f"Hints with {row['max_attempts']} attempts: win rate "
+                     f"{row['win_rate_without']:.1%} -> {row['win_rate_with']:.1%}, mean guesses "
+                     f"{row['mean_guesses_without']:.2f} -> {row['mean_guesses_with']:.2f}")
+    if player:
+        summary = stats.player_summary(player)
+        if summary is None or not summary["games"]:
+            lines.append(f"No recorded games for {player}.")
+        else:
+            lines.append(f"{player}: {summary['games']} games, {summary['win_rate']:.1%} won, "
+                         f"{summary['mean_guesses']:.2f} guesses on average, best "
+                         f"{summary['best_score']}, streak {summary['current_streak']} "
+                         f"(longest {summary['best_streak']})")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Statistics over recorded games.")
+    parser.add_argument("recordings", nargs="+", help="Recording files written with --record")
+    parser.add_argument("--player", help="Also summarise this player")
+    parser.add_argument("--mode", default="single", choices=MODES)
+    parser.add_argument("--scores", action="store_true", help="Merge in the high score store")
+    args = parser.parse_args()
+    stats = GameStats()
+    for path in args.recordings:
+        stats.ingest_recording(path)
+    if args.scores:
+        from score_store import default_store
+        stats.ingest_store(default_store())
+    for line in format_report(stats, args.player, args.mode):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+Reproducible benchmarks for the number guessing game.
+
+Run them from the repository root:
+
+    python -m benchmarks                      # all quick scenarios
+    python -m benchmarks --full               # include the 1M-player runs
+    python -m benchmarks --json results.json --baseline baseline.json
+
+Every scenario is seeded, so two runs of the same version do the same work.
+"""
@@ -0,0 +1,47 @@
+import argparse
+import sys
+
+from benchmarks import harness, scenarios
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Run the number guessing game benchmarks.")
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument("--full", action="store_true", help="Include the 1M-player scenarios")
+    parser.add_argument("--only", help="Run only scenarios whose function name contains this")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--csv", help="Write results to this CSV file")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative slowdown before a regression is reported")
+    args = parser.parse_args()
+
+    from effects import configure
+    configure(headless=True)
+    import session_store
+    session_store.configure(None)  # benchmarked games are not saved for resuming
+
+    results = []
+    for scenario, size in scenarios.FULL if args.full else scenarios.QUICK:
+        if args.only and args.only not in scenario.__name__:
+            continue
+        for result in scenario(args.seed, size):
+            results.append(result)
+            print(", ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                            for key, value in result.items()))
+
+    if args.json:
+        harness.write_json(args.json, results)
+    if args.csv:
+        harness.write_csv(args.csv, results)
+    if args.baseline:
+        regressions = harness.compare(results, harness.load_baseline(args.baseline), args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
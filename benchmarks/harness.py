@@ -0,0 +1,115 @@
+"""
+Timing, result output and baseline comparison for the benchmarks.
+"""
+import csv
+import json
+import os
+import platform
+import sys
+import time
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from guess_the_number import load_cli  # noqa: E402
+
+
+@contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+class Timer:
+    """
+    Collects per-operation latencies and the total elapsed time.
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.elapsed = 0.0
+
+    @contextmanager
+    def measure(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            latency = time.perf_counter() - started
+            self.latencies.append(latency)
+            self.elapsed += latency
+
+    def summary(self, operations=None):
+        """
+        Returns throughput and latency percentiles in a flat dict.
+        """
+        operations = len(self.latencies) if operations is None else operations
+        ordered = sorted(self.latencies)
+        result = {
+            "operations": operations,
+            "seconds": self.elapsed,
+            "ops_per_second": operations / self.elapsed if self.elapsed else 0.0,
+        }
+        if ordered:
+            result["p50_us"] = ordered[len(ordered) // 2] * 1e6
+            result["p99_us"] = ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)] * 1e6
+        return result
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+
+
+def write_json(path, results):
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+
+
+def write_csv(path, results):
+    fields = sorted({key for result in results for key in result})
+    fields.sort(key=lambda key: (key not in ("scenario", "size"), key))
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def load_baseline(path):
+    with open(path, "r") as f:
+        return json.load(f)["results"]
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Compares results to a baseline run.  A scenario regresses when its
+    throughput drops, or its p99 latency grows, by more than tolerance.
+    Returns a list of human readable regression messages.
+    """
+    previous = {(r["scenario"], r.get("size")): r for r in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get((result["scenario"], result.get("size")))
+        if old is None:
+            continue
+        name = result["scenario"] + (f"[{result['size']}]" if result.get("size") else "")
+        if old.get("ops_per_second") and result.get("ops_per_second"):
+            change = result["ops_per_second"] / old["ops_per_second"] - 1
+            if change < -tolerance:
+                regressions.append(f"{name}: throughput {change:+.1%}")
+        if old.get("p99_us") and result.get("p99_us"):
+            change = result["p99_us"] / old["p99_us"] - 1
+            if change > tolerance:
+                regressions.append(f"{name}: p99 latency {change:+.1%}")
+    return regressions
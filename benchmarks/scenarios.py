@@ -0,0 +1,603 @@
+"""
+Benchmark scenarios.  Each scenario takes a seed and a size and returns a
+list of result dicts.
+"""
+import io
+import os
+import random
+import re
+import tempfile
+
+from benchmarks.harness import Timer, load_cli, working_directory
+from game_io import BatchConsole, ScriptedConsole
+
+_NUMBER = re.compile(r"-?\d+")
+
+
+def scripted(respond=None):
+    """
+    A console answering prompts with respond(prompt, said) that throws its
+    output away.
+    """
+    return ScriptedConsole(respond=respond or (lambda prompt, said: ""), keep_output=False)
+
+
+def cli_guess(seed, games):
+    """
+    Plays guess() with a bisecting player typing into the prompt.
+    """
+    from rng_service import SessionRng
+    cli = load_cli()
+    rng = SessionRng(seed)
+    state = {}
+
+    def answer(prompt, said):
+        for line in said:
+            if "Too low" in line:
+                state["low"] = state["guess"] + 1
+            elif "Too high" in line:
+                state["high"] = state["guess"] - 1
+        state["guess"] = (state["low"] + state["high"]) // 2
+        return str(state["guess"])
+
+    console = scripted(answer)
+    timer = Timer()
+    for _ in range(games):
+        state.update(low=1, high=100)
+        with timer.measure():
+            cli.guess(100, 10, console=console, rng=rng)
+    return [dict(scenario="cli_guess", size=games, **timer.summary())]
+
+
+def cli_computer_guess(seed, games):
+    """
+    Plays computer_guess() against a scripted user thinking of a number.
+    """
+    cli = load_cli()
+    rng = random.Random(seed)
+    state = {}
+
+    def answer(prompt, said):
+        for line in said:
+            if line.startswith("Is your number"):
+                state["guess"] = int(_NUMBER.search(line).group())
+        if state["guess"] > state["secret"]:
+            return "h"
+        if state["guess"] < state["secret"]:
+            return "l"
+        return "c"
+
+    console = scripted(answer)
+    timer = Timer()
+    for _ in range(games):
+        state["secret"] = rng.randint(1, 1000)
+        with timer.measure():
+            cli.computer_guess(1000, console=console)
+    return [dict(scenario="cli_computer_guess", size=games, **timer.summary())]
+
+
+def _computer_guess_transcript(seed, games):
+    """
+    The answers to the prompts of games menu-driven computer_guess() games,
+    bisecting 1..10, as one string.
+    """
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(games):
+        secret = rng.randint(1, 10)
+        low, high = 1, 10
+        lines += ["2", "1", "no"]
+        while True:
+            guess = (low + high) // 2
+            if guess == secret:
+                lines.append("c")
+                break
+            lines.append("h" if guess > secret else "l")
+            if guess > secret:
+                high = guess - 1
+            else:
+                low = guess + 1
+        lines.append("yes")
+    lines[-1] = "no"
+    return "\n".join(lines) + "\n"
+
+
+def cli_replay(seed, games):
+    """
+    Replays a transcript of menu-driven computer_guess() games through
+    main() with a BatchConsole.
+    """
+    cli = load_cli()
+    console = BatchConsole(io.StringIO(_computer_guess_transcript(seed, games)), io.StringIO())
+    timer = Timer()
+    with timer.measure():
+        cli.main(console)
+    return [dict(scenario="cli_replay", size=games, **timer.summary(operations=games))]
+
+
+def profiler_overhead(seed, games):
+    """
+    Replays the cli_replay transcript with every CLI function timed by a
+    Profiler, without and with stack sampling, to compare with cli_replay.
+    """
+    from profiler import Profiler, SAMPLE_INTERVAL
+    cli = load_cli()
+    transcript = _computer_guess_transcript(seed, games)
+    results = []
+    for label, interval in (("timed", 0), ("sampled", SAMPLE_INTERVAL)):
+        console = BatchConsole(io.StringIO(transcript), io.StringIO())
+        profiler = Profiler(interval=interval)
+        profiler.instrument(cli)
+        timer = Timer()
+        with profiler, timer.measure():
+            cli.main(console)
+        results.append(dict(scenario=f"profiler_overhead_{label}", size=games, **timer.summary(operations=games)))
+    return results
+
+
+def tournament_shards(seed, games):
+    """
+    Times tournament.play_shard() for the bisecting strategies, with games
+    played in lockstep on a BatchGames and one GameState at a time.
+    """
+    import tournament
+    settings = tournament.Settings(1, 1000, 12, hints_enabled=True)
+    batch_strategies = tournament.BATCH_STRATEGIES
+    results = []
+    for label, strategies in (("batch", batch_strategies), ("single", {})):
+        tournament.BATCH_STRATEGIES = strategies
+        try:
+            for name in ("bisection", "hint_aware"):
+                timer = Timer()
+                with timer.measure():
+                    tournament.play_shard(name, settings, games, seed)
+                results.append(dict(scenario=f"tournament_{name}_{label}", size=games,
+                                    **timer.summary(operations=games)))
+        finally:
+            tournament.BATCH_STRATEGIES = batch_strategies
+    return results
+
+
+def high_scores(seed, players, saves=1000):
+    """
+    Fills a fresh store with players, then times save_high_score() and
+    display_high_scores() against it.
+    """
+    cli = load_cli()
+    import score_store
+    rng = random.Random(seed)
+    results = []
+    with tempfile.TemporaryDirectory() as directory, working_directory(directory):
+        store = score_store.ScoreStore(score_store.HIGH_SCORES_FILE, fsync=False)
+        store.record_many((f"player{i}", rng.randint(1, 20)) for i in range(players))
+        store.compact()
+        store.close()
+        score_store._default_store = None
+        console = scripted()
+        load = Timer()
+        with load.measure():
+            cli.display_high_scores(console=console)
+        results.append(dict(scenario="high_scores_first_display", size=players, **load.summary()))
+        score_store.default_store().store.fsync = False
+        save = Timer()
+        for i in range(saves):
+            with save.measure():
+                cli.save_high_score(f"player{rng.randrange(players * 2)}", rng.randint(1, 20),
+                                    console=console)
+        results.append(dict(scenario="save_high_score", size=players, **save.summary(),
+                            **score_store.default_store().stats()))
+        display = Timer()
+        for _ in range(100):
+            with display.measure():
+                cli.display_high_scores(console=console)
+        results.append(dict(scenario="display_high_scores", size=players, **display.summary()))
+        score_store.default_store().close()
+        score_store._default_store = None
+    return results
+
+
+def score_backends(seed, players, saves=1000, queries=100):
+    """
+    Compares the JSON and SQLite score stores: loading players scores in
+    one batch, reopening the store, single saves, and top, rank and page
+    queries.  The SQLite store is also timed migrating the JSON files.
+    """
+    import score_store
+    import score_db
+    rng = random.Random(seed)
+    scores = [(f"player{i}", rng.randint(1, 20)) for i in range(players)]
+    saved = [(f"player{rng.randrange(players * 2)}", rng.randint(1, 20)) for _ in range(saves)]
+    names = [f"player{rng.randrange(players)}" for _ in range(queries)]
+    results = []
+    with tempfile.TemporaryDirectory() as directory, working_directory(directory):
+        backends = (
+            ("json", lambda: score_store.ScoreStore(score_store.HIGH_SCORES_FILE, fsync=False)),
+            ("sqlite", lambda: score_db.SqliteScoreStore(score_db.HIGH_SCORES_DB)),
+        )
+        for backend, open_store in backends:
+            store = open_store()
+            load = Timer()
+            with load.measure():
+                store.record_many(scores)
+                store.compact()
+            store.close()
+            results.append(dict(scenario=f"scores_{backend}_load", size=players,
+                                **load.summary(operations=players)))
+            reopen = Timer()
+            with reopen.measure():
+                store = open_store()
+                store.top(10)
+            results.append(dict(scenario=f"scores_{backend}_reopen", size=players, **reopen.summary()))
+            save = Timer()
+            for name, score in saved:
+                with save.measure():
+                    store.record(name, score)
+            results.append(dict(scenario=f"scores_{backend}_save", size=players, **save.summary()))
+            for query, call in (("top", lambda name: store.top(10)), ("rank", store.rank),
+                                ("page", lambda name: store.page(players // 2, 20))):
+                timer = Timer()
+                for name in names:
+                    with timer.measure():
+                        call(name)
+                results.append(dict(scenario=f"scores_{backend}_{query}", size=players, **timer.summary()))
+            store.close()
+        migrate = Timer()
+        with migrate.measure():
+            store = score_db.SqliteScoreStore("migrated.db")
+            migrated = store.migrate_json(score_store.HIGH_SCORES_FILE)
+        store.close()
+        results.append(dict(scenario="scores_sqlite_migrate", size=migrated,
+                            **migrate.summary(operations=migrated)))
+    return results
+
+
+def player_registry(seed, players, lookups=100000):
+    """
+    Compares the memory of a {name: score} dict against a PlayerRegistry
+    with a CompactLeaderboard, then times name lookups, leaderboard updates
+    and opening a saved registry.
+    """
+    import tracemalloc
+    from leaderboard import CompactLeaderboard
+    from player_registry import PlayerRegistry
+    rng = random.Random(seed)
+    scores = [(f"player{rng.getrandbits(40):x}", rng.randint(1, 20)) for _ in range(players)]
+    tracemalloc.start()
+    best = dict(scores)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    del best
+    tracemalloc.stop()
+    tracemalloc.start()
+    registry = PlayerRegistry.from_scores(scores)
+    leaderboard = CompactLeaderboard(registry)
+    registry_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    results = [dict(scenario="player_memory", size=players, dict_bytes_per_player=dict_bytes / players,
+                    registry_bytes_per_player=registry_bytes / players)]
+    names = [rng.choice(scores)[0] for _ in range(lookups)]
+    lookup = Timer()
+    with lookup.measure():
+        for name in names:
+            registry.id(name)
+    results.append(dict(scenario="player_lookup", size=players, **lookup.summary(operations=lookups)))
+    improved = [registry.id(name) for name in names[:10000]]
+    update = Timer()
+    with update.measure():
+        for player in improved:
+            score = registry.best[player]
+            if score > 1:
+                registry.set_best(player, score - 1)
+                leaderboard.update(player, score, score - 1)
+    results.append(dict(scenario="player_leaderboard_update", size=players,
+                        **update.summary(operations=len(improved))))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "players")
+        registry.save(path, leaderboard.order())
+        reopen = Timer()
+        with reopen.measure():
+            mapped = PlayerRegistry.open(path)
+            CompactLeaderboard(mapped, mapped.order).top(10)
+            mapped.order = None
+        mapped.close()
+    results.append(dict(scenario="player_registry_open", size=players, **reopen.summary()))
+    return results
+
+
+def gui_check_guess(seed, guesses):
+    """
+    Times NumberGuessingGame.check_guess() through the headless GUI driver
+    on the offscreen Qt platform.
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        import PyQt5  # noqa: F401
+    except ImportError:
+        return [dict(scenario="gui_check_guess", size=guesses, skipped="PyQt5 not installed")]
+    from gui_driver import GuiDriver
+    driver = GuiDriver(attempts=10, seed=seed)
+    timer = Timer()
+    report = driver.run(guesses)
+    timer.latencies = driver.latencies
+    timer.elapsed = sum(driver.latencies)
+    driver.game.close()
+    return [dict(scenario="gui_check_guess", size=guesses, games=report["games"], **timer.summary())]
+
+
+def cli_startup(seed, runs):
+    """
+    Times cold starts of "guess_the_number.py cli" in fresh interpreters.
+    """
+    from benchmarks.startup import cold_start
+    timer = cold_start(runs)
+    return [dict(scenario="cli_startup", size=runs, **timer.summary())]
+
+
+def telemetry_emit(seed, events):
+    """
+    Times telemetry emit() on a disabled bus and on an in-memory aggregator.
+    """
+    import telemetry
+    rng = random.Random(seed)
+    durations = [rng.random() / 1000 for _ in range(events)]
+    results = []
+    for label, sinks in (("disabled", [telemetry.NullSink()]), ("aggregator", [telemetry.Aggregator()])):
+        bus = telemetry.Telemetry(sinks)
+        timer = Timer()
+        with timer.measure():
+            for duration in durations:
+                bus.emit(telemetry.GUESS_MADE, duration, mode="single", result=-1)
+        results.append(dict(scenario=f"telemetry_emit_{label}", size=events,
+                            **timer.summary(operations=events)))
+    return results
+
+
+def game_records(seed, games):
+    """
+    Records the given number of bisection games in a binary file, then
+    times decoding every record and scanning only the headers.
+    """
+    import game_record
+    rng = random.Random(seed)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "games.rec")
+        write = Timer()
+        with write.measure(), game_record.RecordWriter(path) as writer:
+            for _ in range(games):
+                secret = rng.randint(1, 1000)
+                low, high, guesses = 1, 1000, []
+                while True:
+                    guess = (low + high) // 2
+                    guesses.append(guess)
+                    if guess == secret:
+                        break
+                    if guess < secret:
+                        low = guess + 1
+                    else:
+                        high = guess - 1
+                writer.write(game_record.GameRecord("single", rng.getrandbits(32), 1, 1000, 10,
+                                                    False, True, guesses))
+        size = os.path.getsize(path)
+        results.append(dict(scenario="game_records_write", size=games, bytes_per_game=size / games,
+                            **write.summary(operations=games)))
+        with game_record.RecordReader(path) as reader:
+            decode = Timer()
+            with decode.measure():
+                total = sum(len(record.guesses) for record in reader)
+            results.append(dict(scenario="game_records_decode", size=games, guesses=total,
+                                **decode.summary(operations=games)))
+            scan = Timer()
+            with scan.measure():
+                wins = sum(won for _, won, _ in reader.scan())
+            results.append(dict(scenario="game_records_scan", size=games, wins=wins,
+                                **scan.summary(operations=games)))
+    return results
+
+
+def secret_draws(seed, games):
+    """
+    Times drawing secrets one game at a time (SessionRng.secret() and the
+    random module it replaced) and a block at a time (SessionRng.secrets()).
+    """
+    from game_engine import GameRange
+    from rng_service import SessionRng
+    game_range = GameRange(1, 100)
+    results = []
+    rng = SessionRng(seed)
+    single = Timer()
+    with single.measure():
+        for _ in range(games):
+            rng.secret(game_range)
+    results.append(dict(scenario="secret_draws_single", size=games, **single.summary(operations=games)))
+    module_rng = random.Random(seed)
+    module = Timer()
+    with module.measure():
+        for _ in range(games):
+            game_range.random_secret(module_rng)
+    results.append(dict(scenario="secret_draws_random_module", size=games,
+                        **module.summary(operations=games)))
+    rng.secrets(game_range, 1)  # imports numpy outside the timing
+    block = Timer()
+    with block.measure():
+        rng.secrets(game_range, games)
+    results.append(dict(scenario="secret_draws_block", size=games, **block.summary(operations=games)))
+    return results
+
+
+def hint_engine(seed, hints):
+    """
+    Times picking hints with HintEngine on a small range and on a 4096-bit
+    one, following a bisecting player between hints.
+    """
+    from game_engine import GameRange, TOO_LOW, TOO_HIGH
+    from hints import HintEngine, HINT_EVERY
+    rng = random.Random(seed)
+    results = []
+    for label, game_range in (("small", GameRange(1, 1000)), ("4096_bits", GameRange.bits(4096))):
+        timer = Timer()
+        given = 0
+        while given < hints:
+            secret = rng.randint(game_range.low, game_range.high)
+            engine = HintEngine(game_range)
+            low, high = game_range.low, game_range.high
+            for guess_count in range(1, 64):
+                guess = (low + high) // 2
+                if guess == secret:
+                    break
+                result = TOO_LOW if guess < secret else TOO_HIGH
+                low, high = (guess + 1, high) if result == TOO_LOW else (low, guess - 1)
+                engine.observe(guess, result)
+                if guess_count % HINT_EVERY == 0:
+                    with timer.measure():
+                        hint = engine.next_hint(secret)
+                    given += 1
+                    if hint is None:
+                        break
+                    low, high = engine.candidates.low, engine.candidates.high
+        results.append(dict(scenario=f"hint_engine_{label}", size=given, **timer.summary()))
+    return results
+
+
+def input_parsing(seed, inputs):
+    """
+    Times InputParser.guess() on plain digits, on padded or signed numbers
+    and on invalid input, against int() with a ValueError handler.
+    """
+    from game_engine import GameRange
+    from input_parser import InputParser, RateLimiter
+    rng = random.Random(seed)
+    kinds = {
+        "digits": [str(rng.randint(1, 1000)) for _ in range(inputs)],
+        "padded": [f" {rng.randint(-1000, 1000):+d} " for _ in range(inputs)],
+        "invalid": [rng.choice(("", "abc", "12a", "1.5", "-")) for _ in range(inputs)],
+    }
+    results = []
+    for label, limiter in (("", None), ("_rate_limited", RateLimiter(1e12))):
+        parser = InputParser(GameRange(1, 1000), limiter)
+        for kind, lines in kinds.items():
+            timer = Timer()
+            with timer.measure():
+                for line in lines:
+                    parser.guess(line)
+            results.append(dict(scenario=f"input_parsing_{kind}{label}", size=inputs,
+                                **timer.summary(operations=inputs)))
+    timer = Timer()
+    with timer.measure():
+        for line in kinds["invalid"]:
+            try:
+                int(line)
+            except ValueError:
+                pass
+    results.append(dict(scenario="input_parsing_invalid_int", size=inputs, **timer.summary(operations=inputs)))
+    return results
+
+
+def session_resume(seed, sessions, guesses=40, synced_guesses=200):
+    """
+    Times journalling guesses with a SessionJournal (appends, with the
+    periodic compactions), then restoring games from the journal: reading
+    the file and rebuilding the game and its hints.  The bulk runs without
+    fsync; synced_guesses appends are timed with it, as players get them.
+    """
+    from game_engine import GameRange
+    from hints import HintEngine
+    from rng_service import SessionRng
+    import session_store
+    rng = SessionRng(seed)
+    game_range = GameRange(1, 1000)
+    append = Timer()
+    synced = Timer()
+    restore = Timer()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, session_store.SESSION_FILE)
+        journal = session_store.SessionJournal(path)
+        journal.start(session_store.SessionSnapshot("single", 1, 1, 1000, 0, True, ["player"]))
+        for _ in range(synced_guesses):
+            with synced.measure():
+                journal.add_guess(rng.randint(1, 1000))
+        journal.finish()
+        journal = session_store.SessionJournal(path, fsync=False)
+        for _ in range(sessions):
+            game_seed, _ = rng.secret(game_range)
+            journal.start(session_store.SessionSnapshot("single", game_seed, 1, 1000, 0, True, ["player"]))
+            for _ in range(guesses):
+                with append.measure():
+                    journal.add_guess(rng.randint(1, 1000))
+            journal.close()
+            with restore.measure():
+                snapshot = journal.load()
+                snapshot.game(HintEngine(game_range))
+        journal.finish()
+    return [dict(scenario="session_append", size=sessions * guesses, **append.summary()),
+            dict(scenario="session_append_fsync", size=synced_guesses, **synced.summary()),
+            dict(scenario="session_resume", size=sessions, guesses=guesses, **restore.summary())]
+
+
+def game_analytics(seed, games, new_games=1000):
+    """
+    Times loading a recording of games into GameStats, then reading
+    new_games appended games and building the statistics report.
+    """
+    try:
+        import analytics
+    except ImportError:
+        return [dict(scenario="game_analytics", size=games, skipped="numpy not installed")]
+    import game_record
+    rng = random.Random(seed)
+    players = [f"player{i}" for i in range(max(1, games // 200))]
+
+    def record(count):
+        with game_record.RecordWriter(path) as writer:
+            for _ in range(count):
+                guesses = rng.randint(1, 12)
+                writer.write(game_record.GameRecord(
+                    "single", rng.getrandbits(32), 1, 100, rng.choice((3, 5, 10)), rng.random() < 0.5,
+                    rng.random() < 0.7, range(1, guesses + 1), rng.choice(players)))
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "games.rec")
+        record(games)
+        stats = analytics.GameStats()
+        load = Timer()
+        with load.measure():
+            stats.ingest_recording(path)
+        results.append(dict(scenario="analytics_load", size=games, **load.summary(operations=games)))
+        record(new_games)
+        update = Timer()
+        with update.measure():
+            stats.ingest_recording(path)
+            analytics.format_report(stats, players[0])
+        results.append(dict(scenario="analytics_update", size=games, new_games=new_games,
+                            **update.summary()))
+    return results
+
+
+QUICK = [
+    (cli_startup, 20),
+    (cli_guess, 2000),
+    (cli_computer_guess, 2000),
+    (cli_replay, 20000),
+    (profiler_overhead, 20000),
+    (telemetry_emit, 100000),
+    (secret_draws, 100000),
+    (hint_engine, 10000),
+    (tournament_shards, 100000),
+    (input_parsing, 100000),
+    (session_resume, 2000),
+    (game_records, 200000),
+    (game_analytics, 200000),
+    (high_scores, 1000),
+    (high_scores, 100000),
+    (score_backends, 100000),
+    (player_registry, 100000),
+    (gui_check_guess, 2000),
+]
+
+FULL = QUICK + [
+    (high_scores, 1000000),
+    (score_backends, 1000000),
+    (game_records, 10000000),
+    (game_analytics, 10000000),
+    (secret_draws, 10000000),
+]
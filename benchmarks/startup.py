@@ -0,0 +1,96 @@
+"""
+Cold start of the game entry point.
+
+Launches fresh interpreters running "guess_the_number.py cli" on an empty
+replay file, so each run imports everything, prints the menu and exits at
+the first prompt.  The import-time report is read from "python -X
+importtime", and the run fails if the median start is over the budget or
+the cli path imported a module it must not (PyQt5, numpy):
+
+    python -m benchmarks.startup --runs 30 --budget-ms 150
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.harness import ROOT, Timer
+
+ENTRY_POINT = os.path.join(ROOT, "guess_the_number.py")
+CLI_FORBIDDEN = ("PyQt5", "numpy")
+
+
+def _command(arguments, replay_file, *options):
+    return [sys.executable, *options, ENTRY_POINT, *arguments, "--replay", replay_file]
+
+
+def import_profile(arguments=("cli",), top=10):
+    """
+    Runs the entry point once under -X importtime and returns
+    (the top imports as (module, self µs, cumulative µs) by cumulative
+    time, the names of all imported modules).
+    """
+    with tempfile.NamedTemporaryFile("w", suffix=".txt") as replay:
+        completed = subprocess.run(_command(arguments, replay.name, "-X", "importtime"),
+                                   cwd=ROOT, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.PIPE, text=True, check=True)
+    imports = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            continue  # the header line
+        imports.append((fields[2].strip(), self_us, cumulative_us))
+    modules = {name for name, _, _ in imports}
+    return sorted(imports, key=lambda entry: -entry[2])[:top], modules
+
+
+def cold_start(runs=20, arguments=("cli",)):
+    """
+    Times runs fresh launches of the entry point and returns the Timer.
+    """
+    timer = Timer()
+    with tempfile.NamedTemporaryFile("w", suffix=".txt") as replay:
+        command = _command(arguments, replay.name)
+        for _ in range(runs):
+            with timer.measure():
+                subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+    return timer
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup",
+                                     description="Measure the cold start of the cli entry point.")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--top", type=int, default=10, help="Imports shown in the report")
+    parser.add_argument("--budget-ms", type=float, default=150.0,
+                        help="Fail if the median cold start takes longer")
+    args = parser.parse_args()
+
+    top, modules = import_profile(top=args.top)
+    print(f"{'cumulative ms':>13} {'self ms':>8}  module")
+    for name, self_us, cumulative_us in top:
+        print(f"{cumulative_us / 1000:>13.2f} {self_us / 1000:>8.2f}  {name}")
+    print(f"{len(modules)} modules imported")
+
+    summary = cold_start(args.runs).summary()
+    median_ms = summary["p50_us"] / 1000
+    print(f"cold start over {args.runs} runs: p50 {median_ms:.1f} ms, "
+          f"p99 {summary['p99_us'] / 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    failures = [f"imported {name}" for name in CLI_FORBIDDEN
+                if any(module == name or module.startswith(name + ".") for module in modules)]
+    if median_ms > args.budget_ms:
+        failures.append(f"median cold start {median_ms:.1f} ms is over the budget")
+    for message in failures:
+        print(f"FAIL {message}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
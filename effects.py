@@ -0,0 +1,193 @@
+"""
+Non-blocking sound and animation effects.
+
+Effects are queued as events and delivered on a background thread, so the
+game itself never waits for them.  Anything that renders effects (a sound
+backend, the GUI's feedback label animation) subscribes to the same event
+stream.
+
+Only sounds are paced: each takes effect_duration seconds, so they play
+one after another instead of on top of each other.  Animations are
+delivered as soon as the worker is free, even while a sound is playing,
+and pending animations of the same name are coalesced into the latest
+one.  At most MAX_PENDING_SOUNDS sounds wait; past that the oldest is
+dropped (and counted in dropped), so a burst of guesses cannot leave the
+game playing sounds long after the fact.
+
+Set GUESS_EFFECTS=headless in the environment, or call
+configure(headless=True), to deliver events with no pacing at all, which
+is what scripted and batch runs want.
+"""
+import collections
+import os
+import sys
+import threading
+import time
+
+DEFAULT_EFFECT_DURATION = 0.5
+MAX_PENDING_SOUNDS = 8
+
+
+class EffectEvent:
+    """
+    One effect: its kind ('sound' or 'animation'), its name and any extra data.
+    """
+    __slots__ = ("kind", "name", "data")
+
+    def __init__(self, kind, name, data=None):
+        self.kind = kind
+        self.name = name
+        self.data = data or {}
+
+    def __repr__(self):
+        return f"EffectEvent({self.kind!r}, {self.name!r}, {self.data!r})"
+
+
+class EffectsScheduler:
+    """
+    Queues effect events and hands them to subscribers on a worker thread.
+    """
+
+    def __init__(self, effect_duration=DEFAULT_EFFECT_DURATION, headless=False,
+                 max_pending_sounds=MAX_PENDING_SOUNDS):
+        """
+        Args:
+            effect_duration: Seconds each sound occupies the effect stream.
+            headless: Deliver events back to back, ignoring effect_duration.
+            max_pending_sounds: The most sounds waiting to play; the oldest
+                is dropped past that.
+        """
+        self.effect_duration = effect_duration
+        self.headless = headless
+        self.max_pending_sounds = max_pending_sounds
+        self.dropped = 0
+        self._subscribers = []
+        self._sounds = collections.deque()
+        self._animations = {}
+        self._busy = False
+        self._sound_free_at = 0.0
+        self._worker = None
+        self._stopping = False
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def subscribe(self, callback):
+        """
+        Calls callback(event) for every event from now on.  Callbacks run on
+        the worker thread.
+        """
+        with self._lock:
+            self._subscribers = self._subscribers + [callback]
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers = [cb for cb in self._subscribers if cb is not callback]
+
+    def emit(self, kind, name, **data):
+        """
+        Queues an effect and returns immediately.
+        """
+        event = EffectEvent(kind, name, data)
+        with self._lock:
+            if kind == "sound":
+                if len(self._sounds) >= self.max_pending_sounds:
+                    self._sounds.popleft()
+                    self.dropped += 1
+                self._sounds.append(event)
+            else:
+                self._animations.pop((kind, name), None)
+                self._animations[(kind, name)] = event
+            self._changed.notify_all()
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="effects", daemon=True)
+                self._worker.start()
+
+    def _next_event(self):
+        """
+        Waits for the next event due, holding the lock, or returns None once
+        shutting down with nothing left to deliver.
+        """
+        while True:
+            if self._animations:
+                key = next(iter(self._animations))
+                return self._animations.pop(key)
+            if self._sounds:
+                wait = self._sound_free_at - time.monotonic()
+                if wait <= 0 or self.headless or self._stopping:
+                    return self._sounds.popleft()
+                self._changed.wait(wait)
+            elif self._stopping:
+                return None
+            else:
+                self._changed.wait()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                event = self._next_event()
+                if event is None:
+                    return
+                self._busy = True
+                subscribers = self._subscribers
+            for callback in subscribers:
+                try:
+                    callback(event)
+                except Exception as e:
+                    print(f"Error in effect handler: {e}", file=sys.stderr)
+            with self._lock:
+                if event.kind == "sound" and not self.headless and self.effect_duration > 0:
+                    self._sound_free_at = time.monotonic() + self.effect_duration
+                self._busy = False
+                self._changed.notify_all()
+
+    def drain(self):
+        """
+        Blocks until every queued effect has been delivered.
+        """
+        with self._lock:
+            while self._worker is not None and (self._sounds or self._animations or self._busy):
+                self._changed.wait()
+
+    def shutdown(self):
+        """
+        Stops the worker thread, skipping the pacing of pending effects.
+        """
+        with self._lock:
+            worker = self._worker
+            if worker is None:
+                return
+            self._stopping = True
+            self._changed.notify_all()
+        worker.join()
+        with self._lock:
+            self._worker = None
+            self._stopping = False
+            self._sound_free_at = 0.0
+            self._changed.notify_all()
+
+
+_default_scheduler = None
+
+
+def default_scheduler():
+    """
+    Returns the shared scheduler, creating it on first use.
+    """
+    global _default_scheduler
+    if _default_scheduler is None:
+        headless = os.environ.get("GUESS_EFFECTS", "").lower() == "headless"
+        _default_scheduler = EffectsScheduler(headless=headless)
+    return _default_scheduler
+
+
+def configure(effect_duration=None, headless=None):
+    """
+    Changes the pacing of the shared scheduler.
+    """
+    scheduler = default_scheduler()
+    if effect_duration is not None:
+        scheduler.effect_duration = effect_duration
+    if headless is not None:
+        scheduler.headless = headless
+    return scheduler
@@ -0,0 +1,328 @@
+"""
+I/O-free game logic for the number guessing game.
+
+GameState plays a single game one guess at a time, and MatchState a game
+of several players taking turns at one secret.  BatchGames advances
+many independent games at once over array-backed state, which is what
+simulations and balancing runs should use.  GameRange holds the bounds of
+the secret number; it works on Python ints of any size and never stores
+anything per value, so a game over 1..2**64 costs the same as one over
+1..10.
+"""
+from array import array
+
+_numpy_module = False  # False until the first import attempt
+
+# Results returned by a step.
+TOO_LOW = -1
+CORRECT = 0
+TOO_HIGH = 1
+OUT_OF_ATTEMPTS = 2
+
+# Attempts allowed at each difficulty level.
+DIFFICULTY_ATTEMPTS = {"easy": 10, "medium": 5, "hard": 3}
+
+# The range used when none is configured.
+DEFAULT_LOW = 1
+DEFAULT_HIGH = 100
+
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+
+# Status of a game.
+PLAYING = 0
+WON = 1
+LOST = 2
+
+
+def _numpy():
+    """
+    Imports numpy on first use, so that interactive games never pay for it.
+    Returns None if numpy is not installed; BatchGames then falls back to
+    the array module.
+    """
+    global _numpy_module
+    if _numpy_module is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy_module = numpy
+    return _numpy_module
+
+
+class GameRange:
+    """
+    The bounds of the secret number, or of the numbers still possible as
+    feedback comes in.
+    """
+    __slots__ = ("low", "high")
+
+    def __init__(self, low=DEFAULT_LOW, high=DEFAULT_HIGH):
+        if low > high:
+            raise ValueError(f"The lowest number ({low}) is above the highest ({high}).")
+        self.low = low
+        self.high = high
+
+    @classmethod
+    def bits(cls, bits):
+        """
+        The range of unsigned numbers with the given number of bits.
+        """
+        return cls(0, (1 << bits) - 1)
+
+    def __repr__(self):
+        return f"GameRange({self.low}, {self.high})"
+
+    def __str__(self):
+        return f"between {self.low} and {self.high}"
+
+    def __contains__(self, number):
+        return self.low <= number <= self.high
+
+    def __eq__(self, other):
+        return isinstance(other, GameRange) and (self.low, self.high) == (other.low, other.high)
+
+    @property
+    def size(self):
+        return self.high - self.low + 1
+
+    def copy(self):
+        return GameRange(self.low, self.high)
+
+    def random_secret(self, rng):
+        """
+        Draws a secret with rng (random.Random or the random module).
+        """
+        return rng.randint(self.low, self.high)
+
+    def midpoint(self):
+        return (self.low + self.high) // 2
+
+    def narrow(self, guess, result):
+        """
+        Shrinks the range in place after feedback on a guess.  Returns
+        False if the feedback contradicts the range.
+        """
+        if result == TOO_LOW:
+            self.low = max(self.low, guess + 1)
+        elif result == TOO_HIGH:
+            self.high = min(self.high, guess - 1)
+        elif result == CORRECT:
+            self.low = self.high = guess
+        return self.low <= self.high
+
+
+class GameState:
+    """
+    The state of a single game: the secret number, the attempts budget
+    and the number of guesses made so far.
+    """
+    __slots__ = ("secret", "max_attempts", "guess_count", "status", "last_result")
+
+    def __init__(self, secret, max_attempts=0):
+        """
+        Args:
+            secret: The number to be guessed.
+            max_attempts: The maximum number of attempts allowed (0 means unlimited).
+        """
+        self.secret = secret
+        self.max_attempts = max_attempts
+        self.guess_count = 0
+        self.status = PLAYING
+        self.last_result = None
+
+    @property
+    def attempts_left(self):
+        """
+        The number of attempts left, or None if attempts are unlimited.
+        """
+        if self.max_attempts <= 0:
+            return None
+        return max(self.max_attempts - self.guess_count, 0)
+
+    @property
+    def finished(self):
+        return self.status != PLAYING
+
+    def step(self, guess):
+        """
+        Takes a guess and returns TOO_LOW, TOO_HIGH, CORRECT or OUT_OF_ATTEMPTS.
+
+        OUT_OF_ATTEMPTS is returned for a wrong guess that used up the last
+        attempt; last_result still tells whether that guess was too low or
+        too high.
+        """
+        if self.status != PLAYING:
+            raise ValueError("The game is already over.")
+        self.guess_count += 1
+        if guess < self.secret:
+            result = TOO_LOW
+        elif guess > self.secret:
+            result = TOO_HIGH
+        else:
+            self.last_result = CORRECT
+            self.status = WON
+            return CORRECT
+        self.last_result = result
+        if 0 < self.max_attempts <= self.guess_count:
+            self.status = LOST
+            return OUT_OF_ATTEMPTS
+        return result
+
+
+class MatchState(GameState):
+    """
+    A game of players taking turns at one shared secret, each with their
+    own attempts budget.  Players guess in a fixed rotation, so the turn
+    and every player's guess count follow from the total guess count: a
+    match keeps the same few fields as a GameState whatever the number of
+    players, and a step is a GameState step.
+
+    max_attempts and attempts_left are those of the whole match; the
+    budget of each player is attempts_per_player.  The match is lost once
+    every player has used up their budget.
+    """
+    __slots__ = ("players", "attempts_per_player")
+
+    def __init__(self, secret, players=2, max_attempts=0):
+        """
+        Args:
+            secret: The number to be guessed.
+            players: The number of players.
+            max_attempts: The attempts allowed to each player (0 means unlimited).
+        """
+        if players < 1:
+            raise ValueError("A match needs at least one player.")
+        super().__init__(secret, max_attempts * players)
+        self.players = players
+        self.attempts_per_player = max_attempts
+
+    @property
+    def player(self):
+        """
+        The index of the player whose turn it is.
+        """
+        return self.guess_count % self.players
+
+    @property
+    def winner(self):
+        """
+        The index of the player who guessed the secret, or None.
+        """
+        return (self.guess_count - 1) % self.players if self.status == WON else None
+
+    def guesses_of(self, player):
+        """
+        The number of guesses the player with the given index has made.
+        """
+        return self.guess_count // self.players + (player < self.guess_count % self.players)
+
+    def player_attempts_left(self, player=None):
+        """
+        The number of attempts a player (by default the one whose turn it
+        is) has left, or None if attempts are unlimited.
+        """
+        if self.attempts_per_player <= 0:
+            return None
+        player = self.player if player is None else player
+        return max(self.attempts_per_player - self.guesses_of(player), 0)
+
+
+class BatchGames:
+    """
+    Many independent games stored column-wise.  step() takes one guess per
+    game and returns one result per game; games that are already over
+    ignore their guess and report their final result again.
+    """
+
+    def __init__(self, secrets, max_attempts=0):
+        """
+        Args:
+            secrets: A sequence with the secret number of every game.
+            max_attempts: The attempts budget, shared (an int) or per game (a sequence).
+        """
+        size = len(secrets)
+        if isinstance(max_attempts, int):
+            max_attempts = [max_attempts] * size
+        # Secrets beyond 64 bits are kept as Python ints in plain lists.
+        self.wide = size > 0 and not (INT64_MIN <= min(secrets) and max(secrets) <= INT64_MAX)
+        self.np = np = None if self.wide else _numpy()
+        if self.wide:
+            self.secrets = list(secrets)
+            self.max_attempts = list(max_attempts)
+            self.guess_counts = [0] * size
+            self.status = [PLAYING] * size
+            self.results = [0] * size
+        elif np is not None:
+            self.secrets = np.asarray(secrets, dtype=np.int64)
+            self.max_attempts = np.asarray(max_attempts, dtype=np.int64)
+            self.guess_counts = np.zeros(size, dtype=np.int64)
+            self.status = np.zeros(size, dtype=np.int8)
+            self.results = np.zeros(size, dtype=np.int8)
+        else:
+            self.secrets = array("q", secrets)
+            self.max_attempts = array("q", max_attempts)
+            self.guess_counts = array("q", bytes(8 * size))
+            self.status = array("b", bytes(size))
+            self.results = array("b", bytes(size))
+
+    def __len__(self):
+        return len(self.secrets)
+
+    @property
+    def active(self):
+        """
+        The number of games still being played.
+        """
+        if self.np is not None:
+            return int(self.np.count_nonzero(self.status == PLAYING))
+        return sum(1 for status in self.status if status == PLAYING)
+
+    def step(self, guesses):
+        """
+        Takes one guess per game and returns the results array.
+        """
+        if self.np is not None:
+            return self._step_numpy(self.np.asarray(guesses, dtype=self.np.int64))
+        return self._step_python(guesses)
+
+    def _step_numpy(self, guesses):
+        np = self.np
+        playing = self.status == PLAYING
+        self.guess_counts += playing
+        # Compared, not subtracted: guesses - secrets can overflow int64.
+        result = (guesses > self.secrets).astype(np.int8) - (guesses < self.secrets)
+        won = playing & (result == CORRECT)
+        lost = (playing & ~won & (self.max_attempts > 0)
+                & (self.guess_counts >= self.max_attempts))
+        self.status[won] = WON
+        self.status[lost] = LOST
+        result[lost] = OUT_OF_ATTEMPTS
+        self.results[playing] = result[playing]
+        return self.results
+
+    def _step_python(self, guesses):
+        secrets = self.secrets
+        max_attempts = self.max_attempts
+        counts = self.guess_counts
+        status = self.status
+        results = self.results
+        for i, guess in enumerate(guesses):
+            if status[i] != PLAYING:
+                continue
+            counts[i] += 1
+            secret = secrets[i]
+            if guess < secret:
+                result = TOO_LOW
+            elif guess > secret:
+                result = TOO_HIGH
+            else:
+                status[i] = WON
+                results[i] = CORRECT
+                continue
+            if 0 < max_attempts[i] <= counts[i]:
+                status[i] = LOST
+                result = OUT_OF_ATTEMPTS
+            results[i] = result
+        return results
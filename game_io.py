@@ -0,0 +1,148 @@
+"""
+Console channels for the command line game.
+
+Every prompt function in the CLI takes a console and calls console.ask()
+for input and console.say() for output instead of input() and print().
+Swap the console to drive the game from a script or a recorded transcript:
+
+    TerminalConsole  the real terminal (the default)
+    ScriptedConsole  answers from an in-memory list or callback
+    BatchConsole     answers read from a file or pipe, output written
+                     through a large buffer
+
+Only the terminal is interactive: the CLI saves the game in progress for
+resuming (see session_store) and offers to resume it only when a person is
+answering, never for scripted or replayed answers.
+"""
+import sys
+from collections import deque
+
+
+class TerminalConsole:
+    """
+    Reads from and writes to the terminal with input() and print().
+    """
+    interactive = True
+
+    def ask(self, prompt=""):
+        return input(prompt)
+
+    def say(self, text=""):
+        print(text)
+
+    def flush(self):
+        sys.stdout.flush()
+
+
+class ScriptedConsole:
+    """
+    Answers prompts from a queue of lines or from a callback.
+    """
+    interactive = False
+
+    def __init__(self, answers=(), respond=None, keep_output=True):
+        """
+        Args:
+            answers: Lines to answer prompts with, in order.
+            respond: Optional callback respond(prompt, said) used once the
+                answers run out; said is the list of lines output since
+                the previous prompt.
+            keep_output: Whether to keep everything said in self.output.
+        """
+        self.answers = deque(answers)
+        self.respond = respond
+        self.keep_output = keep_output
+        self.output = []
+        self._said = []
+
+    def ask(self, prompt=""):
+        if self.keep_output:
+            self.output.append(prompt)
+        if self.answers:
+            answer = self.answers.popleft()
+        elif self.respond is not None:
+            answer = self.respond(prompt, self._said)
+        else:
+            raise EOFError("The script has no more answers.")
+        self._said.clear()
+        return answer
+
+    def say(self, text=""):
+        self._said.append(text)
+        if self.keep_output:
+            self.output.append(text)
+
+    def feed(self, *answers):
+        self.answers.extend(answers)
+
+    def flush(self):
+        pass
+
+
+class BatchConsole:
+    """
+    Replays answers from a file or pipe and writes the transcript to an
+    output file, buffering both sides.
+    """
+    interactive = False
+
+    def __init__(self, infile, outfile=None, echo=False, buffer_size=1 << 20):
+        """
+        Args:
+            infile: A path or a readable text file with one answer per line.
+            outfile: A path or a writable text file (None discards output).
+            echo: Whether to write the answers into the transcript as well.
+            buffer_size: The size of the read and write buffers in bytes.
+        """
+        self._owns = []
+        if isinstance(infile, str):
+            infile = open(infile, "r", buffering=buffer_size)
+            self._owns.append(infile)
+        if isinstance(outfile, str):
+            outfile = open(outfile, "w", buffering=buffer_size)
+            self._owns.append(outfile)
+        self.outfile = outfile
+        self._readline = infile.readline
+        self._write = outfile.write if outfile is not None else None
+        self.echo = echo
+
+    def ask(self, prompt=""):
+        line = self._readline()
+        if not line:
+            raise EOFError("The transcript has no more answers.")
+        answer = line.rstrip("\r\n")
+        if self._write is not None:
+            self._write(prompt + answer + "\n" if self.echo else prompt)
+        return answer
+
+    def say(self, text=""):
+        if self._write is not None:
+            self._write(text + "\n")
+
+    def flush(self):
+        """
+        Flushes the transcript, whether or not the console opened it, so
+        that it is not lost or interleaved with stderr out of order.
+        """
+        if self.outfile is not None:
+            self.outfile.flush()
+
+    def close(self):
+        for f in self._owns:
+            f.close()
+        self._owns = []
+
+
+_default_console = TerminalConsole()
+
+
+def default_console():
+    return _default_console
+
+
+def set_default_console(console):
+    """
+    Makes console the one used by CLI functions called without a console.
+    """
+    global _default_console
+    _default_console = console
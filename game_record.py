@@ -0,0 +1,421 @@
+"""
+Compact binary recordings of whole games.
+
+A recording file starts with MAGIC and holds one record per game, each
+prefixed with its length as a varint, so a reader can skip a game without
+decoding it.  A record is, in order:
+
+    mode            1 byte, an index into MODES
+    flags           1 byte, HINTS, WON and PLAYER
+    player name     varint length and UTF-8 bytes, only if PLAYER is set
+    seed            varint, the 64-bit game seed (32-bit in older files,
+                    see rng_service)
+    low             zigzag varint
+    high - low      varint
+    max attempts    varint (0 for unlimited; the whole match's budget in
+                    two-player games, whose player is the winner)
+    guess count     varint
+    guesses         zigzag varints, each the difference to the previous
+                    guess (the first to low)
+
+Bisecting players move by less and less, so most guesses take one byte.
+A recorded game replays exactly: the secret comes from the game seed
+(rng_service.secret_for_seed()) and the guesses are stepped through a
+fresh GameState.  Version 1 files drew their secrets with random.Random
+and are not read any more.
+
+RecordWriter streams records to a file; RecordReader reads a file through
+mmap and decodes records lazily, and scan() and headers() walk just the
+headers.  The
+shared recorder is configured from GUESS_RECORD (a file path), or with
+configure().  If GUESS_RECORD cannot be recorded to (an unwritable path,
+or a file from an older version), a message goes to stderr and games are
+not recorded:
+
+    python game_record.py stats games.rec
+    python game_record.py replay games.rec
+"""
+import argparse
+import atexit
+import mmap
+import os
+import sys
+from itertools import accumulate
+
+from game_engine import GameState, CORRECT, WON
+from rng_service import secret_for_seed
+
+MAGIC = b"GTNR\x02"
+MODES = ("single", "two_player", "computer")
+HINTS = 1
+WON_FLAG = 2
+PLAYER = 4
+
+
+def put_varint(out, value):
+    """
+    Appends the unsigned value to the bytearray out, 7 bits per byte.
+    """
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    """
+    Returns (the unsigned varint at data[pos], the position after it).
+    """
+    byte = data[pos]
+    if byte < 0x80:
+        return byte, pos + 1
+    value = byte & 0x7F
+    shift = 7
+    while True:
+        pos += 1
+        byte = data[pos]
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos + 1
+        shift += 7
+
+
+def zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+# unzigzag() of every one-byte varint.
+_SMALL_DELTAS = [unzigzag(byte) for byte in range(0x80)]
+
+
+class GameRecord:
+    """
+    One recorded game.
+    """
+    __slots__ = ("mode", "seed", "low", "high", "max_attempts", "hints_enabled", "won", "guesses",
+                 "player")
+
+    def __init__(self, mode, seed, low, high, max_attempts=0, hints_enabled=False,
+                 won=False, guesses=(), player=""):
+        """
+        Args:
+            mode: One of MODES.
+            seed: The game seed the secret was drawn with (see secret()).
+            low: The lowest possible secret.
+            high: The highest possible secret.
+            max_attempts: The attempts budget (0 means unlimited).
+            hints_enabled: Whether hints were on.
+            won: Whether the game was won.
+            guesses: The guesses in order.
+            player: The name of the player who guessed (optional).
+        """
+        self.mode = mode
+        self.seed = seed
+        self.low = low
+        self.high = high
+        self.max_attempts = max_attempts
+        self.hints_enabled = hints_enabled
+        self.won = won
+        self.guesses = list(guesses)
+        self.player = player
+
+    def secret(self):
+        """
+        Returns the secret of the game, from its game seed.
+        """
+        return secret_for_seed(self.low, self.high, self.seed)
+
+    def encode(self):
+        """
+        Returns the record without its length prefix.
+        """
+        flags = ((HINTS if self.hints_enabled else 0) | (WON_FLAG if self.won else 0)
+                 | (PLAYER if self.player else 0))
+        out = bytearray((MODES.index(self.mode), flags))
+        if self.player:
+            name = self.player.encode("utf-8")
+            put_varint(out, len(name))
+            out += name
+        put_varint(out, self.seed)
+        put_varint(out, zigzag(self.low))
+        put_varint(out, self.high - self.low)
+        put_varint(out, self.max_attempts)
+        put_varint(out, len(self.guesses))
+        previous = self.low
+        for guess in self.guesses:
+            put_varint(out, zigzag(guess - previous))
+            previous = guess
+        return out
+
+    @classmethod
+    def decode(cls, data, pos=0, end=None):
+        """
+        Decodes the record in data[pos:end] (after its length prefix).
+        """
+        end = len(data) if end is None else end
+        mode = MODES[data[pos]]
+        flags = data[pos + 1]
+        pos += 2
+        player = ""
+        if flags & PLAYER:
+            length, pos = read_varint(data, pos)
+            player = bytes(data[pos:pos + length]).decode("utf-8", errors="replace")
+            pos += length
+        seed, pos = read_varint(data, pos)
+        low, pos = read_varint(data, pos)
+        low = unzigzag(low)
+        span, pos = read_varint(data, pos)
+        max_attempts, pos = read_varint(data, pos)
+        count, pos = read_varint(data, pos)
+        guesses = []
+        previous = low
+        while count and end - pos > count:
+            delta, pos = read_varint(data, pos)
+            previous += unzigzag(delta)
+            guesses.append(previous)
+            count -= 1
+        if count:
+            # As many bytes as guesses are left, so every delta is one byte.
+            steps = accumulate(map(_SMALL_DELTAS.__getitem__, data[pos:pos + count]), initial=previous)
+            next(steps)
+            guesses.extend(steps)
+        return cls(mode, seed, low, low + span, max_attempts, bool(flags & HINTS),
+                   bool(flags & WON_FLAG), guesses, player)
+
+    def replay(self):
+        """
+        Steps the guesses through a fresh game and returns its GameState.
+        """
+        game = GameState(self.secret(), self.max_attempts)
+        for guess in self.guesses:
+            if game.step(guess) == CORRECT or game.finished:
+                break
+        return game
+
+    def __eq__(self, other):
+        return isinstance(other, GameRecord) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return (f"GameRecord({self.mode!r}, seed={self.seed}, {self.low}..{self.high}, "
+                f"attempts={self.max_attempts}, won={self.won}, guesses={self.guesses!r}, "
+                f"player={self.player!r})")
+
+
+class RecordWriter:
+    """
+    Appends records to a recording file through a large write buffer.
+    """
+
+    def __init__(self, path, buffer_size=1 << 20):
+        self.path = path
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            with RecordReader(path) as reader:
+                end, size = reader.end(), len(reader)
+            if end < size:
+                # Drop a record torn by a crash, or new records would be unreadable.
+                os.truncate(path, end)
+        self._file = open(path, "ab", buffering=buffer_size)
+        if not exists:
+            self._file.write(MAGIC)
+        self.records = 0
+
+    def write(self, record):
+        body = record.encode()
+        prefix = bytearray()
+        put_varint(prefix, len(body))
+        self._file.write(prefix + body)
+        self.records += 1
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class RecordReader:
+    """
+    Reads a recording file through mmap.  Iterating decodes one record at
+    a time, so memory use does not grow with the file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if self._data[:len(MAGIC)] != MAGIC:
+            older = self._data[:len(MAGIC) - 1] == MAGIC[:-1]
+            self.close()
+            if older:
+                raise ValueError(f"{path} was recorded by an older version of the game.")
+            raise ValueError(f"{path} is not a game recording.")
+
+    def _bodies(self, pos=None):
+        data = self._data
+        pos = len(MAGIC) if pos is None else pos
+        end = len(data)
+        while pos < end:
+            try:
+                length, start = read_varint(data, pos)
+            except IndexError:
+                return  # a length torn by a crash
+            pos = start + length
+            if pos > end:
+                return  # a record torn by a crash
+            yield start, pos
+
+    def __len__(self):
+        return len(self._data)
+
+    def end(self):
+        """
+        Returns the offset just after the last complete record.
+        """
+        end = len(MAGIC)
+        for _, end in self._bodies():
+            pass
+        return end
+
+    def __iter__(self):
+        data = self._data
+        for start, end in self._bodies():
+            yield GameRecord.decode(data, start, end)
+
+    def scan(self):
+        """
+        Yields (mode, won, guess count) for every record without decoding
+        the guesses.
+        """
+        data = self._data
+        for start, _ in self._bodies():
+            pos = start + 2
+            if data[start + 1] & PLAYER:
+                length, pos = read_varint(data, pos)
+                pos += length
+            for _ in range(4):  # seed, low, span, max attempts
+                while data[pos] & 0x80:
+                    pos += 1
+                pos += 1
+            count, _ = read_varint(data, pos)
+            yield MODES[data[start]], bool(data[start + 1] & WON_FLAG), count
+
+    def headers(self, offset=None):
+        """
+        Yields (mode index, flags, player, high - low, max attempts, guess
+        count, end offset) for every record from offset on (by default
+        the first record).  Passing the last end offset seen later picks
+        up only the records appended since.
+        """
+        data = self._data
+        for start, end in self._bodies(offset):
+            flags = data[start + 1]
+            pos = start + 2
+            player = ""
+            if flags & PLAYER:
+                length, pos = read_varint(data, pos)
+                player = bytes(data[pos:pos + length]).decode("utf-8", errors="replace")
+                pos += length
+            for _ in range(2):  # seed, low
+                while data[pos] & 0x80:
+                    pos += 1
+                pos += 1
+            span, pos = read_varint(data, pos)
+            max_attempts, pos = read_varint(data, pos)
+            count, _ = read_varint(data, pos)
+            yield data[start], flags, player, span, max_attempts, count, end
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._data = b""
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_default_recorder = None
+_recorder_configured = False
+
+
+def default_recorder():
+    """
+    Returns the shared RecordWriter, or None if games are not recorded.
+    It is opened on first use from GUESS_RECORD.
+    """
+    global _default_recorder, _recorder_configured
+    if not _recorder_configured:
+        _recorder_configured = True
+        path = os.environ.get("GUESS_RECORD")
+        if path:
+            try:
+                configure(RecordWriter(path))
+            except (OSError, ValueError) as e:
+                print(f"GUESS_RECORD ignored, games are not recorded: {e}", file=sys.stderr)
+    return _default_recorder
+
+
+def configure(recorder):
+    """
+    Makes recorder (a RecordWriter, or None to stop recording) the shared
+    recorder, closing the previous one.
+    """
+    global _default_recorder, _recorder_configured
+    if _default_recorder is not None:
+        _default_recorder.close()
+    _default_recorder = recorder
+    _recorder_configured = True
+    if recorder is not None:
+        atexit.register(recorder.close)
+    return recorder
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect recorded games.")
+    parser.add_argument("command", choices=["stats", "replay"])
+    parser.add_argument("file")
+    args = parser.parse_args()
+    with RecordReader(args.file) as reader:
+        if args.command == "stats":
+            games = {mode: [0, 0, 0] for mode in MODES}
+            for mode, won, count in reader.scan():
+                totals = games[mode]
+                totals[0] += 1
+                totals[1] += won
+                totals[2] += count
+            print(f"{'mode':<12} {'games':>10} {'win rate':>9} {'mean guesses':>13}")
+            for mode, (played, wins, guesses) in games.items():
+                if played:
+                    print(f"{mode:<12} {played:>10} {wins / played:>9.2%} {guesses / played:>13.3f}")
+        else:
+            replayed = mismatches = 0
+            for record in reader:
+                if record.mode == "computer":
+                    continue  # the player's number is not recorded
+                replayed += 1
+                if (record.replay().status == WON) != record.won:
+                    mismatches += 1
+            print(f"{replayed} games replayed, {mismatches} with a different outcome")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+Asyncio server for hosting many number guessing games at once.
+
+Clients speak a line-based protocol over TCP or a Unix socket.  A single
+connection can run any number of games (sessions) side by side:
+
+    NEW <easy|medium|hard|attempts> [player name]
+        -> OK <session> <attempts> <low> <high>
+    GUESS <session> <number>
+        -> LOW <session> <attempts left>     the guess was too low
+        -> HIGH <session> <attempts left>    the guess was too high
+        -> WIN <session> <guesses>
+        -> LOSE <session> <secret>
+    QUIT
+        -> BYE
+
+Errors are answered with "ERR <message>".  Guesses outside the range are
+refused and do not use up an attempt.  With --max-rate, a connection
+sending lines faster than that is answered "ERR rate limit exceeded".
+Winning named players are saved to the shared high score store; if it
+cannot be written, the error goes to stderr and the win is still answered.
+
+With --evict-after, sessions left idle that long are paged out to a spool
+file (see session_store) and paged back in by their next guess, so idle
+games cost a few bytes of memory each.
+
+Run a server and measure it with the bundled load generator:
+
+    python game_server.py serve --port 5555 --evict-after 60
+    python game_server.py load --port 5555 --sessions 10000 --connections 50
+"""
+import argparse
+import asyncio
+import itertools
+import sys
+import time
+
+from game_engine import (
+    GameState, GameRange, TOO_LOW, TOO_HIGH, CORRECT, DIFFICULTY_ATTEMPTS, DEFAULT_LOW, DEFAULT_HIGH,
+)
+from rng_service import SessionRng
+from input_parser import parse_int, parse_number, RateLimiter, VALID, OUT_OF_RANGE
+from score_store import default_store
+from session_store import SessionSnapshot, SessionSpool
+
+
+class ServerSession:
+    """
+    One game hosted by the server, with what it takes to page it out.
+    """
+    __slots__ = ("game", "player_name", "owner", "seed", "guesses", "last_active")
+
+    def __init__(self, game, player_name, owner, seed, guesses=None):
+        self.game = game
+        self.player_name = player_name
+        self.owner = owner
+        self.seed = seed
+        self.guesses = guesses if guesses is not None else []
+        self.last_active = time.monotonic()
+
+
+class GameServer:
+    """
+    Holds the sessions of all connections and answers protocol lines.
+    """
+
+    def __init__(self, low=DEFAULT_LOW, high=DEFAULT_HIGH, store=None, seed=None, evict_after=0,
+                 spool_path=None, max_rate=0):
+        """
+        Args:
+            low: The lowest secret number.
+            high: The highest secret number.
+            store: The high score store (optional, defaults to the shared one).
+            seed: The seed of the secret numbers (optional).
+            evict_after: Page out sessions idle for this many seconds (0
+                keeps every session in memory).
+            spool_path: The file evicted sessions go to (optional, a
+                temporary file otherwise).
+            max_rate: The lines per second allowed to each connection (0
+                does not limit them).
+        """
+        self.game_range = GameRange(low, high)
+        self.rng = SessionRng(seed)
+        self.low = low
+        self.high = high
+        self.store = store
+        self.sessions = {}
+        self._session_ids = itertools.count(1)
+        self.games_played = 0
+        self.evict_after = evict_after
+        self.spool_path = spool_path
+        self.spool = None
+        self.max_rate = max_rate
+
+    def _get_store(self):
+        if self.store is None:
+            self.store = default_store()
+        return self.store
+
+    def new_session(self, difficulty, player_name="", owner=None):
+        """
+        Starts a game and returns its session id.
+        """
+        if difficulty in DIFFICULTY_ATTEMPTS:
+            attempts = DIFFICULTY_ATTEMPTS[difficulty]
+        else:
+            status, attempts = parse_number(difficulty, 1)
+            if status != VALID:
+                raise ValueError("Number of attempts must be positive.")
+        session_id = next(self._session_ids)
+        seed, secret = self.rng.secret(self.game_range)
+        game = GameState(secret, attempts)
+        self.sessions[session_id] = ServerSession(game, player_name, owner, seed)
+        return session_id, attempts
+
+    def evict_idle(self, max_idle, now=None):
+        """
+        Pages out the sessions idle for more than max_idle seconds and
+        returns how many were evicted.
+        """
+        now = time.monotonic() if now is None else now
+        idle = [session_id for session_id, session in self.sessions.items()
+                if now - session.last_active > max_idle]
+        if idle and self.spool is None:
+            self.spool = SessionSpool(self.spool_path)
+        for session_id in idle:
+            session = self.sessions.pop(session_id)
+            self.spool.put(session_id, SessionSnapshot(
+                "single", session.seed, self.low, self.high, session.game.max_attempts, False,
+                [session.player_name], session.guesses))
+        return len(idle)
+
+    def get_session(self, session_id, owner):
+        """
+        Returns a session, paging it back in if it was evicted.
+        """
+        session = self.sessions.get(session_id)
+        if session is None:
+            snapshot = self.spool.take(session_id)
+            session = ServerSession(snapshot.game(), snapshot.players[0], owner, snapshot.seed,
+                                    snapshot.guesses)
+            self.sessions[session_id] = session
+        return session
+
+    async def handle_line(self, line, owner, limiter=None):
+        """
+        Returns the reply to one protocol line.
+        Args:
+            line: The line received.
+            owner: The set of session ids of the connection.
+            limiter: The RateLimiter of the connection (optional).
+        """
+        if limiter is not None and not limiter.allow():
+            return "ERR rate limit exceeded"
+        parts = line.split(None, 2)
+        if not parts:
+            return "ERR empty command"
+        command = parts[0].upper()
+        if command == "NEW":
+            if len(parts) < 2:
+                return "ERR usage: NEW <difficulty> [name]"
+            player_name = parts[2].strip() if len(parts) > 2 else ""
+            try:
+                session_id, attempts = self.new_session(parts[1].lower(), player_name, owner)
+            except ValueError:
+                return "ERR difficulty must be easy, medium, hard or a positive number"
+            owner.add(session_id)
+            return f"OK {session_id} {attempts} {self.low} {self.high}"
+        if command == "GUESS":
+            if len(parts) < 3:
+                return "ERR usage: GUESS <session> <number>"
+            session_id = parse_int(parts[1])
+            status, guess = parse_number(parts[2], self.low, self.high)
+            if session_id is None or guess is None:
+                return "ERR usage: GUESS <session> <number>"
+            if session_id not in owner:
+                return f"ERR unknown session {session_id}"
+            if status == OUT_OF_RANGE:
+                return f"ERR guess must be between {self.low} and {self.high}"
+            session = self.get_session(session_id, owner)
+            session.last_active = time.monotonic()
+            session.guesses.append(guess)
+            game, player_name = session.game, session.player_name
+            result = game.step(guess)
+            if result == TOO_LOW:
+                return f"LOW {session_id} {game.attempts_left}"
+            if result == TOO_HIGH:
+                return f"HIGH {session_id} {game.attempts_left}"
+            self.end_session(session_id, owner)
+            if result == CORRECT:
+                if player_name:
+                    loop = asyncio.get_running_loop()
+                    try:
+                        await loop.run_in_executor(
+                            None, self._get_store().record, player_name, game.guess_count)
+                    except OSError as e:
+                        # The player still won: a store that cannot be written is only logged.
+                        print(f"Error saving the high score of {player_name}: {e}", file=sys.stderr)
+                return f"WIN {session_id} {game.guess_count}"
+            return f"LOSE {session_id} {game.secret}"
+        if command == "QUIT":
+            return "BYE"
+        return f"ERR unknown command {parts[0]}"
+
+    def end_session(self, session_id, owner):
+        owner.discard(session_id)
+        if self.sessions.pop(session_id, None) is None:
+            self.spool.discard(session_id)
+        self.games_played += 1
+
+    async def evict_periodically(self):
+        while True:
+            await asyncio.sleep(self.evict_after / 2)
+            self.evict_idle(self.evict_after)
+
+    async def handle_client(self, reader, writer):
+        owner = set()
+        limiter = RateLimiter(self.max_rate) if self.max_rate > 0 else None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = await self.handle_line(line.decode(errors="replace"), owner, limiter)
+                writer.write(reply.encode() + b"\n")
+                if reply == "BYE":
+                    break
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for session_id in list(owner):
+                self.end_session(session_id, owner)
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=5555, unix_path=None):
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_client, path=unix_path)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+        evictor = asyncio.create_task(self.evict_periodically()) if self.evict_after > 0 else None
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if evictor is not None:
+                evictor.cancel()
+            if self.spool is not None:
+                self.spool.close()
+
+
+async def _open(host, port, unix_path):
+    if unix_path:
+        return await asyncio.open_unix_connection(unix_path)
+    return await asyncio.open_connection(host, port)
+
+
+async def _play_sessions(host, port, unix_path, count, difficulty, latencies):
+    reader, writer = await _open(host, port, unix_path)
+
+    async def request(line):
+        started = time.perf_counter()
+        writer.write(line.encode() + b"\n")
+        reply = (await reader.readline()).decode().split()
+        latencies.append(time.perf_counter() - started)
+        return reply
+
+    for _ in range(count):
+        _, session_id, _, low, high = await request(f"NEW {difficulty}")
+        low, high = int(low), int(high)
+        while True:
+            guess = (low + high) // 2
+            reply = await request(f"GUESS {session_id} {guess}")
+            if reply[0] == "LOW":
+                low = guess + 1
+            elif reply[0] == "HIGH":
+                high = guess - 1
+            else:
+                break
+    writer.write(b"QUIT\n")
+    await reader.readline()
+    writer.close()
+
+
+async def run_load(host="127.0.0.1", port=5555, unix_path=None,
+                   sessions=10000, connections=50, difficulty="easy"):
+    """
+    Plays sessions games over the given number of connections with a
+    bisecting client and returns throughput and latency figures.
+    """
+    latencies = []
+    per_connection, extra = divmod(sessions, connections)
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _play_sessions(host, port, unix_path, per_connection + (i < extra), difficulty, latencies)
+        for i in range(connections)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "sessions": sessions,
+        "connections": connections,
+        "seconds": elapsed,
+        "sessions_per_second": sessions / elapsed,
+        "requests": len(latencies),
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Number guessing game server.")
+    parser.add_argument("mode", choices=["serve", "load"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5555)
+    parser.add_argument("--unix", help="Unix socket path (instead of TCP)")
+    parser.add_argument("--low", type=int, default=DEFAULT_LOW,
+                        help="Lower bound of the secret number")
+    parser.add_argument("--high", type=int, default=DEFAULT_HIGH,
+                        help="Upper bound of the secret number")
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--difficulty", default="easy")
+    parser.add_argument("--seed", type=int, help="Seed the secret numbers of the server")
+    parser.add_argument("--evict-after", type=float, default=0,
+                        help="Page out sessions idle for this many seconds (0 never does)")
+    parser.add_argument("--spool", metavar="FILE",
+                        help="Page evicted sessions out to FILE (a temporary file by default)")
+    parser.add_argument("--max-rate", type=float, default=0,
+                        help="Allow each connection at most this many lines per second (0 does not limit)")
+    args = parser.parse_args()
+    if args.mode == "serve":
+        server = GameServer(args.low, args.high, seed=args.seed, evict_after=args.evict_after,
+                            spool_path=args.spool, max_rate=args.max_rate)
+        try:
+            asyncio.run(server.serve(args.host, args.port, args.unix))
+        except KeyboardInterrupt:
+            pass
+    else:
+        results = asyncio.run(run_load(args.host, args.port, args.unix, args.sessions,
+                                       args.connections, args.difficulty))
+        for key, value in results.items():
+            print(f"{key}: {value:.3f}" if isinstance(value, float) else f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
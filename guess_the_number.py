@@ -0,0 +1,53 @@
+"""
+Single entry point for the number guessing game.
+
+    python guess_the_number.py cli [--replay FILE] [--low N] [--high N] ...
+    python guess_the_number.py gui
+
+Only the chosen front end is imported: the cli path never loads PyQt5 (or
+numpy), which keeps it cheap to launch from scripts.  Without a subcommand
+the cli is started.  See benchmarks/startup.py for the startup budget.
+
+Requires Python 3.10 or newer.
+"""
+import importlib.util
+import os
+import sys
+
+CLI_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.pynumber_guessing_game.py")
+USAGE = "usage: guess_the_number.py [cli|gui] [options]"
+
+
+def load_cli():
+    """
+    Imports the CLI script as a module.  Its file name is not a valid module
+    name, so it is loaded from its path.
+    """
+    module = sys.modules.get("number_guessing_game")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("number_guessing_game", CLI_FILE)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["number_guessing_game"] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+def main(argv=None):
+    """
+    Runs the front end named by the first argument with the rest.
+    Args:
+        argv: The command line arguments (optional, defaults to sys.argv).
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    command = argv.pop(0) if argv and not argv[0].startswith("-") else "cli"
+    if command == "cli":
+        return load_cli().run(argv)
+    if command == "gui":
+        import number_guessing_game_gui
+        return number_guessing_game_gui.run(argv)
+    print(USAGE, file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
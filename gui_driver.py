@@ -0,0 +1,140 @@
+"""
+Drives NumberGuessingGame headlessly to measure GUI event handling.
+
+The game runs with headless=True on the offscreen Qt platform (unless
+QT_QPA_PLATFORM says otherwise).  A bisecting player types each guess into
+the real line edit and clicks the real Guess button, and the time spent
+handling every click is recorded.
+
+    python gui_driver.py --guesses 20000
+"""
+import argparse
+import atexit
+import os
+import shutil
+import tempfile
+import time
+
+
+class GuiDriver:
+    """
+    Plays games through the widgets of a headless NumberGuessingGame.
+    """
+
+    def __init__(self, attempts=10, game_mode="Single Player", log_capacity=1000,
+                 low=1, high=100, seed=None):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtWidgets import QApplication
+        import number_guessing_game_gui as gui
+        from effects import configure
+        from rng_service import SessionRng
+        import score_store
+        import session_store
+
+        configure(headless=True)
+        session_store.configure(None)  # timed games are not saved
+        # Their scores go to a throwaway store, not the player's high_scores.json.
+        # The directory is removed at exit, after the store (registered later) is closed.
+        scores_dir = tempfile.mkdtemp(prefix="gui_driver_")
+        atexit.register(shutil.rmtree, scores_dir, True)
+        score_store.configure(score_store.ScoreStore(
+            os.path.join(scores_dir, score_store.HIGH_SCORES_FILE), fsync=False))
+        self.app = QApplication.instance() or QApplication([])
+        self.game = gui.NumberGuessingGame(log_capacity=log_capacity, headless=True,
+                                           rng=None if seed is None else SessionRng(seed))
+        self.game.game_finished.connect(self._on_game_finished)
+        self.game.message_shown.connect(self._on_message)
+        self.games = 0
+        self.wins = 0
+        self.messages = 0
+        self.latencies = []
+        self.game.apply_settings({
+            "player_name": "driver",
+            "difficulty": "Custom",
+            "attempts": attempts,
+            "hints_enabled": False,
+            "game_mode": game_mode,
+            "low": low,
+            "high": high,
+        })
+        self.low, self.high = low, high
+
+    def _on_game_finished(self, won):
+        self.games += 1
+        self.wins += won
+        self.low, self.high = self.game.game_range.low, self.game.game_range.high
+
+    def _on_message(self, kind, title, text):
+        self.messages += 1
+
+    def guess(self, number):
+        """
+        Types a guess and clicks Guess, returning the handling time.
+        """
+        game = self.game
+        game.guess_input.setText(str(number))
+        started = time.perf_counter()
+        game.guess_button.click()
+        latency = time.perf_counter() - started
+        self.latencies.append(latency)
+        return latency
+
+    def run(self, guesses, process_events_every=1):
+        """
+        Makes guesses with a bisecting player and returns a report dict.
+        """
+        started = time.perf_counter()
+        for i in range(guesses):
+            number = (self.low + self.high) // 2
+            games_before = self.games
+            self.guess(number)
+            if self.games == games_before:
+                feedback = self.game.feedback_label.text()
+                if feedback == "Too low!":
+                    self.low = number + 1
+                elif feedback == "Too high!":
+                    self.high = number - 1
+            if i % process_events_every == 0:
+                self.app.processEvents()
+        self.app.processEvents()
+        elapsed = time.perf_counter() - started
+        return self.report(elapsed)
+
+    def report(self, elapsed):
+        ordered = sorted(self.latencies)
+        count = len(ordered)
+        return {
+            "guesses": count,
+            "games": self.games,
+            "wins": self.wins,
+            "messages": self.messages,
+            "seconds": elapsed,
+            "guesses_per_second": count / elapsed if elapsed else 0.0,
+            "p50_us": ordered[count // 2] * 1e6 if count else 0.0,
+            "p99_us": ordered[min(int(count * 0.99), count - 1)] * 1e6 if count else 0.0,
+            "max_us": ordered[-1] * 1e6 if count else 0.0,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the GUI headlessly and time guesses.")
+    parser.add_argument("--guesses", type=int, default=10000)
+    parser.add_argument("--attempts", type=int, default=10)
+    parser.add_argument("--mode", default="Single Player", choices=["Single Player", "Two Player"])
+    parser.add_argument("--log-capacity", type=int, default=1000)
+    parser.add_argument("--low", type=int, default=1)
+    parser.add_argument("--high", type=int, default=100)
+    parser.add_argument("--bits", type=int, help="Use the range 0..2**bits - 1")
+    parser.add_argument("--process-events-every", type=int, default=1,
+                        help="Run the Qt event loop after every N guesses")
+    parser.add_argument("--seed", type=int, help="Seed the secret numbers")
+    args = parser.parse_args()
+    low, high = (0, (1 << args.bits) - 1) if args.bits else (args.low, args.high)
+    driver = GuiDriver(args.attempts, args.mode, args.log_capacity, low, high, args.seed)
+    results = driver.run(args.guesses, args.process_events_every)
+    for key, value in results.items():
+        print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
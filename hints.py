@@ -0,0 +1,235 @@
+"""
+Hints for the guessing player, picked by how much they tell.
+
+A CandidateSet is what the player can know about the secret: an interval
+narrowed by the too low / too high feedback, and a set of allowed residues
+modulo MODULUS narrowed by the hints given so far.  Every hint of the game
+is a yes/no statement that is either a congruence (the number is even, is
+divisible by 3, 4, 5 or 10, has a digit sum divisible by 9) or an interval
+(the number is in the lower or upper half of what is left), and MODULUS
+is a multiple of every divisor used, so all of them fit that shape.
+
+Residue sets are MODULUS-bit ints, precomputed per hint, so counting the
+candidates of an interval is a few big-int operations: the whole periods
+times the popcount of the mask, plus the popcount of one rotated window
+of it.  Choosing a hint counts the candidates on each side of every hint
+in the catalogue and picks the one with the highest entropy (the most
+information in bits), so a hint costs O(log range) whatever the range,
+and no candidate is ever enumerated.
+"""
+from math import log2
+
+from game_engine import GameRange, TOO_LOW, TOO_HIGH, CORRECT
+
+# A hint is given after every HINT_EVERY-th guess.
+HINT_EVERY = 3
+
+# Every divisor of the hints divides MODULUS (lcm(4, 9, 5) = 180).
+MODULUS = 180
+ALL_RESIDUES = (1 << MODULUS) - 1
+
+
+def residue_mask(divisor, remainder=0):
+    """
+    The mask of the residues modulo MODULUS that are remainder modulo divisor.
+    """
+    mask = 0
+    for residue in range(remainder % divisor, MODULUS, divisor):
+        mask |= 1 << residue
+    return mask
+
+
+def _window(mask, start, length):
+    """
+    The bits start, start + 1, ... (length of them, wrapping around
+    MODULUS) of mask, moved down to bit 0.
+    """
+    rotated = ((mask >> start) | (mask << (MODULUS - start))) & ALL_RESIDUES
+    return rotated & ((1 << length) - 1)
+
+
+def count_candidates(low, high, mask):
+    """
+    The number of integers in low..high whose residue modulo MODULUS is in mask.
+    """
+    if low > high or not mask:
+        return 0
+    periods, rest = divmod(high - low + 1, MODULUS)
+    return periods * mask.bit_count() + _window(mask, low % MODULUS, rest).bit_count()
+
+
+class CandidateSet:
+    """
+    The numbers the secret can still be: low..high, restricted to the
+    residues modulo MODULUS in mask.
+    """
+    __slots__ = ("low", "high", "mask")
+
+    def __init__(self, low, high, mask=ALL_RESIDUES):
+        self.low = low
+        self.high = high
+        self.mask = mask
+
+    def __contains__(self, number):
+        return self.low <= number <= self.high and bool(self.mask >> (number % MODULUS) & 1)
+
+    def __repr__(self):
+        return f"CandidateSet({self.low}, {self.high}, {self.count()} candidates)"
+
+    def count(self, low=None, high=None, mask=None):
+        """
+        The number of candidates, optionally within low..high and mask as well.
+        """
+        low = self.low if low is None else max(low, self.low)
+        high = self.high if high is None else min(high, self.high)
+        return count_candidates(low, high, self.mask if mask is None else self.mask & mask)
+
+    def narrow(self, guess, result):
+        """
+        Applies the feedback on a guess (TOO_LOW, TOO_HIGH or CORRECT).
+        """
+        if result == TOO_LOW:
+            self.low = max(self.low, guess + 1)
+        elif result == TOO_HIGH:
+            self.high = min(self.high, guess - 1)
+        elif result == CORRECT:
+            self.low = self.high = guess
+
+
+class Hint:
+    """
+    A yes/no statement about the secret.  A congruence hint keeps the
+    residues in mask (or those outside it); an interval hint says whether
+    the number is in the lower part low..high of the candidates.
+    """
+    __slots__ = ("kind", "mask", "low", "high", "true_text", "false_text")
+
+    def __init__(self, kind, mask=None, low=None, high=None, true_text="", false_text=""):
+        self.kind = kind
+        self.mask = mask
+        self.low = low
+        self.high = high
+        self.true_text = true_text
+        self.false_text = false_text
+
+    def holds(self, number):
+        if self.mask is not None:
+            return bool(self.mask >> (number % MODULUS) & 1)
+        return self.low <= number <= self.high
+
+    def split(self, candidates):
+        """
+        Returns how many candidates make the hint (true, false).
+        """
+        total = candidates.count()
+        if self.mask is not None:
+            true = candidates.count(mask=self.mask)
+        else:
+            true = candidates.count(self.low, self.high)
+        return true, total - true
+
+    def apply(self, candidates, truth):
+        """
+        Narrows the candidates to those agreeing with the hint's truth.
+        """
+        if self.mask is not None:
+            candidates.mask &= self.mask if truth else ALL_RESIDUES ^ self.mask
+        elif truth:
+            candidates.high = min(candidates.high, self.high)
+        else:
+            candidates.low = max(candidates.low, self.high + 1)
+
+    def text(self, truth):
+        return self.true_text if truth else self.false_text
+
+
+# The congruence hints, in the order ties are broken.
+CONGRUENCE_HINTS = (
+    Hint("parity", residue_mask(2), true_text="The number is even.", false_text="The number is odd."),
+    Hint("divisible_by_3", residue_mask(3), true_text="The number is divisible by 3.",
+         false_text="The number is not divisible by 3."),
+    Hint("divisible_by_4", residue_mask(4), true_text="The number is divisible by 4.",
+         false_text="The number is not divisible by 4."),
+    Hint("divisible_by_5", residue_mask(5), true_text="The number ends in 0 or 5.",
+         false_text="The number does not end in 0 or 5."),
+    Hint("divisible_by_10", residue_mask(10), true_text="The number ends in 0.",
+         false_text="The number does not end in 0."),
+)
+# A digit sum is congruent to the number modulo 9, for numbers that are not negative.
+DIGIT_SUM_HINT = Hint("digit_sum", residue_mask(9), true_text="The digit sum of the number is a multiple of 9.",
+                      false_text="The digit sum of the number is not a multiple of 9.")
+
+
+def entropy(true, false):
+    """
+    The information in bits of a yes/no answer splitting true and false
+    candidates.
+    """
+    total = true + false
+    if not true or not false:
+        return 0.0
+    p = true / total
+    return -p * log2(p) - (1 - p) * log2(1 - p)
+
+
+class HintEngine:
+    """
+    Follows the feedback of one game and picks the most informative hint
+    whenever one is due.
+    """
+
+    def __init__(self, game_range):
+        """
+        Args:
+            game_range: The GameRange of the secret.
+        """
+        self.candidates = CandidateSet(game_range.low, game_range.high)
+        self.given = []
+
+    def observe(self, guess, result):
+        """
+        Takes in the feedback on a guess (TOO_LOW, TOO_HIGH or CORRECT).
+        """
+        self.candidates.narrow(guess, result)
+
+    def catalogue(self):
+        """
+        The hints that make sense for the candidates left.
+        """
+        candidates = self.candidates
+        hints = list(CONGRUENCE_HINTS)
+        if candidates.low >= 0:
+            hints.append(DIGIT_SUM_HINT)
+        if candidates.low < candidates.high:
+            middle = GameRange(candidates.low, candidates.high).midpoint()
+            hints.append(Hint("lower_half", low=candidates.low, high=middle,
+                              true_text=f"The number is between {candidates.low} and {middle}.",
+                              false_text=f"The number is between {middle + 1} and {candidates.high}."))
+        return hints
+
+    def best_hint(self):
+        """
+        Returns (the hint with the most information, its bits), or (None,
+        0.0) if no hint would tell anything new.
+        """
+        best, best_bits = None, 0.0
+        for hint in self.catalogue():
+            bits = entropy(*hint.split(self.candidates))
+            if bits > best_bits + 1e-12:
+                best, best_bits = hint, bits
+        return best, best_bits
+
+    def next_hint(self, secret):
+        """
+        Picks the most informative hint, narrows the candidates with its
+        answer for secret and returns (hint kind, hint text, bits), or None
+        if no hint would tell anything new.
+        """
+        hint, bits = self.best_hint()
+        if hint is None:
+            return None
+        truth = hint.holds(secret)
+        hint.apply(self.candidates, truth)
+        self.given.append(hint.kind)
+        return hint.kind, hint.text(truth), bits
+
@@ -0,0 +1,170 @@
+"""
+Parsing and validation of what players type, shared by every front end.
+
+The CLI prompts, the GUI and the game server all read numbers through
+parse_number(), which checks them against optional bounds and returns a
+status along with the number instead of raising: invalid input is an
+expected outcome, not an error.  Plain digits, the common case, are
+recognised with str.isdecimal() and converted directly; only input with
+surrounding whitespace or a sign takes the slower path, and nothing on
+either path raises for bad input.  That keeps bulk replays, which feed
+thousands of answers through the prompts, spending their time in the game.
+
+An InputParser validates guesses for one game: the number must be in the
+game range, and a RateLimiter (a token bucket) can cap how fast guesses
+come in, to protect servers and scripted sessions from floods.  The CLI
+and the GUI share the limiter of the process, configured from
+GUESS_MAX_RATE (guesses per second) or with configure(); each server
+connection gets its own.  A GUESS_MAX_RATE that is not a number is
+reported on stderr and leaves guesses unlimited.
+"""
+import os
+import sys
+import time
+
+# Outcomes of parsing an input.
+VALID = 0
+NOT_A_NUMBER = 1
+OUT_OF_RANGE = 2
+RATE_LIMITED = 3
+
+# int() refuses to convert longer strings (sys.int_max_str_digits).
+MAX_DIGITS = 4300
+
+
+def parse_int(text):
+    """
+    Returns the int written in text, allowing a sign and surrounding
+    whitespace, or None if text is not a whole number.
+    """
+    if not text.isdecimal():
+        text = text.strip()
+        sign = text[:1]
+        if sign == "-" or sign == "+":
+            digits = text[1:]
+            if not digits.isdecimal() or len(digits) > MAX_DIGITS:
+                return None
+            return -int(digits) if sign == "-" else int(digits)
+        if not text.isdecimal():
+            return None
+    if len(text) > MAX_DIGITS:
+        return None
+    return int(text)
+
+
+def parse_number(text, low=None, high=None):
+    """
+    Parses a whole number and checks it against optional bounds.
+    Args:
+        text: The input.
+        low: The lowest number allowed (optional).
+        high: The highest number allowed (optional).
+    Returns:
+        (VALID, number), (OUT_OF_RANGE, number) or (NOT_A_NUMBER, None).
+    """
+    number = parse_int(text)
+    if number is None:
+        return NOT_A_NUMBER, None
+    if (low is not None and number < low) or (high is not None and number > high):
+        return OUT_OF_RANGE, number
+    return VALID, number
+
+
+class RateLimiter:
+    """
+    A token bucket: allows bursts of up to burst inputs, refilled at rate
+    inputs per second.
+    """
+    __slots__ = ("rate", "burst", "tokens", "updated", "clock")
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        """
+        Args:
+            rate: The inputs allowed per second in the long run.
+            burst: The inputs allowed at once (optional, defaults to one
+                second's worth, and at least 1).
+            clock: The clock to measure time with (optional).
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        self.tokens = self.burst
+        self.clock = clock
+        self.updated = clock()
+
+    def allow(self):
+        """
+        Returns True if an input is allowed now, and counts it.
+        """
+        now = self.clock()
+        tokens = self.tokens + (now - self.updated) * self.rate
+        if tokens > self.burst:
+            tokens = self.burst
+        self.updated = now
+        if tokens < 1:
+            self.tokens = tokens
+            return False
+        self.tokens = tokens - 1
+        return True
+
+
+class InputParser:
+    """
+    Validates the guesses of one game.
+    """
+    __slots__ = ("low", "high", "limiter")
+
+    def __init__(self, game_range=None, limiter=None):
+        """
+        Args:
+            game_range: The GameRange guesses must be in (optional).
+            limiter: The RateLimiter of the session (optional).
+        """
+        self.low = game_range.low if game_range is not None else None
+        self.high = game_range.high if game_range is not None else None
+        self.limiter = limiter
+
+    def guess(self, text):
+        """
+        Parses a guess.  Returns (status, number) like parse_number(), or
+        (RATE_LIMITED, None) when guesses come in too fast.
+        """
+        if self.limiter is not None and not self.limiter.allow():
+            return RATE_LIMITED, None
+        return parse_number(text, self.low, self.high)
+
+
+_default_limiter = None
+_limiter_configured = False
+
+
+def default_limiter():
+    """
+    Returns the RateLimiter shared by the games of this process, or None
+    if guesses are not limited.  It is set up on first use from
+    GUESS_MAX_RATE.
+    """
+    global _default_limiter, _limiter_configured
+    if not _limiter_configured:
+        _limiter_configured = True
+        setting = os.environ.get("GUESS_MAX_RATE")
+        if setting:
+            try:
+                rate = float(setting)
+            except ValueError:
+                print(f"GUESS_MAX_RATE ignored, guesses are not limited: {setting!r} is not a number",
+                      file=sys.stderr)
+                rate = 0
+            if rate > 0:
+                _default_limiter = RateLimiter(rate)
+    return _default_limiter
+
+
+def configure(rate=0, burst=None):
+    """
+    Limits the games of this process to rate guesses per second (0 lifts
+    the limit) and returns the new limiter.
+    """
+    global _default_limiter, _limiter_configured
+    _default_limiter = RateLimiter(rate, burst) if rate > 0 else None
+    _limiter_configured = True
+    return _default_limiter
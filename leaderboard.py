@@ -0,0 +1,184 @@
+"""
+Sorted leaderboard index.
+
+CompactLeaderboard orders the players of a PlayerRegistry by best score
+(fewest guesses first) and then by name, as 4-byte player ids.  Scores are
+guess counts, so there are few distinct ones: each score has a bucket of
+the ids with that score, sorted by name, and ranks and pages are found by
+walking the per-score counts.  A bucket can still hold a large share of
+all players, so it is cut into blocks of at most 2 * BLOCK ids: an update
+bisects to the block, then inserts or deletes within it, moving at most
+2 * BLOCK ids instead of the whole bucket.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+
+from player_registry import NO_SCORE
+
+# Blocks are split when they grow past 2 * BLOCK ids.
+BLOCK = 512
+
+
+class _Bucket:
+    """
+    The ids of the players with one score, sorted by name, in blocks.
+    """
+    __slots__ = ("blocks", "size")
+
+    def __init__(self, ids=()):
+        """
+        Args:
+            ids: Player ids already sorted by name (an array, or a memoryview
+                of "I" items).
+        """
+        self.blocks = []
+        for start in range(0, len(ids), BLOCK):
+            block = array("I")
+            if isinstance(ids, memoryview):
+                block.frombytes(ids[start:start + BLOCK].cast("B"))
+            else:
+                block.extend(ids[start:start + BLOCK])
+            self.blocks.append(block)
+        self.size = len(ids)
+
+    def __len__(self):
+        return self.size
+
+    def _block_of(self, name, key):
+        """
+        Returns the index of the block a name belongs in.
+        """
+        index = bisect_right(self.blocks, name, key=lambda block: key(block[0])) - 1
+        return max(index, 0)
+
+    def insert(self, player, name, key):
+        if not self.blocks:
+            self.blocks.append(array("I", [player]))
+            self.size = 1
+            return
+        index = self._block_of(name, key)
+        block = self.blocks[index]
+        block.insert(bisect_left(block, name, key=key), player)
+        self.size += 1
+        if len(block) > 2 * BLOCK:
+            self.blocks[index + 1:index + 1] = [block[BLOCK:]]
+            del block[BLOCK:]
+
+    def remove(self, name, key):
+        index = self._block_of(name, key)
+        block = self.blocks[index]
+        del block[bisect_left(block, name, key=key)]
+        self.size -= 1
+        if not block:
+            del self.blocks[index]
+
+    def ids(self, start, stop):
+        """
+        Yields the ids at positions start to stop - 1.
+        """
+        for block in self.blocks:
+            if start >= len(block):
+                start -= len(block)
+                stop -= len(block)
+                continue
+            yield from block[start:stop]
+            stop -= len(block)
+            if stop <= 0:
+                return
+            start = 0
+
+
+class CompactLeaderboard:
+    """
+    The players of a PlayerRegistry ordered by best score (fewest guesses
+    first), then by name, as 4-byte player ids.
+    """
+
+    def __init__(self, registry, order=None):
+        """
+        Args:
+            registry: The PlayerRegistry holding the names and best scores.
+            order: The ids of every player with a score, already in
+                leaderboard order (optional, sorted here otherwise).
+        """
+        self.registry = registry
+        best = registry.best
+        if order is None:
+            name_bytes = registry.name_bytes
+            order = sorted((player for player, score in enumerate(best) if score != NO_SCORE),
+                           key=lambda player: (best[player], name_bytes(player)))
+        self.buckets = {}
+        start = 0
+        while start < len(order):
+            score = best[order[start]]
+            end = bisect_right(order, score, start, key=best.__getitem__)
+            self.buckets[score] = _Bucket(order[start:end])
+            start = end
+        self.scores = sorted(self.buckets)
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self.buckets.values())
+
+    def order(self):
+        """
+        Returns every player id in leaderboard order.
+        """
+        order = array("I")
+        for score in self.scores:
+            for block in self.buckets[score].blocks:
+                order += block
+        return order
+
+    def update(self, player, old_score, new_score):
+        """
+        Moves a player id from old_score (None for a new player) to new_score.
+        """
+        name = self.registry.name_bytes(player)
+        key = self.registry.name_bytes
+        if old_score is not None:
+            bucket = self.buckets[old_score]
+            bucket.remove(name, key)
+            if not bucket:
+                del self.buckets[old_score]
+                self.scores.remove(old_score)
+        bucket = self.buckets.get(new_score)
+        if bucket is None:
+            bucket = self.buckets[new_score] = _Bucket()
+            self.scores.insert(bisect_left(self.scores, new_score), new_score)
+        bucket.insert(player, name, key)
+
+    def page(self, offset, limit):
+        """
+        Returns up to limit (player_name, score) pairs starting at offset.
+        """
+        name = self.registry.name
+        entries = []
+        for score in self.scores:
+            if len(entries) >= limit:
+                break
+            bucket = self.buckets[score]
+            if offset >= len(bucket):
+                offset -= len(bucket)
+                continue
+            for player in bucket.ids(offset, offset + limit - len(entries)):
+                entries.append((name(player), score))
+            offset = 0
+        return entries
+
+    def top(self, k=10):
+        """
+        Returns the k best (player_name, score) pairs.
+        """
+        return self.page(0, k)
+
+    def rank(self, score):
+        """
+        Returns the 1-based rank of a score; players with equal scores
+        share a rank.
+        """
+        rank = 1
+        for other in self.scores:
+            if other >= score:
+                break
+            rank += len(self.buckets[other])
+        return rank
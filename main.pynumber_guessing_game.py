@@ -1,13 +1,33 @@
-import random
-import math
-import json
-import time
-
-def guess(x, max_attempts=0, player_name="", hints_enabled=False, game_mode="single"):
+import argparse
+import sys
+from game_engine import (
+    GameState, MatchState, GameRange, TOO_LOW, TOO_HIGH, CORRECT, OUT_OF_ATTEMPTS, DIFFICULTY_ATTEMPTS,
+)
+from effects import default_scheduler
+from telemetry import (
+    default_telemetry, clock, GAME_STARTED, GUESS_MADE, HINT_SHOWN, GAME_WON, GAME_LOST, SCORE_PERSISTED,
+)
+from game_io import default_console, BatchConsole
+from game_record import GameRecord, default_recorder
+from rng_service import default_session
+from hints import HintEngine, HINT_EVERY
+from input_parser import (
+    InputParser, parse_number, default_limiter, VALID, NOT_A_NUMBER, OUT_OF_RANGE, RATE_LIMITED,
+)
+from session_store import SessionSnapshot, default_journal
+from solver import solve, NO_HINTS, PARITY_HINTS, PARITY_HINT_EVERY
+
+CLI_DEFAULT_HIGH = 10
+
+def guess(x, max_attempts=0, player_name="", hints_enabled=False, game_mode="single", console=None, low=1,
+          rng=None, journal=None, resume=None):
     """
-    This function makes the user guess a random number between 1 and x.
+    This function makes the user guess a random number between low and x.
     It provides feedback if the guess is too low or too high.  It also limits
-    the number of attempts if max_attempts is provided.
+    the number of attempts if max_attempts is provided.  With hints on, the
+    most informative hint (see hints.py) is given after every third guess.
+    With a journal, the game is saved after every guess so that it can be
+    resumed, and resume continues a saved game.
 
     Args:
         x: The upper bound of the range for the random number.
@@ -15,294 +35,706 @@ def guess(x, max_attempts=0, player_name="", hints_enabled=False, game_mode="sin
         player_name: The name of the player (optional, for high scores).
         hints_enabled:  Boolean to enable/disable hints.
         game_mode: "single" or "two_player"
+        console: The console to talk to (optional, defaults to the terminal).
+        low: The lower bound of the range (optional, defaults to 1).
+        rng: The SessionRng drawing the secret (optional, defaults to the
+            session of this process).
+        journal: The SessionJournal saving the game (optional).
+        resume: The SessionSnapshot of a saved game to continue (optional);
+            its secret, range and settings replace the arguments.
     """
-    random_number = random.randint(1, x)
-    guess_count = 0
+    console = console or default_console()
+    rng = rng or default_session()
+    telemetry = default_telemetry()
+    game_started = clock()
+    if resume is not None:
+        low, x, max_attempts = resume.low, resume.high, resume.max_attempts
+        hints_enabled, player_name = resume.hints_enabled, resume.players[0]
+        seed, random_number = resume.seed, resume.secret()
+    game_range = GameRange(low, x)
+    if resume is None:
+        seed, random_number = rng.secret(game_range)
+    recorder = default_recorder()
+    guesses = []
+    hint_engine = HintEngine(game_range) if hints_enabled else None
+    if resume is None:
+        game = GameState(random_number, max_attempts)
+    else:
+        game = resume.game(hint_engine)
+        guesses = list(resume.guesses)
+    if journal is not None:
+        journal.start(SessionSnapshot(game_mode, seed, low, x, max_attempts, hints_enabled, [player_name],
+                                      guesses))
+    # In a two-player game the match emits the start and the end itself.
+    single = game_mode == "single"
+    if single and telemetry.enabled:
+        telemetry.emit(GAME_STARTED, mode=game_mode, low=low, high=x, max_attempts=max_attempts)
+    if resume is not None:
+        console.say(f"Resuming your game {game_range} after {game.guess_count} guesses.")
     if max_attempts > 0:
-        print(f"You have {max_attempts} attempts to guess the number.")
+        console.say(f"You have {game.attempts_left} attempts to guess the number.")
+    parser = InputParser(game_range, default_limiter())
     while True:
-        guess_count += 1
-        try:
-            guess = int(input(f'Guess a number between 1 and {x}: '))
-        except ValueError:
-            print("Invalid input. Please enter a number.")
+        status, guess = parser.guess(console.ask(f'Guess a number {game_range}: '))
+        if status != VALID:
+            say_invalid_guess(status, game_range, console)
             continue
-        if guess < random_number:
-            print('Sorry, guess again. Too low.')
-        elif guess > random_number:
-            print('Sorry, guess again. Too high.')
-        else:
-            print(
-                f'Yay, congrats, {player_name}! You have guessed the number {random_number} correctly in {guess_count} guesses!!')
-            if player_name and game_mode == "single":
-                save_high_score(player_name, guess_count)
+        guess_started = clock()
+        result = game.step(guess)
+        if journal is not None:
+            if game.finished:
+                journal.finish()
+            else:
+                journal.add_guess(guess)
+        if recorder is not None:
+            guesses.append(guess)
+            if game.finished:
+                recorder.write(GameRecord(game_mode, seed, low, x, max_attempts, hints_enabled,
+                                          result == CORRECT, guesses, player_name))
+        if result == CORRECT:
+            console.say(
+                f'Yay, congrats, {player_name}! You have guessed the number {random_number} correctly in {game.guess_count} guesses!!')
+            if telemetry.enabled:
+                telemetry.emit(GUESS_MADE, clock() - guess_started, mode=game_mode, result=result)
+            if single and telemetry.enabled:
+                telemetry.emit(GAME_WON, clock() - game_started, mode=game_mode, guesses=game.guess_count)
+            if player_name and single:
+                save_high_score(player_name, game.guess_count, console=console)
+                save_match(game_mode, [player_name], player_name, game.guess_count, max_attempts,
+                           console=console)
             return True
-        if max_attempts > 0 and guess_count >= max_attempts:
-            print(f"Sorry, you've run out of attempts. The number was {random_number}.")
+        if game.last_result == TOO_LOW:
+            console.say('Sorry, guess again. Too low.')
+        elif game.last_result == TOO_HIGH:
+            console.say('Sorry, guess again. Too high.')
+        if telemetry.enabled:
+            telemetry.emit(GUESS_MADE, clock() - guess_started, mode=game_mode, result=game.last_result)
+        if result == OUT_OF_ATTEMPTS:
+            console.say(f"Sorry, you've run out of attempts. The number was {random_number}.")
+            if single and telemetry.enabled:
+                telemetry.emit(GAME_LOST, clock() - game_started, mode=game_mode, guesses=game.guess_count)
+            if player_name and single:
+                save_match(game_mode, [player_name], None, game.guess_count, max_attempts, console=console)
             return False
-        if hints_enabled:
-            if guess_count % 3 == 0:
-                print(f"Hint: The number is {'even' if random_number % 2 == 0 else 'odd'}.")
+        if hint_engine is not None:
+            hint_engine.observe(guess, game.last_result)
+            if game.guess_count % HINT_EVERY == 0:
+                hint = hint_engine.next_hint(random_number)
+                if hint is not None:
+                    kind, text, bits = hint
+                    console.say(f"Hint: {text}")
+                    if telemetry.enabled:
+                        telemetry.emit(HINT_SHOWN, mode=game_mode, hint=kind, bits=bits,
+                                       guesses=game.guess_count)
+
+
+
+def say_invalid_guess(status, game_range, console):
+    """
+    Tells the player why a guess was not taken.  Such guesses do not use
+    up an attempt.
+    """
+    if status == NOT_A_NUMBER:
+        console.say("Invalid input. Please enter a number.")
+    elif status == OUT_OF_RANGE:
+        console.say(f"Invalid input. Please enter a number {game_range}.")
+    elif status == RATE_LIMITED:
+        console.say("Too many guesses at once. Please slow down.")
 
 
 
-def computer_guess(x):
+def computer_guess(x, max_attempts=0, hints_enabled=False, console=None, low=1):
     """
-    This function makes the computer guess a number between 1 and x
-    that the user is thinking of. It uses a binary search approach
-    to efficiently find the number.
+    This function makes the computer guess a number between low and x
+    that the user is thinking of. It plays the strategy from the solver,
+    which takes the attempts budget and the parity hint into account.
     Args:
         x: The upper bound of the range for the number to be guessed.
+        max_attempts: The maximum number of attempts allowed (optional).
+        hints_enabled: Whether the user tells the computer the parity of
+            the number after its third guess.
+        console: The console to talk to (optional, defaults to the terminal).
+        low: The lower bound of the range (optional, defaults to 1).
+    Returns:
+        True if the computer found the number, False otherwise.
     """
-    low = 1
+    console = console or default_console()
+    telemetry = default_telemetry()
+    game_started = clock()
+    if telemetry.enabled:
+        telemetry.emit(GAME_STARTED, mode="computer", low=low, high=x, max_attempts=max_attempts)
+    recorder = default_recorder()
+    guesses = []
+    hint_policy = PARITY_HINTS if hints_enabled else NO_HINTS
+    strategy = solve(x - low + 1, max_attempts, hint_policy)
+    range_low = low
     high = x
+    parity = None
+    guess_count = 0
     feedback = ''
     while feedback != 'c':
-        if low != high:
-            guess = (low + high) // 2
-        else:
-            guess = low
-        print(f"Is your number {guess}?")
-        feedback = input(
+        guess_started = clock()
+        try:
+            guess = strategy.next_guess(low, high, parity)
+        except ValueError:
+            guess = None
+        if guess is None or low > high:
+            console.say("Hmm, your answers don't add up. Let's call it a draw.")
+            if recorder is not None:
+                recorder.write(GameRecord("computer", 0, range_low, x, max_attempts, hints_enabled,
+                                          False, guesses))
+            if telemetry.enabled:
+                telemetry.emit(GAME_LOST, clock() - game_started, mode="computer", guesses=guess_count)
+            return False
+        console.say(f"Is your number {guess}?")
+        guesses.append(guess)
+        if telemetry.enabled:
+            telemetry.emit(GUESS_MADE, clock() - guess_started, mode="computer")
+        feedback = console.ask(
             f'Is the number too high (H), too low (L), or correct (C)?? ').lower()
-        if feedback == 'h':
-            high = guess - 1
-        elif feedback == 'l':
-            low = guess + 1
+        if feedback in ('h', 'l'):
+            guess_count += 1
+            if feedback == 'h':
+                high = guess - 1
+            else:
+                low = guess + 1
+            if max_attempts > 0 and guess_count >= max_attempts:
+                console.say("The computer ran out of attempts. You win!")
+                if recorder is not None:
+                    recorder.write(GameRecord("computer", 0, range_low, x, max_attempts, hints_enabled,
+                                              False, guesses))
+                if telemetry.enabled:
+                    telemetry.emit(GAME_LOST, clock() - game_started, mode="computer", guesses=guess_count)
+                return False
+            if hints_enabled and guess_count == PARITY_HINT_EVERY:
+                answer = console.ask("Hint time! Is your number even (E) or odd (O)? ").lower()
+                if answer in ('e', 'o'):
+                    parity = 0 if answer == 'e' else 1
+                    if telemetry.enabled:
+                        telemetry.emit(HINT_SHOWN, mode="computer", hint="parity", guesses=guess_count)
         elif feedback != 'c':
-            print("Invalid input. Please enter 'H', 'L', or 'C'.")
-    print(f'Yay! The computer guessed your number, {guess}, correctly!')
+            console.say("Invalid input. Please enter 'H', 'L', or 'C'.")
+    console.say(f'Yay! The computer guessed your number, {guess}, correctly!')
+    if recorder is not None:
+        recorder.write(GameRecord("computer", 0, range_low, x, max_attempts, hints_enabled,
+                                  True, guesses))
+    if telemetry.enabled:
+        telemetry.emit(GAME_WON, clock() - game_started, mode="computer", guesses=guess_count + 1)
+    return True
 
 
 
 
-def play_again():
+def play_again(console=None):
     """
     Asks the user if they want to play again.  Returns True if they do,
     False otherwise.
     """
+    console = console or default_console()
     while True:
-        answer = input("Do you want to play again? (yes/no): ").lower()
+        answer = console.ask("Do you want to play again? (yes/no): ").lower()
         if answer == "yes":
             return True
         elif answer == "no":
             return False
         else:
-            print("Invalid input. Please enter 'yes' or 'no'.")
+            console.say("Invalid input. Please enter 'yes' or 'no'.")
 
 
 
 
-def choose_game():
+def choose_game(console=None):
     """
     Prompts the user to choose which game to play (guess the number,
-    computer guess, or two-player). Returns 1 for user guess, 2 for
-    computer guess, 3 for two-player, or 0 to exit.
+    computer guess, or two-player) or to view the high scores or the
+    statistics. Returns 1 for user guess, 2 for computer guess, 3 for
+    two-player, 4 for high scores, 5 for statistics, or 0 to exit.
     """
+    console = console or default_console()
     while True:
-        try:
-            choice = int(input(
-                "Choose a game:\n1. Guess the number\n2. Let the computer guess your number\n3. Two-player guess the number\n0. Exit\nEnter your choice: "))
-            if choice in [0, 1, 2, 3]:
-                return choice
-            else:
-                print("Invalid input. Please enter 0, 1, 2, or 3.")
-        except ValueError:
-            print("Invalid input. Please enter a number.")
+        status, choice = parse_number(console.ask(
+            "Choose a game:\n1. Guess the number\n2. Let the computer guess your number\n3. Two-player guess the number\n4. View high scores\n5. View statistics\n0. Exit\nEnter your choice: "),
+            0, 5)
+        if status == VALID:
+            return choice
+        elif status == OUT_OF_RANGE:
+            console.say("Invalid input. Please enter 0, 1, 2, 3, 4, or 5.")
+        else:
+            console.say("Invalid input. Please enter a number.")
 
 
 
 
-def get_difficulty():
+def get_difficulty(console=None):
     """
     Prompts the user to choose a difficulty level.
     Returns the maximum number of attempts based on the difficulty.
     """
+    console = console or default_console()
     while True:
-        try:
-            difficulty = int(input(
-                "Choose difficulty:\n1. Easy (10 attempts)\n2. Medium (5 attempts)\n3. Hard (3 attempts)\n4. Custom attempts\nEnter your choice: "))
-            if difficulty == 1:
-                return 10
-            elif difficulty == 2:
-                return 5
-            elif difficulty == 3:
-                return 3
-            elif difficulty == 4:
-                while True:
-                    attempts_input = input("Enter the number of attempts: ")
-                    try:
-                        attempts = int(attempts_input)
-                        if attempts > 0:
-                            return attempts
-                        else:
-                            print("Number of attempts must be positive.")
-                    except ValueError:
-                        print("Invalid input. Please enter a positive number.")
-            else:
-                print("Invalid input. Please enter 1, 2, 3, or 4.")
-        except ValueError:
-            print("Invalid input. Please enter a number.")
+        status, difficulty = parse_number(console.ask(
+            "Choose difficulty:\n1. Easy (10 attempts)\n2. Medium (5 attempts)\n3. Hard (3 attempts)\n4. Custom attempts\nEnter your choice: "))
+        if status != VALID:
+            console.say("Invalid input. Please enter a number.")
+        elif difficulty == 1:
+            return DIFFICULTY_ATTEMPTS["easy"]
+        elif difficulty == 2:
+            return DIFFICULTY_ATTEMPTS["medium"]
+        elif difficulty == 3:
+            return DIFFICULTY_ATTEMPTS["hard"]
+        elif difficulty == 4:
+            while True:
+                status, attempts = parse_number(console.ask("Enter the number of attempts: "), 1)
+                if status == VALID:
+                    return attempts
+                elif status == OUT_OF_RANGE:
+                    console.say("Number of attempts must be positive.")
+                else:
+                    console.say("Invalid input. Please enter a positive number.")
+        else:
+            console.say("Invalid input. Please enter 1, 2, 3, or 4.")
 
 
 
 
-def get_player_name(player_num):
+def get_player_name(player_num, console=None):
     """
     Gets the player's name.
     """
-    name = input(f"Enter Player {player_num}'s name: ")
+    console = console or default_console()
+    name = console.ask(f"Enter Player {player_num}'s name: ")
     return name
 
 
 
 
-def save_high_score(player_name, score):
+def save_high_score(player_name, score, console=None):
     """
-    Saves the player's high score to a JSON file (high_scores.json).
+    Saves the player's high score to the high score store
+    (high_scores.json plus its append-only log, or a SQLite database).
     Handles potential errors during file operations.
     """
-    high_scores = {}
+    console = console or default_console()
+    from score_store import default_store  # imported on first use to keep startup fast
+    telemetry = default_telemetry()
+    started = clock()
     try:
-        with open("high_scores.json", "r") as f:
-            try:
-                high_scores = json.load(f)
-            except json.JSONDecodeError:
-                print("Error decoding high scores file.  Starting with empty scores.")
-                high_scores = {}
-    except FileNotFoundError:
-        print("Starting with empty high scores (no existing file).")
-
-    if player_name in high_scores:
-        if score < high_scores[player_name]:
-            high_scores[player_name] = score
-            print("New high score!")
-    else:
-        high_scores[player_name] = score
-        print("Score saved!")
+        status = default_store().record(player_name, score)
+    except OSError as e:
+        console.say(f"Error writing high scores to file: {e}")
+        return
+    if telemetry.enabled:
+        telemetry.emit(SCORE_PERSISTED, clock() - started, score=score, status=status)
+    if status == "improved":
+        console.say("New high score!")
+    elif status == "new":
+        console.say("Score saved!")
+
+
+
+
+def save_match(mode, players, winner=None, guesses=0, max_attempts=0, console=None):
+    """
+    Adds a finished game to the match history of the high score store.
+    Only the SQLite store keeps one; the JSON files ignore matches.
+    Args:
+        mode: The game mode, "single" or "two_player".
+        players: The names of the players.
+        winner: The name of the winner (None if nobody won).
+        guesses: The guesses made in the game.
+        max_attempts: The attempts budget (0 means unlimited).
+        console: The console to talk to (optional, defaults to the terminal).
+    """
+    players = [name for name in players if name]
+    if not players:
+        return
+    console = console or default_console()
+    from score_store import default_store
     try:
-        with open("high_scores.json", "w") as f:
-            json.dump(high_scores, f)
-    except Exception as e:
-        print(f"Error writing high scores to file: {e}")
+        default_store().record_match(mode, players, winner or None, guesses, max_attempts)
+    except OSError as e:
+        console.say(f"Error saving the match: {e}")
 
 
 
 
-def display_high_scores():
+def display_high_scores(limit=10, player_name="", console=None):
     """
-    Displays the high scores from the JSON file.  Handles file errors.
+    Displays the best high scores from the high score store.  Handles file errors.
+    Args:
+        limit: The number of entries to show.
+        player_name: A player whose rank is shown below the table (optional).
+        console: The console to talk to (optional, defaults to the terminal).
     """
+    console = console or default_console()
+    from score_store import default_store
     try:
-        with open("high_scores.json", "r") as f:
-            high_scores = json.load(f)
-    except FileNotFoundError:
-        print("No high scores available yet.")
-        return
-    except json.JSONDecodeError:
-        print("Error reading high scores.  The file may be corrupted.")
+        store = default_store()
+    except OSError as e:
+        console.say(f"Error reading high scores: {e}")
         return
+    if store.load_error is not None:
+        console.say("Error reading high scores.  The file may be corrupted.")
 
-    if not high_scores:
-        print("No high scores available yet.")
+    top_scores = store.top(limit)
+    if not top_scores:
+        console.say("No high scores available yet.")
         return
 
-    print("\n--- High Scores ---")
-    for player, score in high_scores.items():
-        print(f"{player}: {score} guesses")
+    console.say("\n--- High Scores ---")
+    for position, (player, score) in enumerate(top_scores, start=1):
+        console.say(f"{position}. {player}: {score} guesses")
+    if player_name:
+        rank = store.rank(player_name)
+        if rank is not None:
+            console.say(f"{player_name} is ranked #{rank} of {len(store)} players.")
 
 
 
 
-def show_instructions():
+def display_statistics(player_name="", console=None):
+    """
+    Displays statistics over the recorded games: results per difficulty,
+    the effect of hints and, optionally, one player's record.  Only games
+    recorded since the last call are read.
+    Args:
+        player_name: A player to summarise (optional).
+        console: The console to talk to (optional, defaults to the terminal).
+    """
+    console = console or default_console()
+    recorder = default_recorder()
+    if recorder is None:
+        console.say("No games are being recorded.  Start the game with --record FILE to collect statistics.")
+        return
+    try:
+        import analytics  # needs numpy, so it is only imported here
+    except ImportError:
+        console.say("Statistics need numpy, which is not installed.")
+        return
+    from score_store import default_store
+    recorder.flush()
+    try:
+        stats = analytics.refresh(recording=recorder.path, store=default_store())
+    except (OSError, ValueError) as e:
+        console.say(f"Error reading recorded games: {e}")
+        return
+    console.say("\n--- Statistics ---")
+    for line in analytics.format_report(stats, player_name):
+        console.say(line)
+
+
+
+
+def show_instructions(console=None):
     """
     Displays the instructions for the game.
     """
-    print("\n--- How to Play ---")
-    print("In this game, you try to guess a secret number.")
-    print("The computer will tell you if your guess is too high or too low.")
-    print("You can choose the difficulty, which affects the number of attempts.")
-    print("Try to guess the number in as few attempts as possible!")
+    console = console or default_console()
+    console.say("\n--- How to Play ---")
+    console.say("In this game, you try to guess a secret number.")
+    console.say("The computer will tell you if your guess is too high or too low.")
+    console.say("You can choose the difficulty, which affects the number of attempts.")
+    console.say("Try to guess the number in as few attempts as possible!")
 
 
 
 
-def play_sound(sound):
+def play_sound(sound, console=None):
     """
-    Plays a sound effect (simulated with text).
+    Plays a sound effect (simulated with text).  The effect itself is queued
+    on the effects scheduler, so this never blocks the game.
     Args:
         sound: The name of the sound effect ('win', 'lose', 'guess').
+        console: The console to talk to (optional, defaults to the terminal).
     """
+    console = console or default_console()
     if sound == 'win':
-        print("🎉🎉🎉 You win! 🎉🎉🎉")
+        console.say("🎉🎉🎉 You win! 🎉🎉🎉")
     elif sound == 'lose':
-        print("😞😞😞 You lose! 😞😞😞")
+        console.say("😞😞😞 You lose! 😞😞😞")
     elif sound == 'guess':
-        print("🔊 Guessing...")
+        console.say("🔊 Guessing...")
     elif sound == 'invalid':
-        print("❌ Invalid Input ❌")
-    time.sleep(0.5)
+        console.say("❌ Invalid Input ❌")
+    default_scheduler().emit("sound", sound)
 
 
 
 
-def two_player_game(x):
+def multi_player_game(x, player_names, max_attempts=0, console=None, low=1, rng=None, journal=None,
+                      resume=None):
     """
-    A two-player version of the number guessing game.
+    Players take turns guessing one shared secret number between low and
+    x, each with their own attempts budget.  The first to guess it wins.
+    With a journal, the match is saved after every guess so that it can be
+    resumed, and resume continues a saved match.
+    Args:
+        x: The upper bound of the range for the random number.
+        player_names: The names of the players, in turn order.
+        max_attempts: The attempts allowed to each player (optional).
+        console: The console to talk to (optional, defaults to the terminal).
+        low: The lower bound of the range (optional, defaults to 1).
+        rng: The SessionRng drawing the secret (optional, defaults to the
+            session of this process).
+        journal: The SessionJournal saving the match (optional).
+        resume: The SessionSnapshot of a saved match to continue (optional);
+            its secret, range, players and budget replace the arguments.
+    Returns:
+        The index of the winner in player_names, or None if nobody won.
     """
-    player1_name = get_player_name(1)
-    player2_name = get_player_name(2)
-    max_attempts = get_difficulty()
-    print(f"Okay, {player1_name} and {player2_name}, let's begin!")
-    random_number = random.randint(1, x)
-    turn = 1
+    console = console or default_console()
+    rng = rng or default_session()
+    telemetry = default_telemetry()
+    game_started = clock()
+    if resume is not None:
+        low, x, max_attempts, player_names = resume.low, resume.high, resume.max_attempts, resume.players
+        seed, random_number = resume.seed, resume.secret()
+        match = resume.game()
+        guesses = list(resume.guesses)
+    game_range = GameRange(low, x)
+    if resume is None:
+        seed, random_number = rng.secret(game_range)
+        match = MatchState(random_number, len(player_names), max_attempts)
+        guesses = []
+    recorder = default_recorder()
+    if journal is not None:
+        journal.start(SessionSnapshot("two_player", seed, low, x, max_attempts, False, player_names, guesses))
+    if telemetry.enabled:
+        telemetry.emit(GAME_STARTED, mode="two_player", low=low, high=x, max_attempts=max_attempts,
+                       players=len(player_names))
+    if resume is not None:
+        console.say(f"Resuming the game of {' and '.join(player_names)} {game_range} "
+                    f"after {match.guess_count} guesses.")
+    elif max_attempts > 0:
+        console.say(f"You each have {max_attempts} attempts to guess the number.")
+    parser = InputParser(game_range, default_limiter())
     while True:
-        print(f"\nIt's {player_name}'s turn.")
-        if turn == 1:
-            player_name = player1_name
-        else:
-            player_name = player2_name
-        guess_result = guess(x, max_attempts, player_name, game_mode="two_player")
-        if guess_result:
-            play_sound('win')
-            print(f"{player_name} wins!")
-            break
-        elif guess_result == False:
-            play_sound('lose')
-            break
+        turn = match.player
+        player_name = player_names[turn]
+        status, guess = parser.guess(console.ask(f"{player_name}, guess a number {game_range}: "))
+        if status != VALID:
+            say_invalid_guess(status, game_range, console)
+            continue
+        guess_started = clock()
+        result = match.step(guess)
+        if journal is not None:
+            if match.finished:
+                journal.finish()
+            else:
+                journal.add_guess(guess)
+        if recorder is not None:
+            guesses.append(guess)
+            if match.finished:
+                # The recorded budget is the whole match's, so that replay() agrees.
+                recorder.write(GameRecord("two_player", seed, low, x, match.max_attempts, False,
+                                          result == CORRECT, guesses,
+                                          player_name if result == CORRECT else ""))
+        if telemetry.enabled:
+            telemetry.emit(GUESS_MADE, clock() - guess_started, mode="two_player", result=match.last_result)
+        if result == CORRECT:
+            play_sound('win', console=console)
+            console.say(f"{player_name} guessed the number {random_number} and wins!")
+            if telemetry.enabled:
+                telemetry.emit(GAME_WON, clock() - game_started, mode="two_player", winner=player_name,
+                               guesses=match.guess_count)
+            save_match("two_player", player_names, player_name, match.guess_count, max_attempts,
+                       console=console)
+            return match.winner
+        if match.last_result == TOO_LOW:
+            console.say('Sorry, guess again. Too low.')
         else:
-            turn = 3 - turn
+            console.say('Sorry, guess again. Too high.')
+        if result == OUT_OF_ATTEMPTS:
+            play_sound('lose', console=console)
+            console.say(f"Everyone is out of attempts. The number was {random_number}.")
+            if telemetry.enabled:
+                telemetry.emit(GAME_LOST, clock() - game_started, mode="two_player", guesses=match.guess_count)
+            save_match("two_player", player_names, None, match.guess_count, max_attempts, console=console)
+            return None
+        if match.player_attempts_left(turn) == 0:
+            console.say(f"{player_name} is out of attempts.")
+
+
+def two_player_game(x, console=None, low=1, rng=None, journal=None):
+    """
+    A two-player version of the number guessing game, with numbers between
+    low and x.  The players take turns at the same number.  With a journal,
+    the match is saved after every guess so that it can be resumed.
+    """
+    console = console or default_console()
+    player1_name = get_player_name(1, console=console)
+    player2_name = get_player_name(2, console=console)
+    max_attempts = get_difficulty(console=console)
+    console.say(f"Okay, {player1_name} and {player2_name}, let's begin!")
+    return multi_player_game(x, [player1_name, player2_name], max_attempts, console=console, low=low, rng=rng,
+                             journal=journal)
+
+
+def resume_game(journal, console=None):
+    """
+    Offers to resume the unfinished game saved in the journal, and plays it
+    if the user wants to.  Returns True if a game was resumed.
+    """
+    console = console or default_console()
+    try:
+        snapshot = journal.load()
+    except (OSError, ValueError) as e:
+        console.say(f"Error reading the saved game: {e}")
+        journal.finish()
+        return False
+    if snapshot is None:
+        return False
+    players = " and ".join(name for name in snapshot.players if name) or "you"
+    answer = console.ask(f"Resume the unfinished game of {players} "
+                         f"({len(snapshot.guesses)} guesses made)? (yes/no): ").lower()
+    if answer != "yes":
+        journal.finish()
+        return False
+    if len(snapshot.players) > 1:
+        multi_player_game(snapshot.high, snapshot.players, console=console, journal=journal, resume=snapshot)
+    else:
+        guess(snapshot.high, console=console, journal=journal, resume=snapshot)
+        display_high_scores(player_name=snapshot.players[0], console=console)
+    return True
 
 
 
 
-def main():
+def main(console=None, game_range=None):
     """
     Main function to run the number guessing game.
+    Args:
+        console: The console to talk to (optional, defaults to the terminal).
+        game_range: The GameRange of the secret numbers (optional, defaults to 1..10).
     """
-    show_instructions()
+    console = console or default_console()
+    game_range = game_range or GameRange(1, CLI_DEFAULT_HIGH)
+    low, high = game_range.low, game_range.high
+    show_instructions(console=console)
+    # Scripted and replayed answers neither save games nor answer a resume
+    # prompt they were not written for.
+    journal = default_journal() if getattr(console, "interactive", False) else None
+    if journal is not None and resume_game(journal, console=console) and not play_again(console=console):
+        console.say("Thanks for playing!")
+        return
     while True:
-        choice = choose_game()
+        choice = choose_game(console=console)
         if choice == 0:
-            print("Thanks for playing!")
+            console.say("Thanks for playing!")
             break
         elif choice == 1:
-            player_name = get_player_name(1)
-            max_attempts = get_difficulty()
-            hints_enabled = input("Enable hints? (yes/no): ").lower() == "yes"
-            guess(10, max_attempts, player_name, hints_enabled)
-            display_high_scores()
+            player_name = get_player_name(1, console=console)
+            max_attempts = get_difficulty(console=console)
+            hints_enabled = console.ask("Enable hints? (yes/no): ").lower() == "yes"
+            guess(high, max_attempts, player_name, hints_enabled, console=console, low=low, journal=journal)
+            display_high_scores(player_name=player_name, console=console)
         elif choice == 2:
-            computer_guess(10)
+            max_attempts = get_difficulty(console=console)
+            hints_enabled = console.ask("Enable hints? (yes/no): ").lower() == "yes"
+            computer_guess(high, max_attempts, hints_enabled, console=console, low=low)
         elif choice == 3:
-            two_player_game(10)
-        if not play_again():
-            print("Thanks for playing!")
+            two_player_game(high, console=console, low=low, journal=journal)
+        elif choice == 4:
+            display_high_scores(console=console)
+            continue
+        elif choice == 5:
+            display_statistics(console=console)
+            continue
+        if not play_again(console=console):
+            console.say("Thanks for playing!")
             break
 
 
 
-if __name__ == "__main__":
-    main()
+def run(argv=None):
+    """
+    Parses the command line and runs the game.
+    Args:
+        argv: The command line arguments (optional, defaults to sys.argv).
+    """
+    parser = argparse.ArgumentParser(description="Number guessing game.")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="Answer every prompt from FILE instead of the keyboard")
+    parser.add_argument("--output", metavar="FILE",
+                        help="With --replay, write the transcript to FILE")
+    parser.add_argument("--low", type=int, default=1, help="Lowest secret number")
+    parser.add_argument("--high", type=int, default=CLI_DEFAULT_HIGH, help="Highest secret number")
+    parser.add_argument("--bits", type=int,
+                        help="Guess an unsigned number of this many bits (overrides --low/--high)")
+    parser.add_argument("--telemetry", metavar="FILE",
+                        help="Append game telemetry events to FILE as JSON lines")
+    parser.add_argument("--record", metavar="FILE",
+                        help="Append a binary recording of every game to FILE")
+    parser.add_argument("--scores", metavar="BACKEND",
+                        help='Keep high scores in "json" (the default), "sqlite" or a SQLite file')
+    parser.add_argument("--seed", type=int,
+                        help="Seed the secret numbers, so that the session can be replayed")
+    parser.add_argument("--max-rate", type=float,
+                        help="Allow at most this many guesses per second (flood protection)")
+    parser.add_argument("--session", metavar="FILE",
+                        help='Save the game in progress to FILE (default game_session.bin), or "off"; '
+                             'games played with --replay are never saved')
+    parser.add_argument("--profile", metavar="PATH", nargs="?", const="profile",
+                        help="Time every prompt and menu action and sample the stack; write the report "
+                             "to PATH.txt and a flamegraph stack dump to PATH.folded (default profile)")
+    args = parser.parse_args(argv)
+    try:
+        game_range = GameRange.bits(args.bits) if args.bits else GameRange(args.low, args.high)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.scores:
+        import score_store
+        try:
+            score_store.configure(score_store.open_store(args.scores))
+        except OSError as e:
+            parser.error(f"cannot open the high scores: {e}")
+    if args.seed is not None:
+        import rng_service
+        rng_service.configure(args.seed)
+    if args.max_rate is not None:
+        import input_parser
+        input_parser.configure(args.max_rate)
+    else:
+        default_limiter()  # reports a bad GUESS_MAX_RATE before the first game
+    if args.session:
+        import session_store
+        off = args.session.lower() == "off"
+        session_store.configure(None if off else session_store.SessionJournal(args.session))
+    if args.telemetry:
+        import telemetry
+        telemetry.configure(telemetry.JsonlSink(args.telemetry))
+    if args.record:
+        import game_record
+        try:
+            game_record.configure(game_record.RecordWriter(args.record))
+        except (OSError, ValueError) as e:
+            parser.error(f"cannot record to {args.record}: {e}")
+    else:
+        default_recorder()  # reports a bad GUESS_RECORD before the first game
+    profiler = None
+    if args.profile:
+        import profiler as profiling
+        profiler = profiling.Profiler(args.profile)
+        profiler.instrument(sys.modules[__name__])
+        profiler.start()
+    try:
+        if args.replay:
+            console = BatchConsole(args.replay, args.output or sys.stdout)
+            try:
+                main(console, game_range)
+            except EOFError:
+                pass
+            finally:
+                console.flush()
+                console.close()
+        else:
+            main(game_range=game_range)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            report_path, folded_path = profiler.write()
+            print(f"Profile written to {report_path} and {folded_path}", file=sys.stderr)
 
- 
+
+if __name__ == "__main__":
+    run()
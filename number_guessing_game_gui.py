@@ -1,12 +1,32 @@
-import random
+import argparse
 import sys
+import tempfile
+from collections import deque
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout,
     QMessageBox, QDialog, QDialogButtonBox, QFormLayout, QComboBox,
-    QScrollArea, QTextEdit, QHBoxLayout, QGroupBox,
+    QListView, QHBoxLayout, QGroupBox, QFileDialog,
+)
+from PyQt5.QtCore import (
+    Qt, QTimer, QObject, pyqtSignal, QAbstractListModel, QModelIndex,
 )
-from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont
+from game_engine import (
+    GameRange, TOO_LOW, TOO_HIGH, CORRECT, OUT_OF_ATTEMPTS, DIFFICULTY_ATTEMPTS,
+    DEFAULT_LOW, DEFAULT_HIGH,
+)
+from score_store import default_store, flush_default_store
+from effects import default_scheduler
+from game_record import GameRecord, default_recorder
+from rng_service import default_session
+from telemetry import (
+    default_telemetry, clock, GAME_STARTED, GUESS_MADE, HINT_SHOWN, GAME_WON, GAME_LOST, SCORE_PERSISTED,
+)
+from hints import HintEngine, HINT_EVERY
+from session_store import SessionSnapshot, default_journal
+from input_parser import (
+    InputParser, parse_number, parse_int, default_limiter, NOT_A_NUMBER, OUT_OF_RANGE, RATE_LIMITED,
+)
 
 class GameSettingsDialog(QDialog):
     """
@@ -38,6 +58,12 @@ class GameSettingsDialog(QDialog):
         self.game_mode_combo.addItems(["Single Player", "Two Player"])
         self.layout.addRow("Game Mode:", self.game_mode_combo)
 
+        # Plain line edits, since spin boxes cannot hold numbers beyond 32 bits.
+        self.low_input = QLineEdit(str(DEFAULT_LOW), self)
+        self.layout.addRow("Lowest Number:", self.low_input)
+        self.high_input = QLineEdit(str(DEFAULT_HIGH), self)
+        self.layout.addRow("Highest Number:", self.high_input)
+
         self.button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, self)
         self.button_box.accepted.connect(self.accept)
         self.button_box.rejected.connect(self.reject)
@@ -62,34 +88,161 @@ class GameSettingsDialog(QDialog):
             hints_enabled = self.hints_checkbox.currentText() == "Yes"
             game_mode = self.game_mode_combo.currentText()
             if difficulty == "Custom":
-                try:
-                    attempts = int(self.custom_attempts_input.text())
-                    if attempts <= 0:
-                        QMessageBox.warning(self, "Invalid Input", "Attempts must be a positive number.")
-                        return None
-                except ValueError:
+                status, attempts = parse_number(self.custom_attempts_input.text(), 1)
+                if status == OUT_OF_RANGE:
+                    QMessageBox.warning(self, "Invalid Input", "Attempts must be a positive number.")
+                    return None
+                elif status == NOT_A_NUMBER:
                     QMessageBox.warning(self, "Invalid Input", "Please enter a valid number for attempts.")
                     return None
             else:
-                attempts = {"Easy": 10, "Medium": 5, "Hard": 3}[difficulty]
+                attempts = DIFFICULTY_ATTEMPTS[difficulty.lower()]
+            low, high = parse_int(self.low_input.text()), parse_int(self.high_input.text())
+            if low is None or high is None or low > high:
+                QMessageBox.warning(self, "Invalid Input",
+                                    "Please enter whole numbers for the range, lowest first.")
+                return None
             return {
                 "player_name": player_name,
                 "difficulty": difficulty,
                 "attempts": attempts,
                 "hints_enabled": hints_enabled,
                 "game_mode": game_mode,
+                "low": low,
+                "high": high,
             }
         return None
 
 
+class EffectsBridge(QObject):
+    """
+    Re-emits effect events from the effects worker thread on the GUI thread.
+    """
+    effect = pyqtSignal(object)
+
+
+class GameLogModel(QAbstractListModel):
+    """
+    The game log, holding at most capacity rows for the view.
+
+    Messages appended during one event-loop tick are inserted together on
+    the next tick, so a burst of log lines costs one model update and one
+    repaint.  Rows pushed out of the ring buffer are spilled to a temporary
+    file, so export() can still write the whole log.
+    """
+    def __init__(self, capacity=1000, parent=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        self.rows = deque()
+        self.pending = []
+        self.spill = None
+        self.flush_scheduled = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self.rows[index.row()]
+        return None
+
+    def append(self, message):
+        """
+        Queues a message; it is shown on the next event-loop tick.
+        """
+        self.pending.append(message)
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            QTimer.singleShot(0, self.flush)
+
+    def _spill(self, messages):
+        if self.spill is None:
+            self.spill = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self.spill.writelines(message + "\n" for message in messages)
+
+    def flush(self):
+        """
+        Moves the queued messages into the model.
+        """
+        self.flush_scheduled = False
+        if not self.pending:
+            return
+        new, self.pending = self.pending, []
+        overflow = len(self.rows) + len(new) - self.capacity
+        if overflow >= len(self.rows):
+            # Everything on screen is replaced, so reset instead of moving rows.
+            self.beginResetModel()
+            self._spill(self.rows)
+            self._spill(new[:len(new) - self.capacity])
+            self.rows = deque(new[-self.capacity:])
+            self.endResetModel()
+            return
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            self._spill(self.rows.popleft() for _ in range(overflow))
+            self.endRemoveRows()
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(new) - 1)
+        self.rows.extend(new)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.rows.clear()
+        self.pending = []
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
+        self.endResetModel()
+
+    def history(self):
+        """
+        Yields every message logged since the last clear, oldest first.
+        """
+        if self.spill is not None:
+            self.spill.flush()
+            self.spill.seek(0)
+            for line in self.spill:
+                yield line.rstrip("\n")
+            self.spill.seek(0, 2)
+        yield from self.rows
+        yield from self.pending
+
+    def export(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(message + "\n" for message in self.history())
+
+
 class NumberGuessingGame(QWidget):
     """
     A GUI-based number guessing game.
+
+    In headless mode no modal dialog is ever opened: messages are emitted
+    through message_shown instead, and the play-again question is answered
+    by play_again_callback (starting a new game if it is None).  This lets
+    scripts drive the real widgets, e.g. on the offscreen Qt platform.
     """
-    def __init__(self):
+    message_shown = pyqtSignal(str, str, str)  # kind, title, text
+    game_finished = pyqtSignal(bool)  # True if the game was won
+
+    def __init__(self, log_capacity=1000, headless=False, rng=None):
+        """
+        Args:
+            log_capacity: The number of game log lines kept on screen.
+            headless: Replace modal dialogs with signals and callbacks.
+            rng: The SessionRng drawing the secrets (optional, defaults to
+                one spawned from the session of this process).
+        """
         super().__init__()
+        self.log_capacity = log_capacity
+        self.headless = headless
+        self.rng = rng or default_session().spawn()
+        self.play_again_callback = None
+        self.settings_dialog = None
         self.init_ui()
         self.random_number = 0
+        self.game_range = GameRange()
+        self.game = None
         self.max_attempts = 0
         self.attempts_left = 0
         self.player_name = ""
@@ -135,6 +288,11 @@ class NumberGuessingGame(QWidget):
         self.feedback_label.setAlignment(Qt.AlignCenter)
         self.feedback_label.setFont(QFont("Arial", 12))
 
+        # Hint Label
+        self.hint_label = QLabel("", self)
+        self.hint_label.setAlignment(Qt.AlignCenter)
+        self.hint_label.setWordWrap(True)
+
         # Settings Button
         self.settings_button = QPushButton("Settings", self)
         self.settings_button.clicked.connect(self.show_settings_dialog)
@@ -143,16 +301,28 @@ class NumberGuessingGame(QWidget):
         self.new_game_button = QPushButton("New Game", self)
         self.new_game_button.clicked.connect(self.start_new_game)
 
+        # High Scores Button
+        self.high_scores_button = QPushButton("High Scores", self)
+        self.high_scores_button.clicked.connect(self.show_high_scores)
+
+        # Statistics Button
+        self.statistics_button = QPushButton("Statistics", self)
+        self.statistics_button.clicked.connect(self.show_statistics)
+
         # Game Log
-        self.game_log = QTextEdit(self)
-        self.game_log.setReadOnly(True)
+        self.log_model = GameLogModel(self.log_capacity, self)
+        self.game_log = QListView(self)  # Only the visible rows are rendered
+        self.game_log.setModel(self.log_model)
+        self.game_log.setUniformItemSizes(True)
         self.game_log.setMaximumHeight(200)
         self.game_log.setFont(QFont("Monospace", 10))
-        self.log_scroll_area = QScrollArea(self)  # Wrap in a scroll area
-        self.log_scroll_area.setWidget(self.game_log)
-        self.log_scroll_area.setWidgetResizable(True)
+        self.log_model.rowsInserted.connect(self.game_log.scrollToBottom)
         self.log_label = QLabel("Game Log:", self)
 
+        # Export Log Button
+        self.export_log_button = QPushButton("Export Log", self)
+        self.export_log_button.clicked.connect(self.export_log)
+
         # Layout
         main_layout = QVBoxLayout(self)
         main_layout.addWidget(self.title_label)
@@ -161,10 +331,14 @@ class NumberGuessingGame(QWidget):
         main_layout.addWidget(self.guess_input)
         main_layout.addWidget(self.guess_button)
         main_layout.addWidget(self.feedback_label)
+        main_layout.addWidget(self.hint_label)
         main_layout.addWidget(self.settings_button)
         main_layout.addWidget(self.new_game_button)
+        main_layout.addWidget(self.high_scores_button)
+        main_layout.addWidget(self.statistics_button)
         main_layout.addWidget(self.log_label)
-        main_layout.addWidget(self.log_scroll_area)
+        main_layout.addWidget(self.game_log)
+        main_layout.addWidget(self.export_log_button)
 
         self.setGeometry(300, 300, 400, 400)
 
@@ -174,47 +348,180 @@ class NumberGuessingGame(QWidget):
         self.feedback_colors = ["", "red", "green", "blue", "purple"]
         self.feedback_color_index = 0
 
+        # Effects are played from the shared effect stream
+        self.effects = default_scheduler()
+        self.effects_bridge = EffectsBridge(self)
+        self.effects_bridge.effect.connect(self.play_effect)
+        self.effect_handler = self.effects.subscribe(self.effects_bridge.effect.emit)
+        self.telemetry = default_telemetry()
+        self.game_started_at = 0.0
+        self.recorder = None
+        self.hint_engine = None
+        self.input_parser = None
+        self.journal = default_journal()
+
     def show_settings_dialog(self):
         """
         Opens the game settings dialog.
         """
-        dialog = GameSettingsDialog(self)
-        settings = dialog.get_settings()
+        # Built on first use and kept, so later clicks only show it again.
+        if self.settings_dialog is None:
+            self.settings_dialog = GameSettingsDialog(self)
+        self.settings_dialog.exec_()
+        settings = self.settings_dialog.get_settings()
         if settings:
-            self.player_name = settings["player_name"]
-            self.max_attempts = settings["attempts"]
-            self.attempts_left = self.max_attempts
-            self.hints_enabled = settings["hints_enabled"]
-            self.game_mode = settings["game_mode"]
-            if self.game_mode == "Two Player":
-                self.player1_name = self.player_name if self.player_name else "Player 1"
-                self.player2_name = "Player 2"  # Simple default for 2nd player.
-                self.setWindowTitle("Number Guessing Game - Two Player")
-            else:
-                self.setWindowTitle("Number Guessing Game - " + self.player_name)
-            self.start_new_game()
+            self.apply_settings(settings)
+
+    def apply_settings(self, settings):
+        """
+        Applies a settings dictionary (as returned by
+        GameSettingsDialog.get_settings()) and starts a new game.
+        """
+        self.player_name = settings["player_name"]
+        self.max_attempts = settings["attempts"]
+        self.attempts_left = self.max_attempts
+        self.hints_enabled = settings["hints_enabled"]
+        self.game_mode = settings["game_mode"]
+        self.game_range = GameRange(settings.get("low", DEFAULT_LOW), settings.get("high", DEFAULT_HIGH))
+        if self.game_mode == "Two Player":
+            self.player1_name = self.player_name if self.player_name else "Player 1"
+            self.player2_name = "Player 2"  # Simple default for 2nd player.
+            self.setWindowTitle("Number Guessing Game - Two Player")
+        else:
+            self.setWindowTitle("Number Guessing Game - " + self.player_name)
+        self.start_new_game()
+
+    def show_high_scores(self):
+        """
+        Shows the top 10 high scores and the current player's rank.
+        """
+        store = default_store()
+        top_scores = store.top(10)
+        if not top_scores:
+            self.show_message("information", "High Scores", "No high scores available yet.")
+            return
+        lines = [f"{position}. {player}: {score} guesses"
+                 for position, (player, score) in enumerate(top_scores, start=1)]
+        if self.player_name:
+            rank = store.rank(self.player_name)
+            if rank is not None:
+                lines.append(f"\n{self.player_name} is ranked #{rank} of {len(store)} players.")
+        self.show_message("information", "High Scores", "\n".join(lines))
+
+    def show_statistics(self):
+        """
+        Shows statistics over the recorded games and the current player's
+        record.  Only games recorded since the last time are read.
+        """
+        recorder = default_recorder()
+        if recorder is None:
+            self.show_message("information", "Statistics",
+                              "No games are being recorded.  Set GUESS_RECORD to a file to collect statistics.")
+            return
+        try:
+            import analytics  # needs numpy, so it is only imported here
+        except ImportError:
+            self.show_message("warning", "Statistics", "Statistics need numpy, which is not installed.")
+            return
+        recorder.flush()
+        try:
+            stats = analytics.refresh(recording=recorder.path, store=default_store())
+        except (OSError, ValueError) as e:
+            self.show_message("warning", "Statistics", f"Error reading recorded games: {e}")
+            return
+        self.show_message("information", "Statistics",
+                          "\n".join(analytics.format_report(stats, self.player_name)))
 
     def start_new_game(self):
         """
         Starts a new game.
         """
         if self.max_attempts == 0:
-            QMessageBox.critical(self, "Error", "Please set the game settings first.")
+            self.show_message("critical", "Error", "Please set the game settings first.")
             return
 
-        self.random_number = random.randint(1, 100)
-        self.attempts_left = self.max_attempts
+        self.seed, self.random_number = self.rng.secret(self.game_range)
+        self.begin_game()
+
+    def resume_game(self, snapshot):
+        """
+        Restores the settings of a saved game (a SessionSnapshot) and
+        continues it where it was left.
+        """
+        self.max_attempts = snapshot.max_attempts
+        self.hints_enabled = snapshot.hints_enabled
+        self.game_range = GameRange(snapshot.low, snapshot.high)
+        self.player_name = snapshot.players[0]
+        if len(snapshot.players) > 1:
+            self.game_mode = "Two Player"
+            self.player1_name, self.player2_name = snapshot.players[:2]
+            self.setWindowTitle("Number Guessing Game - Two Player")
+        else:
+            self.game_mode = "Single Player"
+            self.setWindowTitle("Number Guessing Game - " + self.player_name)
+        self.seed, self.random_number = snapshot.seed, snapshot.secret()
+        self.begin_game(snapshot.guesses)
+        self.log_message(f"Resumed the game after {self.game.guess_count} guesses.")
+
+    def offer_resume(self):
+        """
+        Offers to resume the unfinished game saved in the session journal.
+        In headless mode it is resumed without asking.  Returns True if a
+        game was resumed.
+        """
+        if self.journal is None:
+            return False
+        try:
+            snapshot = self.journal.load()
+        except (OSError, ValueError) as e:
+            self.show_message("warning", "Saved Game", f"Error reading the saved game: {e}")
+            self.journal.finish()
+            return False
+        if snapshot is None:
+            return False
+        if not self.headless:
+            answer = QMessageBox.question(
+                self, "Resume Game?", f"Resume the unfinished game ({len(snapshot.guesses)} guesses made)?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+            if answer != QMessageBox.Yes:
+                self.journal.finish()
+                return False
+        self.resume_game(snapshot)
+        return True
+
+    def begin_game(self, guesses=()):
+        """
+        Sets up the game for self.seed and the current settings, with the
+        guesses already made (when resuming) stepped through it.
+        """
+        self.recorder = default_recorder()
+        two_player = self.game_mode == "Two Player"
+        # The players take turns at the same number, each with max_attempts.
+        snapshot = SessionSnapshot("two_player" if two_player else "single", self.seed, self.game_range.low,
+                                   self.game_range.high, self.max_attempts, self.hints_enabled,
+                                   self.player_names() if two_player else [self.player_name], guesses)
+        self.hint_engine = HintEngine(self.game_range) if self.hints_enabled else None
+        self.input_parser = InputParser(self.game_range, default_limiter())
+        self.game = snapshot.game(self.hint_engine)
+        self.recorded_guesses = list(guesses)
+        if self.journal is not None:
+            self.journal.start(snapshot)
+        self.hint_label.setText("")
+        self.game_started_at = clock()
+        if self.telemetry.enabled:
+            self.telemetry.emit(GAME_STARTED, mode=self.game_mode, low=self.game_range.low,
+                                high=self.game_range.high, max_attempts=self.max_attempts)
+        self.attempts_left = self.game.attempts_left
         self.feedback_label.setText("")
         self.guess_input.clear()
         self.guess_button.setEnabled(True)
         self.game_started = True
-        self.game_log.clear()
+        self.log_model.clear()
         self.current_player = 1 #reset to player 1
-        if self.game_mode == "Two Player":
-            self.instruction_label.setText(f"It's {self.player1_name}'s turn to guess.  Number between 1 and 100.")
-            self.attempts_label.setText(f"Attempts Left: {self.attempts_left}")
+        if two_player:
+            self.show_turn()
         else:
-            self.instruction_label.setText(f"I'm thinking of a number between 1 and 100.  You have {self.attempts_left} attempts left.")
+            self.instruction_label.setText(f"I'm thinking of a number {self.game_range}.  You have {self.attempts_left} attempts left.")
             self.attempts_label.setText(f"Attempts Left: {self.attempts_left}")
 
     def check_guess(self):
@@ -222,60 +529,172 @@ class NumberGuessingGame(QWidget):
         Checks the user's guess and provides feedback.
         """
         if not self.game_started:
-            QMessageBox.critical(self, "Error", "Please start a new game!")
+            self.show_message("critical", "Error", "Please start a new game!")
             return
 
-        try:
-            guess = int(self.guess_input.text())
-        except ValueError:
-            QMessageBox.warning(self, "Invalid Input", "Please enter a valid number.")
+        status, guess = self.input_parser.guess(self.guess_input.text())
+        if status == NOT_A_NUMBER:
+            self.show_message("warning", "Invalid Input", "Please enter a valid number.")
             return
-
-        if guess < 1 or guess > 100:
-            QMessageBox.warning(self, "Invalid Input", "Please enter a number between 1 and 100.")
+        if status == OUT_OF_RANGE:
+            self.show_message("warning", "Invalid Input", f"Please enter a number {self.game_range}.")
+            return
+        if status == RATE_LIMITED:
+            self.show_message("warning", "Slow Down", "Too many guesses at once.  Please slow down.")
             return
 
-        self.attempts_left -= 1
+        started = clock()
+        two_player = self.game_mode == "Two Player"
+        if two_player:
+            current_player_name = self.player_names()[self.game.player]
+        result = self.game.step(guess)
+        if self.journal is not None:
+            if self.game.finished:
+                self.journal.finish()
+            else:
+                self.journal.add_guess(guess)
+        if self.recorder is not None:
+            self.recorded_guesses.append(guess)
+            if self.game.finished:
+                if two_player:
+                    mode, player = "two_player", current_player_name if result == CORRECT else ""
+                else:
+                    mode, player = "single", self.player_name
+                # A match records the budget of both players, so that replay() agrees.
+                self.recorder.write(GameRecord(
+                    mode, self.seed, self.game_range.low, self.game_range.high, self.game.max_attempts,
+                    self.hints_enabled, result == CORRECT, self.recorded_guesses, player))
+        self.attempts_left = self.game.attempts_left
         self.attempts_label.setText(f"Attempts Left: {self.attempts_left}")
 
-        if self.game_mode == "Two Player":
-            current_player_name = self.player1_name if self.current_player == 1 else self.player2_name
+        if two_player:
             self.log_message(f"{current_player_name} guessed {guess}.")
         else:
             self.log_message(f"You guessed {guess}.")
 
-        if guess == self.random_number:
-            if self.game_mode == "Two Player":
+        if result == CORRECT:
+            if self.telemetry.enabled:
+                self.telemetry.emit(GUESS_MADE, clock() - started, mode=self.game_mode, result=result)
+                self.telemetry.emit(GAME_WON, clock() - self.game_started_at, mode=self.game_mode,
+                                    guesses=self.game.guess_count)
+            self.effects.emit("sound", "win")
+            if two_player:
                 self.log_message(f"{current_player_name} guessed correctly!")
-                QMessageBox.information(self, "Winner", f"{current_player_name} wins!")
+                self.show_message("information", "Winner", f"{current_player_name} wins!")
             else:
                 self.log_message(f"You guessed correctly!")
-                QMessageBox.information(self, "Congratulations", f"You guessed it, {self.player_name}!")
+                self.save_result(True)
+                self.show_message("information", "Congratulations", f"You guessed it, {self.player_name}!")
             self.guess_button.setEnabled(False)
             self.game_started = False
+            self.game_finished.emit(True)
             self.show_play_again_dialog()
-        elif self.attempts_left == 0:
+        elif result == OUT_OF_ATTEMPTS:
+            if self.telemetry.enabled:
+                self.telemetry.emit(GUESS_MADE, clock() - started, mode=self.game_mode,
+                                    result=self.game.last_result)
+                self.telemetry.emit(GAME_LOST, clock() - self.game_started_at, mode=self.game_mode,
+                                    guesses=self.game.guess_count)
+            self.effects.emit("sound", "lose")
             self.log_message(f"Out of attempts. The number was {self.random_number}.")
-            QMessageBox.information(self, "Game Over", f"Sorry, you're out of attempts. The number was {self.random_number}.")
+            if not two_player:
+                self.save_result(False)
+            self.show_message("information", "Game Over", f"Sorry, you're out of attempts. The number was {self.random_number}.")
             self.guess_button.setEnabled(False)
             self.game_started = False
+            self.game_finished.emit(False)
             self.show_play_again_dialog()
-        elif guess < self.random_number:
+        elif result == TOO_LOW:
             self.feedback_label.setText("Too low!")
             self.start_feedback_animation()
         else:
             self.feedback_label.setText("Too high!")
             self.start_feedback_animation()
+        if result in (TOO_LOW, TOO_HIGH) and self.telemetry.enabled:
+            self.telemetry.emit(GUESS_MADE, clock() - started, mode=self.game_mode, result=result)
+        if result in (TOO_LOW, TOO_HIGH) and self.hint_engine is not None:
+            self.show_hint(guess, result)
         self.guess_input.clear()
 
-        if self.game_mode == "Two Player":
-            self.current_player = 3 - self.current_player
-            self.instruction_label.setText(f"It's {self.player1_name if self.current_player == 1 else self.player2_name}'s turn to guess.  Number between 1 and 100.")
+        if two_player and self.game_started:
+            self.show_turn()
+
+    def save_result(self, won):
+        """
+        Saves the high score of a won single-player game and adds the game
+        to the match history, through the store the CLI uses.  Games
+        without a player name are not saved.
+        """
+        if not self.player_name:
+            return
+        guesses = self.game.guess_count
+        store = default_store()
+        try:
+            if won:
+                started = clock()
+                status = store.record(self.player_name, guesses)
+                if self.telemetry.enabled:
+                    self.telemetry.emit(SCORE_PERSISTED, clock() - started, score=guesses, status=status)
+                if status == "improved":
+                    self.log_message("New high score!")
+                elif status == "new":
+                    self.log_message("Score saved!")
+            store.record_match("single", [self.player_name], self.player_name if won else None, guesses,
+                               self.game.max_attempts)
+        except OSError as e:
+            self.show_message("warning", "High Scores", f"Error saving the high score: {e}")
+
+    def show_hint(self, guess, result):
+        """
+        Follows the feedback on a guess and, after every third guess,
+        shows the most informative hint.
+        """
+        self.hint_engine.observe(guess, result)
+        if self.game.guess_count % HINT_EVERY != 0:
+            return
+        hint = self.hint_engine.next_hint(self.random_number)
+        if hint is None:
+            return
+        kind, text, bits = hint
+        self.hint_label.setText(f"Hint: {text}")
+        self.log_message(f"Hint: {text}")
+        if self.telemetry.enabled:
+            self.telemetry.emit(HINT_SHOWN, mode=self.game_mode, hint=kind, bits=bits,
+                                guesses=self.game.guess_count)
+
+    def player_names(self):
+        return [self.player1_name, self.player2_name]
+
+    def show_turn(self):
+        """
+        Shows whose turn it is in a two-player game and their attempts left.
+        """
+        self.current_player = self.game.player + 1
+        name = self.player_names()[self.game.player]
+        self.instruction_label.setText(f"It's {name}'s turn to guess.  Number {self.game_range}.")
+        self.attempts_label.setText(f"Attempts Left: {self.game.player_attempts_left()}")
+
+    def show_message(self, kind, title, text):
+        """
+        Shows a message box of the given kind ('critical', 'warning' or
+        'information'), or emits message_shown in headless mode.
+        """
+        if self.headless:
+            self.message_shown.emit(kind, title, text)
+        else:
+            getattr(QMessageBox, kind)(self, title, text)
 
     def show_play_again_dialog(self):
         """
         Asks the user if they want to play again.
         """
+        if self.headless:
+            again = self.play_again_callback() if self.play_again_callback else True
+            if again:
+                self.start_new_game()
+            else:
+                self.close()
+            return
         message_box = QMessageBox(self)
         message_box.setWindowTitle("Play Again?")
         message_box.setText("Do you want to play again?")
@@ -292,15 +711,48 @@ class NumberGuessingGame(QWidget):
         """
         Adds a message to the game log.
         """
-        self.game_log.append(message)
-        self.game_log.ensureCursorVisible()
+        self.log_model.append(message)
+
+    def export_log(self):
+        """
+        Saves the whole game log to a text file.
+        """
+        path, _ = QFileDialog.getSaveFileName(self, "Export Game Log", "game_log.txt",
+                                              "Text Files (*.txt)")
+        if path:
+            try:
+                self.log_model.export(path)
+            except OSError as e:
+                self.show_message("warning", "Export Failed", f"Could not write the log: {e}")
 
     def start_feedback_animation(self):
         """
-        Starts a timer to cycle through colors for the feedback label.
+        Queues the feedback label animation on the effect stream.
         """
-        self.feedback_color_index = 0
-        self.timer.start(200)  # Update every 200 milliseconds
+        self.effects.emit("animation", "feedback")
+
+    def play_effect(self, event):
+        """
+        Plays an effect event.  Runs on the GUI thread.
+        """
+        if event.kind == "animation" and event.name == "feedback":
+            # Cycle through colors for the feedback label.
+            self.feedback_color_index = 0
+            self.timer.start(200)  # Update every 200 milliseconds
+
+    def closeEvent(self, event):
+        """
+        Stops listening to the effect stream and writes pending high
+        scores and recorded games when the window closes.  An unfinished
+        game stays in the session journal, to be resumed next time.
+        """
+        self.effects.unsubscribe(self.effect_handler)
+        if self.journal is not None:
+            self.journal.close()
+        flush_default_store()
+        if self.recorder is not None:
+            self.recorder.flush()
+        super().closeEvent(event)
 
     def update_feedback_label(self):
         """
@@ -311,9 +763,40 @@ class NumberGuessingGame(QWidget):
         if self.feedback_color_index == 0:
             self.timer.stop()
 
+def run(argv=None):
+    """
+    Opens the game window and runs the Qt event loop until it is closed.
+    Args:
+        argv: The command line arguments (optional, defaults to sys.argv).
+    """
+    parser = argparse.ArgumentParser(description="Number guessing game window.")
+    parser.add_argument("--profile", metavar="PATH", nargs="?", const="profile",
+                        help="Time every slot and sample the stack; write the report to PATH.txt "
+                             "and a flamegraph stack dump to PATH.folded (default profile)")
+    args, qt_argv = parser.parse_known_args(sys.argv[1:] if argv is None else list(argv))
+    app = QApplication([sys.argv[0]] + qt_argv)
+    default_recorder()  # report a bad GUESS_RECORD or GUESS_MAX_RATE before the first game
+    default_limiter()
+    profiler = None
+    if args.profile:
+        import profiler as profiling
+        profiler = profiling.Profiler(args.profile)
+        profiler.instrument(NumberGuessingGame)
+        profiler.instrument(GameSettingsDialog, ["update_custom_attempts_input", "get_settings"])
+        profiler.instrument(GameLogModel, ["append", "flush", "clear", "export"])
+        profiler.start()
+    try:
+        game = NumberGuessingGame()
+        game.show()
+        game.offer_resume()
+        return app.exec_()
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            report_path, folded_path = profiler.write()
+            print(f"Profile written to {report_path} and {folded_path}", file=sys.stderr)
+
+
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
-    game = NumberGuessingGame()
-    game.show()
-    sys.exit(app.exec_())
+    sys.exit(run())
 
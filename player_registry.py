@@ -0,0 +1,274 @@
+"""
+Compact registry of player names and their best scores.
+
+A PlayerRegistry interns every player name to a small integer id and keeps
+everything about the players in flat columns instead of one Python object
+per player:
+
+    names     the UTF-8 bytes of all names, back to back
+    offsets   where each name starts (array "Q", one more than players)
+    hashes    the CRC-32 of each name (array "I")
+    table     an open-addressing hash table of ids (array "i", -1 empty),
+              at most half full
+    best      the best score of each player (array "I", NO_SCORE if none)
+
+A name lookup hashes the UTF-8 bytes once and probes the table, comparing
+bytes only when the stored hash matches, so a player costs about 40 bytes
+instead of the few hundred a dict entry plus a leaderboard node cost.
+
+save() writes the columns to one file with 8-byte aligned sections, and
+open() maps that file back without reading or parsing it: the columns are
+memoryviews of the mapping until the registry is first changed, when they
+are copied into arrays.  The file can also hold the leaderboard order
+(every player id sorted by best score, then name), so a ranking does not
+have to be re-sorted when the registry is opened.
+"""
+import mmap
+import os
+import struct
+from array import array
+from itertools import accumulate
+from zlib import crc32
+
+MAGIC = b"GTNPREG\x01"
+# magic, players, table size, name bytes, order length, source (3 x u64)
+HEADER = struct.Struct("<8sQQQQQQQ")
+NO_SCORE = 0xFFFFFFFF
+EMPTY = -1
+
+
+def _encode(name):
+    # surrogatepass keeps odd names from JSON files, and UTF-8 bytes sort
+    # in the same order as the str they encode.
+    return name.encode("utf-8", "surrogatepass")
+
+
+def _padded(size):
+    return (size + 7) & ~7
+
+
+def _copy(typecode, view):
+    column = array(typecode)
+    column.frombytes(view.cast("B"))
+    return column
+
+
+class PlayerRegistry:
+    """
+    Player names interned to ids, with the best score of each player.
+    """
+
+    def __init__(self):
+        self.names = bytearray()
+        self.offsets = array("Q", [0])
+        self.hashes = array("I")
+        self.table = array("i", [EMPTY]) * 8
+        self.best = array("I")
+        self.order = None
+        self.source = (0, 0, 0)
+        self._mapping = None
+
+    @classmethod
+    def from_scores(cls, scores):
+        """
+        Builds a registry from (player_name, score) pairs, keeping the best
+        score of each player.
+        """
+        best = {}
+        for name, score in scores:
+            current = best.get(name)
+            if current is None or score < current:
+                best[name] = score
+        encoded = [_encode(name) for name in best]
+        registry = cls()
+        registry.names = bytearray(b"".join(encoded))
+        registry.offsets = array("Q", accumulate(map(len, encoded), initial=0))
+        registry.hashes = array("I", map(crc32, encoded))
+        registry.best = array("I", best.values())
+        size = 8
+        while size < 2 * len(encoded):
+            size *= 2
+        registry.table = array("i", [EMPTY]) * (size // 2)
+        registry._grow()
+        return registry
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __contains__(self, name):
+        return self.id(name) is not None
+
+    def _find(self, data, hashed):
+        """
+        Returns (id, table slot): the id of the name with UTF-8 bytes data,
+        or EMPTY and the free slot it would go in.
+        """
+        table = self.table
+        mask = len(table) - 1
+        slot = hashed & mask
+        hashes, offsets, names = self.hashes, self.offsets, self.names
+        while True:
+            player = table[slot]
+            if player == EMPTY:
+                return EMPTY, slot
+            if hashes[player] == hashed and names[offsets[player]:offsets[player + 1]] == data:
+                return player, slot
+            slot = (slot + 1) & mask
+
+    def id(self, name):
+        """
+        Returns the id of a player name, or None if it is not registered.
+        """
+        data = _encode(name)
+        player, _ = self._find(data, crc32(data))
+        return None if player == EMPTY else player
+
+    def intern(self, name):
+        """
+        Returns the id of a player name, registering it if it is new.
+        """
+        data = _encode(name)
+        hashed = crc32(data)
+        player, slot = self._find(data, hashed)
+        if player != EMPTY:
+            return player
+        if self._mapping is not None:
+            self._thaw()
+        player = len(self.hashes)
+        self.names += data
+        self.offsets.append(len(self.names))
+        self.hashes.append(hashed)
+        self.best.append(NO_SCORE)
+        self.table[slot] = player
+        if 2 * len(self.hashes) > len(self.table):
+            self._grow()
+        return player
+
+    def _grow(self):
+        table = array("i", [EMPTY]) * (2 * len(self.table))
+        mask = len(table) - 1
+        for player, hashed in enumerate(self.hashes):
+            slot = hashed & mask
+            while table[slot] != EMPTY:
+                slot = (slot + 1) & mask
+            table[slot] = player
+        self.table = table
+
+    def name_bytes(self, player):
+        return bytes(self.names[self.offsets[player]:self.offsets[player + 1]])
+
+    def name(self, player):
+        return self.name_bytes(player).decode("utf-8", "surrogatepass")
+
+    def get(self, name, default=None):
+        """
+        Returns the best score of a player, or default.
+        """
+        player = self.id(name)
+        if player is None or self.best[player] == NO_SCORE:
+            return default
+        return self.best[player]
+
+    def set_best(self, player, score):
+        if self._mapping is not None:
+            self._thaw()
+        self.best[player] = score
+
+    def items(self):
+        """
+        Yields (player_name, best score) for every player with a score.
+        """
+        for player, score in enumerate(self.best):
+            if score != NO_SCORE:
+                yield self.name(player), score
+
+    def nbytes(self):
+        """
+        The memory taken by the columns, in bytes.
+        """
+        return sum(len(column) * column.itemsize for column in
+                   (self.offsets, self.hashes, self.table, self.best)) + len(self.names)
+
+    def _thaw(self):
+        """
+        Copies mapped columns into arrays, so that they can change.
+        """
+        views = [self.names, self.offsets, self.hashes, self.table, self.best]
+        self.names = bytearray(self.names)
+        self.offsets = _copy("Q", self.offsets)
+        self.hashes = _copy("I", self.hashes)
+        self.table = _copy("i", self.table)
+        self.best = _copy("I", self.best)
+        if self.order is not None:
+            views.append(self.order)
+            self.order = _copy("I", self.order)
+        for view in views:
+            view.release()
+        mapping, self._mapping = self._mapping, None
+        mapping.close()
+
+    def save(self, path, order=None, source=(0, 0, 0)):
+        """
+        Writes the registry to path, atomically and durably (the new file
+        is synced to disk before it replaces the old one).
+        Args:
+            path: The registry file.
+            order: Player ids in leaderboard order (optional).
+            source: Three ints identifying the data the registry was built
+                from, kept in the file for whoever opens it (optional).
+        """
+        order = array("I", order) if order is not None else array("I")
+        header = HEADER.pack(MAGIC, len(self), len(self.table), len(self.names), len(order), *source)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            for column in (self.offsets, self.names, self.hashes, self.table, self.best, order):
+                data = bytes(column)
+                f.write(data)
+                f.write(b"\0" * (_padded(len(data)) - len(data)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open(cls, path):
+        """
+        Maps a registry file written by save().  Raises OSError if it cannot
+        be read and ValueError if it is not a registry file.
+        """
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError(f"{path} is not a player registry")
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, players, table_size, name_bytes, order_size, *source = HEADER.unpack_from(mapping)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a player registry")
+            view = memoryview(mapping)
+            position = HEADER.size
+            columns = []
+            for typecode, count in (("Q", players + 1), ("B", name_bytes), ("I", players),
+                                    ("i", table_size), ("I", players), ("I", order_size)):
+                length = count * struct.calcsize(typecode)
+                if position + length > size:
+                    raise ValueError(f"{path} is truncated")
+                columns.append(view[position:position + length].cast(typecode))
+                position += _padded(length)
+        except (ValueError, struct.error):
+            view = columns = None
+            mapping.close()
+            raise
+        registry = cls()
+        registry.offsets, registry.names, registry.hashes, registry.table, registry.best, order = columns
+        registry.order = order if order_size else None
+        registry.source = tuple(source)
+        registry._mapping = mapping
+        return registry
+
+    def close(self):
+        """
+        Unmaps the registry file, if the registry was opened from one.
+        """
+        if self._mapping is not None:
+            self._thaw()
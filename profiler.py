@@ -0,0 +1,224 @@
+"""
+Profiling of the CLI menu loop and the GUI slots.
+
+A Profiler measures two things while it runs:
+
+    per-call latency  instrument() replaces functions of a module or class
+                      (the CLI prompts and menu actions, the GUI slots) with
+                      wrappers that time every call into a telemetry
+                      Histogram, so the report has the count, mean, p50, p99
+                      and max of each.  p50 and p99 are estimated within
+                      the histogram's power-of-two buckets.  Times include
+                      the functions called in turn, and for prompts the
+                      time spent waiting for the player.
+    stacks            a background thread samples the stack of the profiled
+                      thread every interval seconds and counts each distinct
+                      stack, in wall-clock time.
+
+write() saves a summary report to PATH.txt and the stacks to PATH.folded,
+one "frame;frame;frame count" line per stack (root first), the format read
+by flamegraph.pl, speedscope and inferno:
+
+    python guess_the_number.py cli --profile run1
+    flamegraph.pl run1.folded > run1.svg
+
+Nothing is instrumented until a profiler is started, and the front ends
+only import this module for --profile, so playing without it costs nothing.
+"""
+import functools
+import inspect
+import os
+import sys
+import threading
+import types
+
+from telemetry import Histogram, clock
+
+# 200 samples a second: enough for sluggish screens, light on the game.
+SAMPLE_INTERVAL = 0.005
+
+
+def _frame_name(code):
+    # co_qualname is new in Python 3.11; 3.10 only has the bare name.
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _positional_limit(func):
+    """
+    The most positional arguments func takes, or None if it takes any number.
+    Qt passes every argument of a signal to a slot that can take them, so a
+    wrapper has to drop the ones the slot does not take.
+    """
+    try:
+        parameters = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return None
+    limit = 0
+    for parameter in parameters:
+        if parameter.kind == parameter.VAR_POSITIONAL:
+            return None
+        if parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD):
+            limit += 1
+    return limit
+
+
+class Profiler:
+    """
+    Per-call latency histograms of instrumented functions and sampled
+    stacks of one thread.
+    """
+
+    def __init__(self, path="profile", interval=SAMPLE_INTERVAL):
+        """
+        Args:
+            path: Where write() saves the report, without extension.
+            interval: The seconds between stack samples (0 turns sampling off).
+        """
+        self.path = path
+        self.interval = interval
+        self.histograms = {}
+        self.stacks = {}
+        self.samples = 0
+        self.elapsed = 0.0
+        self._originals = []
+        self._wrapper_codes = set()
+        self._thread = None
+        self._stopping = threading.Event()
+        self._target = None
+        self._started = None
+
+    def instrument(self, owner, names=None):
+        """
+        Times every call to functions of a module or class from now on.
+        Args:
+            owner: The module or class.
+            names: The names of the functions (optional, defaults to every
+                function defined in owner, apart from dunder methods).
+        """
+        if names is None:
+            names = [name for name, value in vars(owner).items()
+                     if isinstance(value, types.FunctionType) and not name.startswith("__")
+                     and (isinstance(owner, type) or value.__module__ == owner.__name__)]
+        for name in names:
+            original = vars(owner)[name]
+            self._originals.append((owner, name, original))
+            setattr(owner, name, self._timed(original))
+
+    def _timed(self, func):
+        histogram = self.histograms.setdefault(func.__qualname__, Histogram())
+        limit = _positional_limit(func)
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            if limit is not None and len(args) > limit:
+                args = args[:limit]
+            started = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.add(clock() - started)
+
+        self._wrapper_codes.add(timed.__code__)
+        return timed
+
+    def start(self):
+        """
+        Starts sampling the stack of the calling thread.
+        """
+        self._target = threading.get_ident()
+        self._started = clock()
+        if self.interval > 0:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+            self._thread.start()
+        return self
+
+    def _sample(self):
+        wrapper_codes = self._wrapper_codes
+        while not self._stopping.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            names = []
+            while frame is not None:
+                if frame.f_code not in wrapper_codes:
+                    names.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            frame = None
+            if names:
+                stack = ";".join(reversed(names))
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+                self.samples += 1
+
+    def stop(self):
+        """
+        Stops sampling and puts the instrumented functions back.
+        """
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+        if self._started is not None:
+            self.elapsed += clock() - self._started
+            self._started = None
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def summary(self):
+        """
+        Returns {function name: latency figures (see Histogram.summary()),
+        plus "total_ms"} for the functions that were called, slowest in
+        total first.
+        """
+        called = [(name, histogram) for name, histogram in self.histograms.items() if histogram.count]
+        called.sort(key=lambda entry: -entry[1].total)
+        return {name: {**histogram.summary(), "total_ms": histogram.total * 1e3} for name, histogram in called}
+
+    def hot_frames(self, top=15):
+        """
+        Returns the top (frame, samples) by samples with the frame on top of
+        the stack.
+        """
+        counts = {}
+        for stack, samples in self.stacks.items():
+            leaf = stack.rpartition(";")[2]
+            counts[leaf] = counts.get(leaf, 0) + samples
+        return sorted(counts.items(), key=lambda entry: -entry[1])[:top]
+
+    def report(self):
+        """
+        Returns the summary report as a list of lines.
+        """
+        lines = [f"Profiled {self.elapsed:.2f} s, {self.samples} stack samples "
+                 f"every {self.interval * 1e3:g} ms.",
+                 "p50 and p99 are estimated within power-of-two buckets.", "",
+                 f"{'function':<44} {'calls':>8} {'total ms':>10} {'mean µs':>10} "
+                 f"{'p50 µs':>10} {'p99 µs':>10} {'max µs':>10}"]
+        for name, figures in self.summary().items():
+            lines.append(f"{name:<44} {figures['count']:>8} {figures['total_ms']:>10.1f} "
+                         f"{figures['mean_us']:>10.1f} {figures['p50_us']:>10.1f} "
+                         f"{figures['p99_us']:>10.1f} {figures['max_us']:>10.1f}")
+        if self.samples:
+            lines += ["", f"{'on top of the stack':<64} {'samples':>8} {'share':>7}"]
+            for frame, samples in self.hot_frames():
+                lines.append(f"{frame:<64} {samples:>8} {samples / self.samples:>7.1%}")
+        return lines
+
+    def write(self, path=None):
+        """
+        Saves the report to path.txt and the folded stacks to path.folded,
+        and returns the two file names.
+        """
+        path = path or self.path
+        report_path, folded_path = f"{path}.txt", f"{path}.folded"
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.report()) + "\n")
+        with open(folded_path, "w", encoding="utf-8") as f:
+            for stack, samples in sorted(self.stacks.items()):
+                f.write(f"{stack} {samples}\n")
+        return report_path, folded_path
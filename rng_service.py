@@ -0,0 +1,220 @@
+"""
+Seedable random number generators, one per session.
+
+Every session (a CLI run, a GUI window, a server connection, a simulation
+shard) owns a SessionRng instead of sharing the random module.  A
+SessionRng is a SplitMix64 stream: its n-th output is mix64(seed + n *
+GAMMA), so it keeps no shared state, a session replays exactly from its
+seed, and spawn() hands out child sessions with independent seeds.
+
+Each game takes a 64-bit game seed from its session (one whole output
+word), and its secret is a pure function of that game seed and the range
+(secret_for_seed()).  That is what recordings store, so any game can be
+reproduced from its seed.  64 bits keep seed collisions away from even
+tournaments of millions of games (the birthday bound is about 2**32
+games), and reach every secret of ranges up to 2**64 numbers; wider ranges
+draw their secret from as many words as they need, but from one of 2**64
+streams.  Recordings made when game seeds were 32 bits still replay: seeds
+below 2**32 keep their old secret streams.
+secret() draws one game; secrets() draws a whole block of games at once,
+vectorised with numpy when it is installed (simulations and benchmarks
+draw millions).  Either way a session hands out the same game seeds in
+the same order.
+"""
+import os
+import sys
+
+MASK64 = (1 << 64) - 1
+GAMMA = 0x9E3779B97F4A7C15
+MIX1 = 0xBF58476D1CE4E5B9
+MIX2 = 0x94D049BB133111EB
+
+
+def mix64(z):
+    """
+    The SplitMix64 finaliser: a bijection of 64-bit ints that scrambles
+    every input bit into every output bit.
+    """
+    z = ((z ^ (z >> 30)) * MIX1) & MASK64
+    z = ((z ^ (z >> 27)) * MIX2) & MASK64
+    return z ^ (z >> 31)
+
+
+def _secret_word(seed, index):
+    if seed < 1 << 32:
+        # The streams of the 32-bit game seeds of older recordings.
+        return mix64(((seed * 256 + index + 1) * GAMMA) & MASK64)
+    return mix64((mix64(seed) + (index + 1) * GAMMA) & MASK64)
+
+
+def secret_for_seed(low, high, seed):
+    """
+    Returns the secret in low..high that belongs to a game seed.
+    Args:
+        low: The lowest possible secret.
+        high: The highest possible secret.
+        seed: The game seed (an int below 2**64).
+    """
+    size = high - low + 1
+    if size <= 1 << 32:
+        # Scales one 64-bit word to the range; the bias is below 2**-32.
+        return low + ((_secret_word(seed, 0) * size) >> 64)
+    # Wide ranges: draw whole words and reject values past the range.
+    bits = (size - 1).bit_length()
+    words = (bits + 63) // 64
+    value = 0
+    for attempt in range(256 // words):
+        value = 0
+        for index in range(attempt * words, (attempt + 1) * words):
+            value = (value << 64) | _secret_word(seed, index)
+        value >>= words * 64 - bits
+        if value < size:
+            return low + value
+    return low + value % size
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _mix64_array(np, z):
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(MIX1)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(MIX2)
+    return z ^ (z >> np.uint64(31))
+
+
+def secrets_for_seeds(low, high, seeds):
+    """
+    Returns the secrets belonging to a sequence of game seeds: a numpy
+    int64 array when numpy is installed and the range fits, a list
+    otherwise.
+    """
+    np = _numpy()
+    size = high - low + 1
+    if np is None or size > 1 << 32 or low < -(1 << 63) or high >= 1 << 63:
+        return [secret_for_seed(low, high, int(seed)) for seed in seeds]
+    seeds = np.asarray(seeds, dtype=np.uint64)
+    words = _mix64_array(np, _mix64_array(np, seeds) + np.uint64(GAMMA))
+    old = seeds < np.uint64(1 << 32)
+    if old.any():
+        words[old] = _mix64_array(np, (seeds[old] * np.uint64(256) + np.uint64(1)) * np.uint64(GAMMA))
+    # (word * size) >> 64 in two halves, so that nothing overflows 64 bits.
+    size = np.uint64(size)
+    scaled = ((words >> np.uint64(32)) * size + (((words & np.uint64(0xFFFFFFFF)) * size) >> np.uint64(32))) \
+        >> np.uint64(32)
+    return scaled.astype(np.int64) + low
+
+
+class SessionRng:
+    """
+    A session's own random number generator.  It is not locked: give
+    every thread or process its own, with spawn().
+    """
+
+    def __init__(self, seed=None):
+        """
+        Args:
+            seed: The session seed (optional, a fresh one from os.urandom
+                otherwise).
+        """
+        if seed is None:
+            seed = int.from_bytes(os.urandom(8), "little")
+        self.seed = seed & MASK64
+        self.counter = 0
+
+    def next_word(self):
+        """
+        Returns the next 64-bit output of the stream.
+        """
+        self.counter += 1
+        return mix64((self.seed + self.counter * GAMMA) & MASK64)
+
+    def game_seeds(self, count):
+        """
+        Returns the next count game seeds: a numpy uint64 array when numpy
+        is installed, a list otherwise.
+        """
+        np = _numpy()
+        start = self.counter + 1
+        self.counter += count
+        if np is None:
+            return [mix64((self.seed + n * GAMMA) & MASK64) for n in range(start, start + count)]
+        counters = np.arange(start, start + count, dtype=np.uint64)
+        return _mix64_array(np, np.uint64(self.seed) + counters * np.uint64(GAMMA))
+
+    def game_seed(self):
+        return self.next_word()
+
+    def secrets(self, game_range, count):
+        """
+        Draws count games at once and returns (game seeds, secrets).
+        """
+        seeds = self.game_seeds(count)
+        return seeds, secrets_for_seeds(game_range.low, game_range.high, seeds)
+
+    def secret(self, game_range):
+        """
+        Draws one game and returns (game seed, secret).
+        """
+        seed = self.next_word()
+        return seed, secret_for_seed(game_range.low, game_range.high, seed)
+
+    def randint(self, low, high):
+        """
+        Returns a number in low..high, like random.randint().
+        """
+        size = high - low + 1
+        if size <= 0:
+            raise ValueError("empty range for randint()")
+        if size <= 1 << 32:
+            return low + ((self.next_word() * size) >> 64)
+        bits = (size - 1).bit_length()
+        while True:
+            value = 0
+            for _ in range((bits + 63) // 64):
+                value = (value << 64) | self.next_word()
+            value >>= -bits % 64
+            if value < size:
+                return low + value
+
+    def spawn(self):
+        """
+        Returns a child SessionRng with a seed drawn from this one.
+        """
+        return SessionRng(self.next_word())
+
+
+_default_session = None
+
+
+def default_session():
+    """
+    Returns the session of this process, seeded from GUESS_SEED if it is
+    set, creating it on first use.  A GUESS_SEED that is not a whole
+    number is reported on stderr and the session is seeded at random.
+    """
+    global _default_session
+    if _default_session is None:
+        setting = os.environ.get("GUESS_SEED")
+        seed = None
+        if setting:
+            try:
+                seed = int(setting)
+            except ValueError:
+                print(f"GUESS_SEED ignored, games are not reproducible: {setting!r} is not a whole number",
+                      file=sys.stderr)
+        _default_session = SessionRng(seed)
+    return _default_session
+
+
+def configure(seed=None):
+    """
+    Replaces the session of this process with a new one and returns it.
+    """
+    global _default_session
+    _default_session = SessionRng(seed)
+    return _default_session
@@ -0,0 +1,404 @@
+"""
+SQLite storage for high scores and match history.
+
+SqliteScoreStore answers the same calls as score_store.ScoreStore, so it
+can stand behind WriteBehindStore and default_store(), and it adds a
+history of every score and every match.  The tables:
+
+    players        id, name (unique), best score (NULL until the first
+                   score); indexed on (best, name), which is the order of
+                   the leaderboard
+    score_counts   how many players have each best score, kept up to date
+                   by triggers, so that ranks and the player count add up
+                   a few rows instead of counting players
+    scores         every recorded score, indexed by player
+    matches        mode, time, attempts budget, guesses and winner
+    match_players  which players took part in which match, indexed by
+                   player
+    meta           key/value pairs, e.g. whether the JSON files were
+                   migrated
+
+The database runs in WAL mode, so readers never block the writer and other
+processes can read and write it at the same time (writers wait on each
+other for up to busy_timeout seconds).  One connection is kept open per
+store and shared by its threads; its statement cache keeps the SQL below
+prepared.  record_many() and record_matches() write a whole batch in one
+transaction: the scores go through a temporary table and are merged into
+players with a single upsert.
+
+Storage errors are raised as OSError, like those of the JSON files, so
+callers handle both backends the same way.  Migrate high_scores.json (and
+its log) into a database with:
+
+    python score_db.py migrate --json high_scores.json --db high_scores.db
+"""
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from score_store import HIGH_SCORES_FILE, ScoreStore, valid_score, write_json_atomic
+
+HIGH_SCORES_DB = "high_scores.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    best INTEGER
+);
+CREATE INDEX IF NOT EXISTS players_by_best ON players (best, name) WHERE best IS NOT NULL;
+CREATE TABLE IF NOT EXISTS score_counts (
+    best INTEGER PRIMARY KEY,
+    players INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS count_new_player AFTER INSERT ON players WHEN NEW.best IS NOT NULL
+BEGIN
+    INSERT INTO score_counts (best, players) VALUES (NEW.best, 1)
+    ON CONFLICT (best) DO UPDATE SET players = players + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS count_new_best AFTER UPDATE OF best ON players WHEN NEW.best IS NOT NULL
+BEGIN
+    UPDATE score_counts SET players = players - 1 WHERE best = OLD.best;
+    INSERT INTO score_counts (best, players) VALUES (NEW.best, 1)
+    ON CONFLICT (best) DO UPDATE SET players = players + 1;
+END;
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    player_id INTEGER NOT NULL REFERENCES players (id),
+    score INTEGER NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_player ON scores (player_id);
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    mode TEXT NOT NULL,
+    played_at REAL NOT NULL,
+    max_attempts INTEGER NOT NULL,
+    guesses INTEGER NOT NULL,
+    winner_id INTEGER REFERENCES players (id)
+);
+CREATE TABLE IF NOT EXISTS match_players (
+    player_id INTEGER NOT NULL REFERENCES players (id),
+    match_id INTEGER NOT NULL REFERENCES matches (id),
+    PRIMARY KEY (player_id, match_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_SELECT_PLAYER = "SELECT id, best FROM players WHERE name = ?"
+_SELECT_BEST = "SELECT best FROM players WHERE name = ?"
+_INSERT_PLAYER = "INSERT INTO players (name, best) VALUES (?, ?)"
+_UPDATE_BEST = "UPDATE players SET best = ? WHERE id = ?"
+_INSERT_SCORE = "INSERT INTO scores (player_id, score, recorded_at) VALUES (?, ?, ?)"
+_COUNT_PLAYERS = "SELECT COALESCE(SUM(players), 0) FROM score_counts"
+_COUNT_BETTER = "SELECT COALESCE(SUM(players), 0) FROM score_counts WHERE best < ?"
+_PAGE = "SELECT name, best FROM players WHERE best IS NOT NULL ORDER BY best, name LIMIT ? OFFSET ?"
+_ITEMS = "SELECT name, best FROM players WHERE best IS NOT NULL"
+_LAST_SCORE = "SELECT COALESCE(MAX(id), 0) FROM scores"
+_CHANGED_SINCE = """
+SELECT name, best FROM players
+WHERE best IS NOT NULL AND id IN (SELECT player_id FROM scores WHERE id > ?)
+"""
+_STAGE_SCORE = "INSERT INTO staged_scores (name, score) VALUES (?, ?)"
+# "WHERE true" tells the parser that ON CONFLICT belongs to the upsert.
+_MERGE_STAGED = """
+INSERT INTO players (name, best)
+SELECT name, MIN(score) FROM staged_scores WHERE true GROUP BY name
+ON CONFLICT (name) DO UPDATE SET best = excluded.best
+WHERE players.best IS NULL OR excluded.best < players.best
+"""
+_HISTORY_STAGED = """
+INSERT INTO scores (player_id, score, recorded_at)
+SELECT players.id, staged_scores.score, ? FROM staged_scores JOIN players USING (name)
+"""
+_ENSURE_PLAYER = "INSERT INTO players (name) VALUES (?) ON CONFLICT (name) DO NOTHING"
+_PLAYER_ID = "SELECT id FROM players WHERE name = ?"
+_INSERT_MATCH = ("INSERT INTO matches (mode, played_at, max_attempts, guesses, winner_id) "
+                 "VALUES (?, ?, ?, ?, ?)")
+_INSERT_MATCH_PLAYER = "INSERT OR IGNORE INTO match_players (player_id, match_id) VALUES (?, ?)"
+_MATCH_HISTORY = """
+SELECT matches.mode, matches.played_at, matches.guesses, winners.name
+FROM match_players
+JOIN matches ON matches.id = match_players.match_id
+LEFT JOIN players AS winners ON winners.id = matches.winner_id
+WHERE match_players.player_id = (SELECT id FROM players WHERE name = ?)
+ORDER BY matches.id DESC LIMIT ?
+"""
+_GET_META = "SELECT value FROM meta WHERE key = ?"
+_SET_META = "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)"
+
+
+class SqliteScoreStore:
+    """
+    Best score per player, score history and match history in a SQLite
+    database.  Lower scores (fewer guesses) are better.
+    """
+    keeps_matches = True
+
+    def __init__(self, path=HIGH_SCORES_DB, busy_timeout=5.0, synchronous="NORMAL"):
+        """
+        Args:
+            path: The database file (created if missing).
+            busy_timeout: Seconds to wait for another process's write.
+            synchronous: The SQLite synchronous setting; NORMAL is safe in
+                WAL mode (a power cut may lose the last commits, never
+                the database).
+        """
+        self.path = path
+        self.load_error = None
+        self._lock = threading.Lock()
+        try:
+            # The connection is shared by the threads of the store, under _lock.
+            self._db = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None,
+                                       check_same_thread=False, cached_statements=64)
+            self._db.execute("PRAGMA journal_mode = WAL")
+            self._db.execute(f"PRAGMA synchronous = {synchronous}")
+            self._db.executescript(SCHEMA)
+        except sqlite3.Error as e:
+            raise OSError(f"cannot open {path}: {e}") from e
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            if self._db is None:
+                raise OSError(f"{self.path} is closed")
+            try:
+                yield self._db
+            except sqlite3.Error as e:
+                raise OSError(f"{self.path}: {e}") from e
+
+    @contextmanager
+    def _transaction(self):
+        with self._locked() as db:
+            # IMMEDIATE takes the write lock up front, so a transaction
+            # never has to be retried halfway through.
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __len__(self):
+        with self._locked() as db:
+            return db.execute(_COUNT_PLAYERS).fetchone()[0]
+
+    def __contains__(self, player_name):
+        return self.get(player_name) is not None
+
+    def refresh(self):
+        """
+        Does nothing: every read goes to the database.
+        """
+
+    def get(self, player_name, default=None):
+        with self._locked() as db:
+            row = db.execute(_SELECT_BEST, (player_name,)).fetchone()
+        return default if row is None or row[0] is None else row[0]
+
+    def items(self):
+        with self._locked() as db:
+            return db.execute(_ITEMS).fetchall()
+
+    def changes(self, since=None):
+        """
+        Returns (cursor, the (player_name, best score) pairs of the players
+        scored since the cursor since), like ScoreStore.changes().  The
+        cursor is the last row of the score history.
+        """
+        key = os.path.abspath(self.path)
+        with self._locked() as db:
+            last = db.execute(_LAST_SCORE).fetchone()[0]
+            if since is None or since[0] != key:
+                return (key, last), db.execute(_ITEMS).fetchall()
+            return (key, last), db.execute(_CHANGED_SINCE, (since[1],)).fetchall()
+
+    def record(self, player_name, score):
+        """
+        Records a score for a player.
+
+        Returns:
+            "new" for a first score, "improved" for a new best, None otherwise.
+        """
+        with self._transaction() as db:
+            row = db.execute(_SELECT_PLAYER, (player_name,)).fetchone()
+            if row is None:
+                player_id = db.execute(_INSERT_PLAYER, (player_name, score)).lastrowid
+                status = "new"
+            else:
+                player_id, best = row
+                status = None
+                if best is None or score < best:
+                    db.execute(_UPDATE_BEST, (score, player_id))
+                    status = "new" if best is None else "improved"
+            db.execute(_INSERT_SCORE, (player_id, score, time.time()))
+        return status
+
+    def record_many(self, scores):
+        """
+        Records many (player_name, score) pairs in one transaction.
+        Returns the number of players whose best score changed.
+        """
+        with self._transaction() as db:
+            return self._merge(db, scores)
+
+    def _merge(self, db, scores):
+        db.execute("CREATE TEMP TABLE IF NOT EXISTS staged_scores (name TEXT, score INTEGER)")
+        db.execute("DELETE FROM staged_scores")
+        db.executemany(_STAGE_SCORE, scores)
+        changed = db.execute(_MERGE_STAGED).rowcount
+        db.execute(_HISTORY_STAGED, (time.time(),))
+        db.execute("DELETE FROM staged_scores")
+        return changed
+
+    def record_match(self, mode, players, winner=None, guesses=0, max_attempts=0):
+        """
+        Records a finished match.
+        Args:
+            mode: The game mode, e.g. "single" or "two_player".
+            players: The names of the players.
+            winner: The name of the winner (None if nobody won).
+            guesses: The guesses made in the match.
+            max_attempts: The attempts budget (0 means unlimited).
+        """
+        self.record_matches([(mode, players, winner, guesses, max_attempts)])
+
+    def record_matches(self, matches):
+        """
+        Records many matches, each a tuple of record_match() arguments, in
+        one transaction.
+        """
+        played_at = time.time()
+        with self._transaction() as db:
+            for mode, players, winner, guesses, max_attempts in matches:
+                player_ids = {}
+                for name in set(players) | ({winner} if winner else set()):
+                    db.execute(_ENSURE_PLAYER, (name,))
+                    player_ids[name] = db.execute(_PLAYER_ID, (name,)).fetchone()[0]
+                match_id = db.execute(_INSERT_MATCH, (
+                    mode, played_at, max_attempts, guesses, player_ids.get(winner))).lastrowid
+                db.executemany(_INSERT_MATCH_PLAYER,
+                               ((player_id, match_id) for player_id in player_ids.values()))
+
+    def match_history(self, player_name, limit=10):
+        """
+        Returns the player's last limit matches, newest first, as (mode,
+        time played, guesses, winner or None) tuples.
+        """
+        with self._locked() as db:
+            return db.execute(_MATCH_HISTORY, (player_name, limit)).fetchall()
+
+    def compact(self, only_if_stale=False):
+        """
+        Copies the write-ahead log back into the database file.  A checkpoint
+        only copies the pages written since the last one, so it is always
+        worth doing (only_if_stale is taken for ScoreStore compatibility).
+        """
+        with self._locked() as db:
+            db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def top(self, k=10):
+        """
+        Returns the k best (player_name, score) pairs.
+        """
+        return self.page(0, k)
+
+    def page(self, offset, limit):
+        """
+        Returns up to limit (player_name, score) pairs starting at offset.
+        """
+        with self._locked() as db:
+            return db.execute(_PAGE, (limit, offset)).fetchall()
+
+    def rank(self, player_name):
+        """
+        Returns the 1-based leaderboard rank of a player, or None if the
+        player has no score yet.  Players with equal scores share a rank.
+        """
+        with self._locked() as db:
+            row = db.execute(_SELECT_BEST, (player_name,)).fetchone()
+            if row is None or row[0] is None:
+                return None
+            return db.execute(_COUNT_BETTER, (row[0],)).fetchone()[0] + 1
+
+    def import_json(self, path):
+        """
+        Merges scores from a file in the high_scores.json format, skipping
+        entries that are not a name and a score (as ScoreStore does).
+        Returns the number of players whose best score changed.
+        """
+        import json
+        with open(path, "r") as f:
+            scores = json.load(f)
+        return self.record_many((name, score) for name, score in scores.items()
+                                if isinstance(name, str) and valid_score(score))
+
+    def export_json(self, path):
+        """
+        Writes all best scores to path in the high_scores.json format.
+        """
+        write_json_atomic(path, dict(self.items()))
+
+    def migrate_json(self, path=HIGH_SCORES_FILE):
+        """
+        Imports the scores of a JSON score store (its snapshot and log)
+        once: later calls, from any process, do nothing.  Returns the
+        number of players imported.
+        """
+        key = f"migrated:{os.path.abspath(path)}"
+        with self._locked() as db:
+            if db.execute(_GET_META, (key,)).fetchone() is not None:
+                return 0
+        if not (os.path.exists(path) or os.path.exists(path + ".log")):
+            return 0
+        source = ScoreStore(path, fsync=False)
+        try:
+            if source.load_error is not None:
+                raise OSError(f"cannot migrate {path}: {source.load_error}")
+            scores = list(source.items())
+        finally:
+            source.close()
+        with self._transaction() as db:
+            # Checked again under the write lock, in case another process won the race.
+            if db.execute(_GET_META, (key,)).fetchone() is not None:
+                return 0
+            db.execute(_SET_META, (key, str(time.time())))
+            self._merge(db, scores)
+        return len(scores)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the SQLite high score database.")
+    parser.add_argument("command", choices=["migrate", "top"])
+    parser.add_argument("--db", default=HIGH_SCORES_DB)
+    parser.add_argument("--json", default=HIGH_SCORES_FILE, help="The JSON store to migrate")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+    store = SqliteScoreStore(args.db)
+    try:
+        if args.command == "migrate":
+            started = time.perf_counter()
+            count = store.migrate_json(args.json)
+            print(f"{count} players migrated from {args.json} in {time.perf_counter() - started:.2f}s")
+        else:
+            for position, (player, score) in enumerate(store.top(args.limit), start=1):
+                print(f"{position}. {player}: {score} guesses")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,678 @@
+"""
+Crash-safe storage for high scores.
+
+Scores live in two files next to each other:
+
+    high_scores.json      the compacted snapshot, in the original
+                          {"player": best_score} format
+    high_scores.json.log  an append-only log of ["player", score] lines
+                          written since the last snapshot
+
+Every save appends one line to the log under a cross-process lock, so it
+costs O(1) instead of re-reading and rewriting every player.  Once the log
+grows past compact_every lines it is folded into a new snapshot, which is
+written to a temporary file and swapped in with os.replace().  The best
+score of every player is kept in memory and other processes' appends are
+picked up incrementally before each write.
+
+The index is a PlayerRegistry (names interned to ids, best scores in an
+array column) with a CompactLeaderboard kept in step with it, so top-K,
+rank and paging queries never need to sort or even look at the whole
+score table, and a player costs a few dozen bytes of memory.  Every
+compaction also saves the registry, with the leaderboard order, to
+high_scores.json.players; a later load maps that file instead of parsing
+the JSON snapshot, as long as the snapshot has not changed since.
+
+score_db.SqliteScoreStore is the other backend: a SQLite database that
+also keeps every score and match.  default_store() picks the backend from
+GUESS_SCORES: unset or "json" (high_scores.json), "sqlite"
+(high_scores.db, migrated from high_scores.json on first use) or a path
+to a .db file.
+"""
+import atexit
+import itertools
+import json
+import os
+import stat
+import tempfile
+import threading
+from array import array
+from contextlib import contextmanager
+
+from leaderboard import CompactLeaderboard
+from player_registry import PlayerRegistry, NO_SCORE
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+HIGH_SCORES_FILE = "high_scores.json"
+# Closing a store folds its log into the snapshot only if the log holds at
+# least one line per this many players.
+CLOSE_COMPACT_RATIO = 100
+
+# Every index a ScoreStore builds gets a new generation, so that a changes()
+# cursor of one index is never taken for one of another.
+_generations = itertools.count(1)
+
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def valid_score(score):
+    """
+    Whether a score read from a file can be kept: a guess count that fits
+    the registry's unsigned 32-bit column.
+    """
+    return type(score) is int and 0 <= score < NO_SCORE
+
+
+def _file_mode(path):
+    """
+    The permission bits for a new version of path: those of the existing
+    file, or what open() would give a new one under the current umask.
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def write_json_atomic(path, data):
+    """
+    Writes data as JSON to path so that readers see either the old or the
+    new file, never a partial one.  data may also be an iterable of
+    (name, score) pairs, written as a JSON object one pair at a time.
+    The file keeps its permissions (mkstemp() would make it private).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        os.chmod(tmp_path, _file_mode(path))
+        with os.fdopen(fd, "w") as f:
+            if isinstance(data, dict):
+                json.dump(data, f)
+            else:
+                f.write("{")
+                separator = ""
+                for name, score in data:
+                    f.write(f"{separator}{json.dumps(name)}: {json.dumps(score)}")
+                    separator = ", "
+                f.write("}")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ScoreStore:
+    """
+    Best score per player, backed by a snapshot file and an append-only log.
+    Lower scores (fewer guesses) are better.
+    """
+    keeps_matches = False
+
+    def __init__(self, path=HIGH_SCORES_FILE, compact_every=1000, fsync=True):
+        """
+        Args:
+            path: The snapshot file; the log and lock files are derived from it.
+            compact_every: Number of log lines after which the log is compacted.
+            fsync: Whether to fsync every append (turn off for throwaway runs).
+        """
+        self.path = path
+        self.log_path = path + ".log"
+        self.lock_path = path + ".lock"
+        self.registry_path = path + ".players"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.players = PlayerRegistry()
+        self.leaderboard = CompactLeaderboard(self.players)
+        self.load_error = None
+        self._generation = next(_generations)
+        self._changed = array("I")
+        self._log_offset = 0
+        self._log_lines = 0
+        self._snapshot_id = None
+        self._thread_lock = threading.Lock()
+        self._lock_fd = None
+        with self._locked():
+            self._reload()
+
+    def __len__(self):
+        return len(self.players)
+
+    def __contains__(self, player_name):
+        return self.players.get(player_name) is not None
+
+    def get(self, player_name, default=None):
+        return self.players.get(player_name, default)
+
+    def items(self):
+        return self.players.items()
+
+    def refresh(self):
+        """
+        Picks up the scores other processes have saved since the last read,
+        so that get() is up to date.
+        """
+        with self._locked():
+            self._catch_up()
+
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock:
+            if self._lock_fd is None:
+                self._lock_fd = open(self.lock_path, "a+b")
+            _lock_file(self._lock_fd)
+            try:
+                yield
+            finally:
+                _unlock_file(self._lock_fd)
+
+    def close(self):
+        """
+        Releases the lock file handle.
+        """
+        with self._thread_lock:
+            if self._lock_fd is not None:
+                self._lock_fd.close()
+                self._lock_fd = None
+            self.players.close()
+
+    def _stat_snapshot(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _apply(self, player_name, score):
+        """
+        Updates the in-memory index.  Returns "new", "improved" or None.
+        """
+        players = self.players
+        player = players.intern(player_name)
+        current = players.best[player]
+        if score >= current:
+            return None
+        players.set_best(player, score)
+        self._changed.append(player)
+        if current == NO_SCORE:
+            self.leaderboard.update(player, None, score)
+            return "new"
+        self.leaderboard.update(player, current, score)
+        return "improved"
+
+    def _reload(self):
+        """
+        Rebuilds the index from the snapshot and the whole log.
+        """
+        self.players.close()
+        self.players = PlayerRegistry()
+        self.load_error = None
+        self._generation = next(_generations)
+        self._changed = array("I")
+        self._snapshot_id = self._stat_snapshot()
+        registry = self._open_registry()
+        if registry is not None:
+            self.players = registry
+        else:
+            try:
+                with open(self.path, "r") as f:
+                    snapshot = json.load(f)
+                scores = [(name, score) for name, score in snapshot.items() if valid_score(score)]
+                self.players = PlayerRegistry.from_scores(scores)
+                if len(scores) < len(snapshot):
+                    self.load_error = ValueError(f"{len(snapshot) - len(scores)} invalid scores skipped")
+            except FileNotFoundError:
+                pass
+            except (json.JSONDecodeError, AttributeError) as e:
+                self.load_error = e
+        self.leaderboard = CompactLeaderboard(self.players, self.players.order)
+        self.players.order = None
+        self._log_offset = 0
+        self._log_lines = 0
+        self._catch_up()
+
+    def _open_registry(self):
+        """
+        Maps the registry saved with the current snapshot, or returns None
+        if there is none or it belongs to another snapshot.
+        """
+        if self._snapshot_id is None:
+            return None
+        try:
+            registry = PlayerRegistry.open(self.registry_path)
+        except (OSError, ValueError):
+            return None
+        if registry.source != self._snapshot_id:
+            registry.close()
+            return None
+        return registry
+
+    def _catch_up(self):
+        """
+        Applies log lines appended (by any process) since the last read.
+        Must be called with the lock held.
+        """
+        if self._stat_snapshot() != self._snapshot_id:
+            self._reload()
+            return
+        try:
+            with open(self.log_path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                if size < self._log_offset:
+                    # The log was truncated by a compaction elsewhere.
+                    self._reload()
+                    return
+                f.seek(self._log_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                player_name, score = json.loads(line)
+            except (ValueError, TypeError):
+                continue
+            if not isinstance(player_name, str) or not valid_score(score):
+                continue
+            self._apply(player_name, score)
+            self._log_lines += 1
+        self._log_offset += end
+
+    def _append(self, entries):
+        """
+        Appends entries to the log.  A torn line left by a crashed writer is
+        cut off first so that it cannot merge with the new entries.
+        """
+        payload = "".join(json.dumps(entry) + "\n" for entry in entries).encode()
+        with open(self.log_path, "ab") as f:
+            if f.tell() > self._log_offset:
+                f.truncate(self._log_offset)
+            f.write(payload)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self._log_offset += len(payload)
+        self._log_lines += len(entries)
+        if self._log_lines >= self.compact_every:
+            self._compact()
+
+    def _compact(self):
+        self.players.close()  # the registry file is about to be replaced
+        write_json_atomic(self.path, self.players.items())
+        self._snapshot_id = self._stat_snapshot()
+        self.players.save(self.registry_path, self.leaderboard.order(), self._snapshot_id)
+        with open(self.log_path, "wb"):
+            pass
+        self._log_offset = 0
+        self._log_lines = 0
+
+    def record(self, player_name, score):
+        """
+        Records a score for a player.
+
+        Returns:
+            "new" for a first score, "improved" for a new best, None otherwise.
+        """
+        with self._locked():
+            self._catch_up()
+            status = self._apply(player_name, score)
+            if status is not None:
+                self._append([[player_name, score]])
+            return status
+
+    def record_many(self, scores):
+        """
+        Records many (player_name, score) pairs with a single log append.
+        Returns the number of players whose best score changed.
+        """
+        with self._locked():
+            self._catch_up()
+            changed = [[name, score] for name, score in scores
+                       if self._apply(name, score) is not None]
+            if changed:
+                self._append(changed)
+            return len(changed)
+
+    def record_matches(self, matches):
+        """
+        The JSON files keep no match history, so matches are dropped.
+        """
+
+    def changes(self, since=None):
+        """
+        Returns (cursor, the (player_name, best score) pairs changed since
+        the cursor since).  Without a cursor, or with one this index cannot
+        follow (it was rebuilt, or the change list was trimmed), every pair
+        is returned.  Pass the cursor back in to get the next changes.
+        """
+        with self._locked():
+            self._catch_up()
+            changed = self._changed
+            if len(changed) > 2 * len(self.players) + 1024:
+                # Trimmed once it would cost more than a full pass.
+                self._generation = next(_generations)
+                changed = self._changed = array("I")
+            cursor = (self._generation, len(changed))
+            if since is None or since[0] != self._generation:
+                return cursor, list(self.players.items())
+            players = self.players
+            return cursor, [(players.name(player), players.best[player])
+                            for player in dict.fromkeys(changed[since[1]:])]
+
+    def compact(self, only_if_stale=False):
+        """
+        Folds the log into a fresh snapshot.
+        Args:
+            only_if_stale: Leave the files alone unless the log holds at
+                least one line per CLOSE_COMPACT_RATIO players (and at least
+                one line), so that the O(players) rewrite is paid for by
+                the appends it folds in.
+        """
+        with self._locked():
+            self._catch_up()
+            if only_if_stale and (not self._log_lines
+                                  or self._log_lines * CLOSE_COMPACT_RATIO < len(self.players)):
+                return
+            self._compact()
+
+    def top(self, k=10):
+        """
+        Returns the k best (player_name, score) pairs.
+        """
+        with self._locked():
+            self._catch_up()
+            return self.leaderboard.top(k)
+
+    def page(self, offset, limit):
+        """
+        Returns up to limit (player_name, score) pairs starting at offset.
+        """
+        with self._locked():
+            self._catch_up()
+            return self.leaderboard.page(offset, limit)
+
+    def rank(self, player_name):
+        """
+        Returns the 1-based leaderboard rank of a player, or None if the
+        player has no score yet.
+        """
+        with self._locked():
+            self._catch_up()
+            score = self.players.get(player_name)
+            if score is None:
+                return None
+            return self.leaderboard.rank(score)
+
+    def import_json(self, path):
+        """
+        Merges scores from a file in the high_scores.json format.
+        Returns the number of players whose best score changed.
+        """
+        with open(path, "r") as f:
+            scores = json.load(f)
+        return self.record_many((name, score) for name, score in scores.items() if valid_score(score))
+
+    def export_json(self, path):
+        """
+        Writes all best scores to path in the high_scores.json format.
+        """
+        with self._locked():
+            self._catch_up()
+            write_json_atomic(path, self.players.items())
+
+
+class WriteBehindStore:
+    """
+    Buffers score updates in memory in front of a ScoreStore.
+
+    Updates for the same player are merged while they wait, and the buffer
+    is written with one record_many() call once max_pending players are
+    waiting or the oldest update is max_delay seconds old.  Reads flush the
+    buffer first so they never see stale scores.  close() flushes and then
+    compacts if the log is long enough to be worth it (see
+    ScoreStore.compact()), so high_scores.json itself is brought up to date
+    with a single atomic replace, and a run that wrote nothing rewrites
+    nothing.
+    """
+
+    def __init__(self, store, max_pending=100, max_delay=2.0):
+        """
+        Args:
+            store: The ScoreStore to write to.
+            max_pending: Flush once this many players have pending scores.
+            max_delay: Flush once the oldest pending score is this old (seconds).
+        """
+        self.store = store
+        self.max_pending = max_pending
+        self.max_delay = max_delay
+        self.pending = {}
+        self.pending_matches = []
+        self.requested = 0
+        self.written = 0
+        self.flushes = 0
+        self._lock = threading.RLock()
+        self._timer = None
+        self._closed = False
+
+    @property
+    def load_error(self):
+        return self.store.load_error
+
+    @property
+    def coalesced(self):
+        """
+        The number of score updates that did not need a write of their own.
+        """
+        return self.requested - self.written - len(self.pending)
+
+    def stats(self):
+        return {
+            "requested": self.requested,
+            "written": self.written,
+            "coalesced": self.coalesced,
+            "flushes": self.flushes,
+            "pending": len(self.pending),
+        }
+
+    def record(self, player_name, score):
+        """
+        Records a score for a player.
+
+        Returns:
+            "new" for a first score, "improved" for a new best, None otherwise.
+        """
+        with self._lock:
+            current = self.pending.get(player_name)
+            if current is None:
+                # Another process may have saved a better score meanwhile.
+                self.store.refresh()
+                current = self.store.get(player_name)
+            if current is not None and score >= current:
+                return None
+            self._add(player_name, score)
+            return "new" if current is None else "improved"
+
+    def record_many(self, scores):
+        """
+        Buffers many (player_name, score) pairs.
+        """
+        with self._lock:
+            for player_name, score in scores:
+                current = self.pending.get(player_name)
+                if current is None or score < current:
+                    self._add(player_name, score)
+
+    def changes(self, since=None):
+        self.flush()
+        return self.store.changes(since)
+
+    def record_match(self, mode, players, winner=None, guesses=0, max_attempts=0):
+        """
+        Buffers a finished match, if the store keeps match history.
+        """
+        if not self.store.keeps_matches:
+            return
+        with self._lock:
+            self.pending_matches.append((mode, list(players), winner, guesses, max_attempts))
+            self._schedule()
+
+    def _add(self, player_name, score):
+        self.requested += 1
+        self.pending[player_name] = score
+        self._schedule()
+
+    def _schedule(self):
+        if len(self.pending) + len(self.pending_matches) >= self.max_pending:
+            self.flush()
+        elif self._timer is None and not self._closed:
+            self._timer = threading.Timer(self.max_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """
+        Writes all pending scores with a single log append (or
+        transaction), and then the pending matches.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self.pending_matches:
+                matches, self.pending_matches = self.pending_matches, []
+                self.store.record_matches(matches)
+            if not self.pending:
+                return
+            pending, self.pending = self.pending, {}
+            self.store.record_many(pending.items())
+            self.written += len(pending)
+            self.flushes += 1
+
+    def close(self):
+        """
+        Flushes, compacts the log into the snapshot if it is stale and
+        closes the store.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self.flush()
+            self.store.compact(only_if_stale=True)
+            self.store.close()
+
+    def __len__(self):
+        self.flush()
+        return len(self.store)
+
+    def __contains__(self, player_name):
+        return player_name in self.pending or player_name in self.store
+
+    def get(self, player_name, default=None):
+        score = self.pending.get(player_name)
+        return score if score is not None else self.store.get(player_name, default)
+
+    def items(self):
+        self.flush()
+        return self.store.items()
+
+    def top(self, k=10):
+        self.flush()
+        return self.store.top(k)
+
+    def page(self, offset, limit):
+        self.flush()
+        return self.store.page(offset, limit)
+
+    def rank(self, player_name):
+        self.flush()
+        return self.store.rank(player_name)
+
+    def compact(self):
+        self.flush()
+        self.store.compact()
+
+    def import_json(self, path):
+        self.flush()
+        return self.store.import_json(path)
+
+    def export_json(self, path):
+        self.flush()
+        self.store.export_json(path)
+
+
+_default_store = None
+
+
+def open_store(backend=""):
+    """
+    Opens a score store: "" or "json" for high_scores.json, "sqlite" for
+    high_scores.db (migrating high_scores.json into it the first time), or
+    the path of a SQLite database.
+    """
+    if backend in ("", "json"):
+        return ScoreStore(HIGH_SCORES_FILE)
+    from score_db import SqliteScoreStore, HIGH_SCORES_DB  # sqlite3 is only imported when used
+    store = SqliteScoreStore(HIGH_SCORES_DB if backend == "sqlite" else backend)
+    store.migrate_json(HIGH_SCORES_FILE)
+    return store
+
+
+def default_store():
+    """
+    Returns the write-behind store of the backend chosen by GUESS_SCORES,
+    opening it on first use.  Pending scores are written when the program
+    exits.
+    """
+    global _default_store
+    if _default_store is None:
+        configure(open_store(os.environ.get("GUESS_SCORES", "").strip()))
+    return _default_store
+
+
+def configure(store):
+    """
+    Puts store (a ScoreStore or SqliteScoreStore) behind the shared
+    write-behind store, closing the previous one, and returns it.
+    """
+    global _default_store
+    if _default_store is not None:
+        atexit.unregister(_default_store.close)
+        _default_store.close()
+    _default_store = WriteBehindStore(store)
+    atexit.register(_default_store.close)
+    return _default_store
+
+
+def flush_default_store():
+    """
+    Writes the pending scores of the default store, if it was ever opened.
+    """
+    if _default_store is not None:
+        _default_store.flush()
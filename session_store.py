@@ -0,0 +1,398 @@
+"""
+Snapshots of unfinished games, so that they can be resumed.
+
+A SessionSnapshot holds everything needed to rebuild a game in progress:
+the mode, the game seed (the secret follows from it, see rng_service),
+the range, the attempts budget of each player, whether hints are on, the
+players and the guesses made so far.  Stepping the guesses through a fresh
+GameState or MatchState restores the attempts left and whose turn it is,
+and replaying them through a HintEngine restores the hints given.
+
+A SessionJournal keeps the snapshot of the current game in a small file:
+a full snapshot when the game starts, then one delta (a single varint)
+appended per guess.  Every write is fsynced, so a crash, even of the
+machine, loses nothing.  After compact_every deltas
+the file is rewritten as one snapshot.  Entries are length-prefixed like
+game recordings, and a torn last entry is ignored.  Reading a journal
+back takes a few tens of microseconds.  The journal is removed when the
+game ends.
+
+A SessionSpool pages many snapshots out to one file, for the game server
+to evict idle sessions; only the offset of each is kept in memory.
+
+The shared journal is configured from GUESS_SESSION (a file path, "off"
+to disable it, SESSION_FILE by default) or with configure().
+"""
+import os
+import tempfile
+
+from game_engine import GameState, MatchState
+from game_record import MODES, put_varint, read_varint, zigzag, unzigzag
+from hints import HINT_EVERY
+from rng_service import secret_for_seed
+
+MAGIC = b"GTNS\x01"
+SESSION_FILE = "game_session.bin"
+
+# Entry kinds.
+SNAPSHOT = 1
+GUESS = 2
+
+HINTS = 1
+
+
+class SessionSnapshot:
+    """
+    The state of an unfinished game.
+    """
+    __slots__ = ("mode", "seed", "low", "high", "max_attempts", "hints_enabled", "players", "guesses")
+
+    def __init__(self, mode, seed, low, high, max_attempts=0, hints_enabled=False, players=("",),
+                 guesses=()):
+        """
+        Args:
+            mode: "single" or "two_player" (one of game_record.MODES).
+            seed: The game seed the secret was drawn with.
+            low: The lowest possible secret.
+            high: The highest possible secret.
+            max_attempts: The attempts allowed to each player (0 means unlimited).
+            hints_enabled: Whether hints are on.
+            players: The names of the players, in turn order.
+            guesses: The guesses made so far.
+        """
+        self.mode = mode
+        self.seed = seed
+        self.low = low
+        self.high = high
+        self.max_attempts = max_attempts
+        self.hints_enabled = hints_enabled
+        self.players = list(players)
+        self.guesses = list(guesses)
+
+    def secret(self):
+        return secret_for_seed(self.low, self.high, self.seed)
+
+    def game(self, hint_engine=None):
+        """
+        Returns a GameState (a MatchState for several players) with the
+        guesses stepped through it.
+        Args:
+            hint_engine: A fresh HintEngine to bring up to date as well,
+                hints included (optional).
+        """
+        secret = self.secret()
+        if len(self.players) > 1:
+            game = MatchState(secret, len(self.players), self.max_attempts)
+        else:
+            game = GameState(secret, self.max_attempts)
+        for guess in self.guesses:
+            if game.finished:
+                break
+            game.step(guess)
+            if hint_engine is not None and not game.finished:
+                hint_engine.observe(guess, game.last_result)
+                if game.guess_count % HINT_EVERY == 0:
+                    hint_engine.next_hint(secret)
+        return game
+
+    @property
+    def current_player(self):
+        """
+        The index of the player whose turn it is.
+        """
+        return len(self.guesses) % len(self.players)
+
+    def encode(self):
+        out = bytearray((SNAPSHOT, MODES.index(self.mode), HINTS if self.hints_enabled else 0))
+        put_varint(out, self.seed)
+        put_varint(out, zigzag(self.low))
+        put_varint(out, self.high - self.low)
+        put_varint(out, self.max_attempts)
+        put_varint(out, len(self.players))
+        for player in self.players:
+            name = player.encode("utf-8")
+            put_varint(out, len(name))
+            out += name
+        put_varint(out, len(self.guesses))
+        previous = self.low
+        for guess in self.guesses:
+            put_varint(out, zigzag(guess - previous))
+            previous = guess
+        return out
+
+    @classmethod
+    def decode(cls, data, pos=0):
+        """
+        Decodes a snapshot entry (after its length prefix) at data[pos].
+        """
+        mode = MODES[data[pos + 1]]
+        flags = data[pos + 2]
+        pos += 3
+        seed, pos = read_varint(data, pos)
+        low, pos = read_varint(data, pos)
+        low = unzigzag(low)
+        span, pos = read_varint(data, pos)
+        max_attempts, pos = read_varint(data, pos)
+        count, pos = read_varint(data, pos)
+        players = []
+        for _ in range(count):
+            length, pos = read_varint(data, pos)
+            players.append(bytes(data[pos:pos + length]).decode("utf-8", errors="replace"))
+            pos += length
+        count, pos = read_varint(data, pos)
+        guesses = []
+        previous = low
+        for _ in range(count):
+            delta, pos = read_varint(data, pos)
+            previous += unzigzag(delta)
+            guesses.append(previous)
+        return cls(mode, seed, low, low + span, max_attempts, bool(flags & HINTS), players, guesses)
+
+    def __eq__(self, other):
+        return isinstance(other, SessionSnapshot) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return (f"SessionSnapshot({self.mode!r}, seed={self.seed}, {self.low}..{self.high}, "
+                f"attempts={self.max_attempts}, players={self.players!r}, guesses={self.guesses!r})")
+
+
+def _entry(body):
+    prefix = bytearray()
+    put_varint(prefix, len(body))
+    return prefix + body
+
+
+def _guess_entry(guess, previous):
+    body = bytearray((GUESS,))
+    put_varint(body, zigzag(guess - previous))
+    return _entry(body)
+
+
+def decode_journal(data):
+    """
+    Returns the snapshot in journal file contents (the snapshot entry with
+    the guess deltas after it applied), or None if there is none.
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a game session file")
+    snapshot = None
+    pos = len(MAGIC)
+    end = len(data)
+    while pos < end:
+        try:
+            length, start = read_varint(data, pos)
+        except IndexError:
+            break  # a length torn by a crash
+        pos = start + length
+        if pos > end or length == 0:
+            break  # an entry torn by a crash
+        try:
+            if data[start] == SNAPSHOT:
+                snapshot = SessionSnapshot.decode(data, start)
+            elif data[start] == GUESS and snapshot is not None:
+                delta, _ = read_varint(data, start + 1)
+                previous = snapshot.guesses[-1] if snapshot.guesses else snapshot.low
+                snapshot.guesses.append(previous + unzigzag(delta))
+        except IndexError:
+            raise ValueError("the game session file is corrupted") from None
+    return snapshot
+
+
+def _write_atomic(path, data, fsync=True):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SessionJournal:
+    """
+    Keeps the snapshot of the current game in a file: a snapshot when the
+    game starts and a delta per guess, compacted every compact_every guesses.
+    """
+
+    def __init__(self, path=SESSION_FILE, compact_every=64, fsync=True):
+        """
+        Args:
+            path: The journal file.
+            compact_every: Number of deltas after which the file is
+                rewritten as one snapshot.
+            fsync: Whether to fsync every write (turn off for throwaway runs).
+        """
+        self.path = path
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.snapshot = None
+        self._file = None
+        self._deltas = 0
+
+    def load(self):
+        """
+        Returns the snapshot of the unfinished game in the file, or None.
+        Raises ValueError if the file is not a session journal.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        return decode_journal(data)
+
+    def start(self, snapshot):
+        """
+        Starts journalling a game (a new one, or a resumed one).
+        """
+        self.close()
+        self.snapshot = snapshot
+        _write_atomic(self.path, MAGIC + _entry(snapshot.encode()), self.fsync)
+        self._file = open(self.path, "ab")
+        self._deltas = 0
+
+    def add_guess(self, guess):
+        """
+        Appends a guess to the journal of the current game.
+        """
+        snapshot = self.snapshot
+        if snapshot is None:
+            return
+        previous = snapshot.guesses[-1] if snapshot.guesses else snapshot.low
+        snapshot.guesses.append(guess)
+        self._deltas += 1
+        if self._deltas >= self.compact_every:
+            self.start(snapshot)
+        else:
+            self._file.write(_guess_entry(guess, previous))
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def finish(self):
+        """
+        Ends the current game and removes the journal file.
+        """
+        self.close()
+        self.snapshot = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        """
+        Closes the file, keeping it so that the game can be resumed.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SessionSpool:
+    """
+    Snapshots paged out to one append-only file, by key.  Only the offset
+    and length of each live snapshot stay in memory.  The file is rewritten
+    once it is mostly dead space.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: The spool file (optional, an anonymous temporary file
+                otherwise).  It is overwritten, and removed on close().
+        """
+        self.path = path
+        self._file = open(path, "w+b") if path else tempfile.TemporaryFile()
+        self._index = {}
+        self._live_bytes = 0
+        self._size = 0
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def put(self, key, snapshot):
+        data = bytes(snapshot.encode())
+        self.discard(key)
+        self._file.seek(self._size)
+        self._file.write(data)
+        self._index[key] = (self._size, len(data))
+        self._size += len(data)
+        self._live_bytes += len(data)
+
+    def take(self, key):
+        """
+        Removes and returns the snapshot stored under key.
+        """
+        offset, length = self._index.pop(key)
+        self._file.seek(offset)
+        data = self._file.read(length)
+        self._live_bytes -= length
+        self._maybe_compact()
+        return SessionSnapshot.decode(data)
+
+    def discard(self, key):
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            self._live_bytes -= entry[1]
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self._size < (1 << 20) or self._live_bytes * 2 > self._size:
+            return
+        self._file.flush()
+        live = []
+        for key, (offset, length) in self._index.items():
+            self._file.seek(offset)
+            live.append((key, self._file.read(length)))
+        self._file.seek(0)
+        self._file.truncate()
+        self._index = {}
+        self._size = 0
+        for key, data in live:
+            self._file.write(data)
+            self._index[key] = (self._size, len(data))
+            self._size += len(data)
+
+    def close(self):
+        self._file.close()
+        if self.path:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+_default_journal = None
+_journal_configured = False
+
+
+def default_journal():
+    """
+    Returns the shared SessionJournal, or None if sessions are not saved.
+    It is set up on first use from GUESS_SESSION.
+    """
+    global _default_journal, _journal_configured
+    if not _journal_configured:
+        _journal_configured = True
+        path = os.environ.get("GUESS_SESSION", SESSION_FILE)
+        if path and path.lower() != "off":
+            _default_journal = SessionJournal(path)
+    return _default_journal
+
+
+def configure(journal):
+    """
+    Makes journal (a SessionJournal, or None to stop saving sessions) the
+    shared journal, closing the previous one.
+    """
+    global _default_journal, _journal_configured
+    if _default_journal is not None:
+        _default_journal.close()
+    _default_journal = journal
+    _journal_configured = True
+    return journal
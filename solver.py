@@ -0,0 +1,173 @@
+"""
+Guessing strategies for the computer player.
+
+solve(range_size, max_attempts, hint_policy) returns a Strategy that knows
+the best win probability and the expected number of guesses for a game of
+that shape, and picks the next guess in O(1).  Results are cached per
+(range size, attempts, hint policy), and the work behind a table is
+O(log range size), so even ranges in the millions solve instantly.
+
+With a uniform prior the middle of the remaining candidates is optimal for
+both goals: it maximises the number of candidates that can still be
+resolved within the budget, and it minimises the expected number of
+guesses.  Once a parity hint has been given, the candidates are every
+other number of the interval, and the solver bisects those instead.
+For a non-uniform prior, WeightedStrategy guesses the weighted median of
+the remaining candidates.
+"""
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import accumulate
+
+# Hint policies: no hints, or the parity of the number revealed once
+# after the PARITY_HINT_EVERY-th guess (as computer_guess() asks for it).
+NO_HINTS = None
+PARITY_HINT_EVERY = 3
+PARITY_HINTS = ("parity", PARITY_HINT_EVERY)
+
+# One table takes a few entries per halving of the range, so this keeps
+# the tables of every recently solved shape without growing for ever.
+TOTAL_GUESSES_CACHE = 1 << 14
+
+
+def _hint_after(hint_policy, guess_number):
+    return hint_policy is not None and guess_number == hint_policy[1]
+
+
+@lru_cache(maxsize=None)
+def _capacity(attempts, guesses_made, parity_known, hint_policy):
+    """
+    The largest number of candidates that can always be found with the
+    given attempts left.
+    """
+    if attempts <= 0:
+        return 0
+    if parity_known or hint_policy is None or guesses_made >= hint_policy[1]:
+        return (1 << attempts) - 1
+    if _hint_after(hint_policy, guesses_made + 1):
+        # Each side is halved by the hint, so it can hold twice as many.
+        side = 2 * _capacity(attempts - 1, guesses_made + 1, True, hint_policy)
+    else:
+        side = _capacity(attempts - 1, guesses_made + 1, False, hint_policy)
+    return 1 + 2 * side
+
+
+@lru_cache(maxsize=TOTAL_GUESSES_CACHE)
+def _total_guesses(size, attempts, guesses_made, parity_known, hint_policy):
+    """
+    The total number of guesses spent over all size equally likely
+    candidates when always guessing the middle candidate.  attempts is
+    None for an unlimited budget.
+    """
+    if size <= 0 or attempts == 0:
+        return 0
+    rest = None if attempts is None else attempts - 1
+    left = (size - 1) // 2
+    right = size - 1 - left
+    total = size
+    hint = not parity_known and _hint_after(hint_policy, guesses_made + 1)
+    for side in (left, right):
+        if hint:
+            total += _total_guesses((side + 1) // 2, rest, guesses_made + 1, True, hint_policy)
+            total += _total_guesses(side // 2, rest, guesses_made + 1, True, hint_policy)
+        else:
+            total += _total_guesses(side, rest, guesses_made + 1, parity_known, hint_policy)
+    return total
+
+
+def middle_candidate(low, high, parity=None):
+    """
+    Returns the middle of the numbers in low..high, counting only numbers
+    of the given parity (0 even, 1 odd) if it is known.
+    """
+    if parity is None:
+        return (low + high) // 2
+    if low % 2 != parity:
+        low += 1
+    if high % 2 != parity:
+        high -= 1
+    if low > high:
+        raise ValueError("No candidates are left.")
+    return low + 2 * ((high - low) // 4)
+
+
+class Strategy:
+    """
+    The solved strategy for one (range size, attempts, hint policy).
+    """
+    __slots__ = ("range_size", "max_attempts", "hint_policy",
+                 "win_probability", "expected_guesses")
+
+    def __init__(self, range_size, max_attempts, hint_policy):
+        self.range_size = range_size
+        self.max_attempts = max_attempts
+        self.hint_policy = hint_policy
+        if max_attempts > 0:
+            capacity = _capacity(max_attempts, 0, False, hint_policy)
+            self.win_probability = min(range_size, capacity) / range_size
+            attempts = max_attempts
+        else:
+            self.win_probability = 1.0
+            attempts = None
+        self.expected_guesses = _total_guesses(range_size, attempts, 0, False, hint_policy) / range_size
+
+    def next_guess(self, low, high, parity=None):
+        """
+        Returns the best guess for a number in low..high.
+        Args:
+            low: The smallest remaining candidate.
+            high: The largest remaining candidate.
+            parity: 0 or 1 if the number is known to be even or odd.
+        """
+        return middle_candidate(low, high, parity)
+
+
+@lru_cache(maxsize=1024)
+def solve(range_size, max_attempts=0, hint_policy=NO_HINTS):
+    """
+    Returns the cached Strategy for a game shape.
+    Args:
+        range_size: How many numbers the secret can be.
+        max_attempts: The attempts budget (0 means unlimited).
+        hint_policy: NO_HINTS or PARITY_HINTS.
+    """
+    if range_size <= 0:
+        raise ValueError("range_size must be positive.")
+    return Strategy(range_size, max_attempts, hint_policy)
+
+
+
+class WeightedStrategy:
+    """
+    Guesses the weighted median of the remaining candidates for a
+    non-uniform prior.  Building it is O(n); each guess is O(log n).
+    """
+
+    def __init__(self, low, weights):
+        """
+        Args:
+            low: The number the first weight belongs to.
+            weights: The prior weight of low, low + 1, ...
+        """
+        self.low = low
+        self.cumulative = list(accumulate(weights))
+
+    def next_guess(self, low, high, parity=None):
+        """
+        Returns the weighted median of the numbers in low..high, or the
+        nearest number of the given parity (0 even, 1 odd) to it if the
+        parity is known.
+        """
+        offset = self.low
+        before = self.cumulative[low - offset - 1] if low > offset else 0
+        total = self.cumulative[high - offset] - before
+        index = bisect_left(self.cumulative, before + total / 2, low - offset, high - offset)
+        guess = index + offset
+        if parity is not None:
+            first = low if low % 2 == parity else low + 1
+            last = high if high % 2 == parity else high - 1
+            if first > last:
+                raise ValueError("No candidates are left.")
+            if guess % 2 != parity:
+                guess = guess + 1 if guess < last else guess - 1
+        return guess
@@ -0,0 +1,342 @@
+"""
+Structured telemetry events from the games and their hot paths.
+
+The game code emits events (game started, guess made, hint shown, game
+won or lost, score persisted) on a Telemetry bus, which hands them to its
+sinks.  Every event carries a monotonic timestamp and, where a phase ended
+with it, that phase's duration in seconds:
+
+    guess_made       the time spent handling the guess (input to feedback)
+    game_won/lost    the whole game
+    score_persisted  the high score store write
+
+Sinks:
+    NullSink      drops everything; a bus with only null sinks is disabled.
+                  emit() then returns straight away, and the game code
+                  checks telemetry.enabled first so it does not even build
+                  the event fields.
+    Aggregator    counters and log2 latency histograms per event, in memory.
+    JsonlSink     one JSON object per line, rotating at max_bytes.
+
+The shared bus is configured from GUESS_TELEMETRY: unset or "off"
+(disabled), "memory" (an Aggregator) or a file path (a JsonlSink); a file
+that cannot be opened is reported on stderr and leaves telemetry off.
+Summarise a JSONL file with:
+
+    python telemetry.py report telemetry.jsonl
+"""
+import argparse
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+GAME_STARTED = "game_started"
+GUESS_MADE = "guess_made"
+HINT_SHOWN = "hint_shown"
+GAME_WON = "game_won"
+GAME_LOST = "game_lost"
+SCORE_PERSISTED = "score_persisted"
+
+# The clock of every timestamp and duration.
+clock = time.perf_counter
+
+
+class TelemetryEvent:
+    """
+    One event: its name, when it happened (clock() seconds), how long the
+    phase it ends took (or None) and any extra data.
+    """
+    __slots__ = ("name", "timestamp", "duration", "data")
+
+    def __init__(self, name, timestamp, duration=None, data=None):
+        self.name = name
+        self.timestamp = timestamp
+        self.duration = duration
+        self.data = data or {}
+
+    def to_dict(self):
+        return {"event": self.name, "t": self.timestamp, "duration": self.duration, **self.data}
+
+    def __repr__(self):
+        return f"TelemetryEvent({self.name!r}, {self.timestamp!r}, {self.duration!r}, {self.data!r})"
+
+
+class NullSink:
+    """
+    Drops every event.
+    """
+
+    def handle(self, event):
+        pass
+
+    def close(self):
+        pass
+
+
+class Histogram:
+    """
+    Counts durations in power-of-two microsecond buckets: bucket b holds
+    durations below 2**b microseconds (and at least 2**(b-1)).
+    """
+    __slots__ = ("count", "total", "minimum", "maximum", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.buckets = {}
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if self.minimum is None or seconds < self.minimum:
+            self.minimum = seconds
+        if self.maximum is None or seconds > self.maximum:
+            self.maximum = seconds
+        bucket = int(seconds * 1e6).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction):
+        """
+        Returns an estimate in seconds of the duration below which the given
+        fraction (0..1) of the durations fall: the bucket holding it is
+        assumed to be evenly filled, and the result is kept within the
+        smallest and largest durations.
+        """
+        if not self.count:
+            return 0.0
+        needed = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            count = self.buckets[bucket]
+            if seen + count >= needed:
+                low = (1 << bucket - 1) if bucket else 0
+                estimate = (low + ((1 << bucket) - low) * (needed - seen) / count) / 1e6
+                return min(max(estimate, self.minimum), self.maximum)
+            seen += count
+        return self.maximum
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_us": self.mean * 1e6,
+            "p50_us": self.percentile(0.5) * 1e6,
+            "p99_us": self.percentile(0.99) * 1e6,
+            "max_us": (self.maximum or 0.0) * 1e6,
+        }
+
+
+class Aggregator:
+    """
+    Counts events and keeps a duration Histogram per event name.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def handle(self, event):
+        with self._lock:
+            self.counters[event.name] = self.counters.get(event.name, 0) + 1
+            if event.duration is not None:
+                histogram = self.histograms.get(event.name)
+                if histogram is None:
+                    histogram = self.histograms[event.name] = Histogram()
+                histogram.add(event.duration)
+
+    def count(self, name):
+        return self.counters.get(name, 0)
+
+    def summary(self):
+        """
+        Returns {event name: {"count": n, plus latency figures if timed}}.
+        """
+        with self._lock:
+            result = {}
+            for name, count in sorted(self.counters.items()):
+                histogram = self.histograms.get(name)
+                result[name] = histogram.summary() if histogram else {}
+                result[name]["count"] = count
+            return result
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+
+    def close(self):
+        pass
+
+
+class JsonlSink:
+    """
+    Appends events to a JSON lines file.  When the file grows past
+    max_bytes it is renamed to path.1 (path.1 to path.2, and so on, keeping
+    backups old files) and a new file is started.
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backups=3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+
+    def handle(self, event):
+        line = json.dumps(event.to_dict(), separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None:
+                return
+            if self._size and self._size + len(line) > self.max_bytes:
+                self._rotate()
+            self._file.write(line)
+            self._size += len(line)
+
+    def _rotate(self):
+        self._file.close()
+        for number in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{number}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{number + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._size = 0
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class Telemetry:
+    """
+    Hands events to its sinks.  With no sinks other than NullSinks it is
+    disabled, and emit() costs one attribute check.
+    """
+
+    def __init__(self, sinks=()):
+        self.sinks = []
+        self.enabled = False
+        for sink in sinks:
+            self.add_sink(sink)
+
+    def add_sink(self, sink):
+        self.sinks = self.sinks + [sink]
+        self.enabled = any(not isinstance(s, NullSink) for s in self.sinks)
+        return sink
+
+    def remove_sink(self, sink):
+        self.sinks = [s for s in self.sinks if s is not sink]
+        self.enabled = any(not isinstance(s, NullSink) for s in self.sinks)
+
+    def emit(self, name, duration=None, **data):
+        """
+        Sends an event to every sink.
+        Args:
+            name: The event name, e.g. GUESS_MADE.
+            duration: Seconds taken by the phase the event ends (optional).
+            data: Extra fields of the event.
+        """
+        if not self.enabled:
+            return
+        event = TelemetryEvent(name, clock(), duration, data)
+        for sink in self.sinks:
+            try:
+                sink.handle(event)
+            except Exception as e:
+                print(f"Error in telemetry sink: {e}", file=sys.stderr)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+_default_telemetry = None
+
+
+def default_telemetry():
+    """
+    Returns the shared bus, creating it on first use from GUESS_TELEMETRY.
+    """
+    global _default_telemetry
+    if _default_telemetry is None:
+        setting = os.environ.get("GUESS_TELEMETRY", "")
+        if setting.lower() in ("", "off"):
+            sink = NullSink()
+        elif setting.lower() == "memory":
+            sink = Aggregator()
+        else:
+            try:
+                sink = JsonlSink(setting)
+            except OSError as e:
+                print(f"GUESS_TELEMETRY ignored, telemetry is off: {e}", file=sys.stderr)
+                sink = NullSink()
+        _default_telemetry = Telemetry([sink])
+        atexit.register(_default_telemetry.close)
+    return _default_telemetry
+
+
+def configure(*sinks):
+    """
+    Replaces the sinks of the shared bus and returns it.
+    """
+    telemetry = default_telemetry()
+    for sink in telemetry.sinks:
+        telemetry.remove_sink(sink)
+        sink.close()
+    for sink in sinks:
+        telemetry.add_sink(sink)
+    return telemetry
+
+
+def read_jsonl(path):
+    """
+    Yields the TelemetryEvents of a JSONL file written by JsonlSink.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line torn by a crash
+            name = record.pop("event")
+            timestamp = record.pop("t")
+            duration = record.pop("duration", None)
+            yield TelemetryEvent(name, timestamp, duration, record)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise game telemetry.")
+    parser.add_argument("command", choices=["report"])
+    parser.add_argument("files", nargs="+", help="JSONL files written by JsonlSink")
+    args = parser.parse_args()
+    aggregator = Aggregator()
+    for path in args.files:
+        for event in read_jsonl(path):
+            aggregator.handle(event)
+    print(f"{'event':<16} {'count':>8} {'mean µs':>10} {'p50 µs':>10} {'p99 µs':>10} {'max µs':>10}")
+    for name, figures in aggregator.summary().items():
+        timing = (f" {figures['mean_us']:>10.1f} {figures['p50_us']:>10.1f}"
+                  f" {figures['p99_us']:>10.1f} {figures['max_us']:>10.1f}") if "mean_us" in figures else ""
+        print(f"{name:<16} {figures['count']:>8}{timing}")
+
+
+if __name__ == "__main__":
+    main()
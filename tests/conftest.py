@@ -0,0 +1,10 @@
+"""
+Makes the game modules, which live at the top of the repository,
+importable from the tests.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
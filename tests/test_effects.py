@@ -0,0 +1,60 @@
+import threading
+
+from effects import EffectsScheduler
+
+
+def test_animations_do_not_wait_for_sounds():
+    scheduler = EffectsScheduler(effect_duration=60)
+    animated = threading.Event()
+    delivered = []
+    scheduler.subscribe(lambda event: delivered.append(event.name))
+    scheduler.subscribe(lambda event: event.kind == "animation" and animated.set())
+    scheduler.emit("sound", "win")
+    scheduler.emit("sound", "lose")
+    scheduler.emit("animation", "feedback")
+    assert animated.wait(5)
+    assert "lose" not in delivered  # still paced behind "win"
+    scheduler.shutdown()
+    assert delivered[-1] == "lose"
+
+
+def test_pending_sounds_are_bounded():
+    scheduler = EffectsScheduler(effect_duration=60, max_pending_sounds=3)
+    started = threading.Event()
+    delivered = []
+    scheduler.subscribe(lambda event: (delivered.append(event.data["n"]), started.set()))
+    scheduler.emit("sound", "tick", n=0)
+    assert started.wait(5)
+    for n in range(1, 11):
+        scheduler.emit("sound", "tick", n=n)
+    scheduler.shutdown()
+    assert delivered == [0, 8, 9, 10]
+    assert scheduler.dropped == 7
+
+
+def test_pending_animations_are_coalesced():
+    scheduler = EffectsScheduler(headless=True)
+    release = threading.Event()
+    delivered = []
+    scheduler.subscribe(lambda event: (release.wait(5), delivered.append((event.name, event.data))))
+    scheduler.emit("animation", "first")
+    for n in range(5):
+        scheduler.emit("animation", "feedback", n=n)
+    release.set()
+    scheduler.drain()
+    assert delivered[-1] == ("feedback", {"n": 4})
+    assert len(delivered) <= 3
+
+
+def test_handler_errors_go_to_stderr(capsys):
+    scheduler = EffectsScheduler(headless=True)
+    delivered = []
+    scheduler.subscribe(lambda event: 1 / 0)
+    scheduler.subscribe(delivered.append)
+    scheduler.emit("sound", "win")
+    scheduler.drain()
+    scheduler.shutdown()
+    assert len(delivered) == 1
+    captured = capsys.readouterr()
+    assert "Error in effect handler" in captured.err
+    assert captured.out == ""
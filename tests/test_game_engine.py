@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from game_engine import (
+    BatchGames, GameRange, GameState, INT64_MAX, INT64_MIN, CORRECT, LOST, OUT_OF_ATTEMPTS, PLAYING,
+    TOO_HIGH, TOO_LOW, WON,
+)
+
+
+def test_game_state_plays_to_a_win():
+    game = GameState(42, max_attempts=5)
+    assert game.step(10) == TOO_LOW
+    assert game.step(50) == TOO_HIGH
+    assert game.step(42) == CORRECT
+    assert game.status == WON
+    assert game.guess_count == 3
+    with pytest.raises(ValueError):
+        game.step(42)
+
+
+def test_game_state_runs_out_of_attempts():
+    game = GameState(42, max_attempts=2)
+    game.step(1)
+    assert game.step(99) == OUT_OF_ATTEMPTS
+    assert game.last_result == TOO_HIGH
+    assert game.status == LOST
+    assert game.attempts_left == 0
+
+
+def test_batch_games_agree_with_game_state():
+    rng = random.Random(7)
+    secrets = [rng.randint(1, 100) for _ in range(200)]
+    batch = BatchGames(secrets, max_attempts=4)
+    singles = [GameState(secret, max_attempts=4) for secret in secrets]
+    while batch.active:
+        guesses = [rng.randint(1, 100) for _ in secrets]
+        results = batch.step(guesses)
+        for game, guess, result in zip(singles, guesses, results):
+            if game.status == PLAYING:
+                assert game.step(guess) == result
+    assert [int(status) for status in batch.status] == [game.status for game in singles]
+
+
+def test_batch_games_compare_extreme_guesses_without_overflow():
+    batch = BatchGames([INT64_MIN, INT64_MAX, 0])
+    results = batch.step([INT64_MAX, INT64_MIN, INT64_MIN])
+    assert [int(result) for result in results] == [TOO_HIGH, TOO_LOW, TOO_LOW]
+
+
+def test_batch_games_keep_wide_secrets_as_ints():
+    game_range = GameRange.bits(80)
+    secret = game_range.high - 1
+    batch = BatchGames([secret])
+    assert batch.wide
+    assert list(batch.step([secret + 1])) == [TOO_HIGH]
+    assert list(batch.step([secret])) == [CORRECT]
+    assert batch.active == 0
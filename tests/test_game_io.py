@@ -0,0 +1,47 @@
+import io
+
+import pytest
+
+from game_io import BatchConsole, ScriptedConsole
+
+
+class CountingOutput(io.StringIO):
+    flushes = 0
+
+    def flush(self):
+        self.flushes += 1
+        super().flush()
+
+
+def test_batch_console_replays_answers(tmp_path):
+    answers = tmp_path / "answers.txt"
+    answers.write_text("1\nbob\n")
+    transcript = tmp_path / "transcript.txt"
+    console = BatchConsole(str(answers), str(transcript), echo=True)
+    assert console.ask("Choice: ") == "1"
+    console.say("Hello")
+    assert console.ask("Name: ") == "bob"
+    with pytest.raises(EOFError):
+        console.ask()
+    console.flush()
+    console.close()
+    assert transcript.read_text() == "Choice: 1\nHello\nName: bob\n"
+
+
+def test_batch_console_flushes_an_output_it_does_not_own():
+    output = CountingOutput()
+    console = BatchConsole(io.StringIO("1\n"), output)
+    console.say("Hello")
+    console.flush()
+    assert output.flushes == 1
+    console.close()
+    assert not output.closed
+    assert output.getvalue() == "Hello\n"
+
+
+def test_scripted_console_falls_back_to_its_callback():
+    console = ScriptedConsole(["1"], respond=lambda prompt, said: f"{len(said)} {prompt}")
+    assert console.ask("a") == "1"
+    console.say("x")
+    console.say("y")
+    assert console.ask("b") == "2 b"
@@ -0,0 +1,88 @@
+import pytest
+
+import game_record
+from game_record import (
+    GameRecord, RecordReader, RecordWriter, put_varint, read_varint, unzigzag, zigzag,
+)
+from rng_service import secret_for_seed
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 2**32, 2**64 - 1, 2**100])
+def test_varint_round_trip(value):
+    out = bytearray(b"x")
+    put_varint(out, value)
+    assert read_varint(out, 1) == (value, len(out))
+
+
+@pytest.mark.parametrize("value", [0, 1, -1, 63, -64, 2**40, -(2**40)])
+def test_zigzag_round_trip(value):
+    assert zigzag(value) >= 0
+    assert unzigzag(zigzag(value)) == value
+
+
+def test_record_encode_decode_round_trip():
+    record = GameRecord("two_player", 2**63 + 5, -50, 2**70, max_attempts=12, hints_enabled=True,
+                        won=True, guesses=[0, 2**69, -50, 2**70, 1, 2], player="Zoë")
+    assert GameRecord.decode(record.encode()) == record
+
+
+def test_record_decode_within_a_slice():
+    record = GameRecord("single", 9, 1, 100, guesses=[50, 25, 37, 31, 34, 33])
+    data = b"junk" + bytes(record.encode()) + b"more"
+    decoded = GameRecord.decode(data, 4, len(data) - 4)
+    assert decoded == record
+
+
+def test_replay_steps_through_the_guesses():
+    seed = 123
+    secret = secret_for_seed(1, 100, seed)
+    record = GameRecord("single", seed, 1, 100, max_attempts=5, won=True, guesses=[0, secret])
+    game = record.replay()
+    assert game.guess_count == 2
+    assert game.finished
+
+
+def test_writer_and_reader_round_trip(tmp_path):
+    path = str(tmp_path / "games.rec")
+    records = [GameRecord("single", seed, 1, 100, guesses=list(range(1, seed + 2)), player=f"p{seed}")
+               for seed in range(50)]
+    with RecordWriter(path) as writer:
+        for record in records[:30]:
+            writer.write(record)
+    with RecordWriter(path) as writer:
+        for record in records[30:]:
+            writer.write(record)
+    with RecordReader(path) as reader:
+        assert list(reader) == records
+        assert [count for _, _, count in reader.scan()] == [len(r.guesses) for r in records]
+
+
+def test_a_torn_record_is_dropped_before_appending(tmp_path):
+    path = str(tmp_path / "games.rec")
+    first = GameRecord("single", 1, 1, 100, guesses=[50, 25])
+    second = GameRecord("computer", 2, 1, 100, guesses=[50])
+    with RecordWriter(path) as writer:
+        writer.write(first)
+    with open(path, "ab") as f:
+        f.write(b"\x40\x00")  # a length prefix with only part of its record
+    with RecordWriter(path) as writer:
+        writer.write(second)
+    with RecordReader(path) as reader:
+        assert list(reader) == [first, second]
+
+
+def test_reader_rejects_other_files(tmp_path):
+    path = tmp_path / "games.rec"
+    path.write_bytes(b"not a recording")
+    with pytest.raises(ValueError):
+        RecordReader(str(path))
+
+
+def test_default_recorder_falls_back_when_the_file_is_unusable(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "old.rec"
+    path.write_bytes(game_record.MAGIC[:-1] + b"\x01junk")
+    monkeypatch.setenv("GUESS_RECORD", str(path))
+    monkeypatch.setattr(game_record, "_default_recorder", None)
+    monkeypatch.setattr(game_record, "_recorder_configured", False)
+    assert game_record.default_recorder() is None
+    assert "GUESS_RECORD ignored" in capsys.readouterr().err
@@ -0,0 +1,57 @@
+import asyncio
+
+from game_server import GameServer
+from score_store import ScoreStore
+
+
+def play(server, lines):
+    owner = set()
+
+    async def run():
+        return [await server.handle_line(line, owner) for line in lines]
+
+    return asyncio.run(run())
+
+
+def test_a_game_is_played_to_a_win(tmp_path):
+    store = ScoreStore(str(tmp_path / "high_scores.json"), fsync=False)
+    server = GameServer(1, 100, store=store, seed=5)
+    owner = set()
+
+    async def run():
+        reply = await server.handle_line("NEW easy ann", owner)
+        assert reply == "OK 1 10 1 100"
+        secret = server.sessions[1].game.secret
+        low = "LOW" if secret > 1 else "HIGH"
+        assert (await server.handle_line(f"GUESS 1 {1 if secret > 1 else 100}", owner)).startswith(low)
+        assert await server.handle_line("GUESS 1 500", owner) == "ERR guess must be between 1 and 100"
+        assert await server.handle_line(f"GUESS 1 {secret}", owner) == "WIN 1 2"
+        assert await server.handle_line(f"GUESS 1 {secret}", owner) == "ERR unknown session 1"
+
+    asyncio.run(run())
+    assert store.get("ann") == 2
+    store.close()
+
+
+def test_a_store_error_still_answers_the_win(capsys):
+    class BrokenStore:
+        def record(self, player_name, score):
+            raise OSError("disk full")
+
+    server = GameServer(1, 100, store=BrokenStore(), seed=5)
+    owner = set()
+
+    async def run():
+        await server.handle_line("NEW 5 ann", owner)
+        return await server.handle_line(f"GUESS 1 {server.sessions[1].game.secret}", owner)
+
+    assert asyncio.run(run()) == "WIN 1 1"
+    assert "disk full" in capsys.readouterr().err
+    assert server.games_played == 1
+
+
+def test_unknown_commands_are_refused():
+    server = GameServer(seed=1)
+    assert play(server, ["", "FLY", "NEW", "NEW impossible", "QUIT"]) == [
+        "ERR empty command", "ERR unknown command FLY", "ERR usage: NEW <difficulty> [name]",
+        "ERR difficulty must be easy, medium, hard or a positive number", "BYE"]
@@ -0,0 +1,77 @@
+import pytest
+
+import input_parser
+from game_engine import GameRange
+from input_parser import (
+    InputParser, MAX_DIGITS, NOT_A_NUMBER, OUT_OF_RANGE, RATE_LIMITED, VALID, RateLimiter, parse_int,
+    parse_number,
+)
+
+
+@pytest.mark.parametrize("text, number", [
+    ("42", 42), ("0", 0), (" 7 ", 7), ("+3", 3), ("-3", -3), ("\t-12\n", -12), ("9" * 30, int("9" * 30)),
+])
+def test_parse_int_accepts_whole_numbers(text, number):
+    assert parse_int(text) == number
+
+
+@pytest.mark.parametrize("text", ["", " ", "abc", "1.5", "1e3", "--1", "+", "- 1", "1 2", "0x10",
+                                  "1" * (MAX_DIGITS + 1), "-" + "1" * (MAX_DIGITS + 1)])
+def test_parse_int_rejects_everything_else(text):
+    assert parse_int(text) is None
+
+
+def test_parse_number_checks_the_bounds():
+    assert parse_number("5", 1, 10) == (VALID, 5)
+    assert parse_number("0", 1, 10) == (OUT_OF_RANGE, 0)
+    assert parse_number("11", 1, 10) == (OUT_OF_RANGE, 11)
+    assert parse_number("-5") == (VALID, -5)
+    assert parse_number("five", 1, 10) == (NOT_A_NUMBER, None)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_limiter_allows_bursts_then_refills():
+    clock = FakeClock()
+    limiter = RateLimiter(2, burst=3, clock=clock)
+    assert [limiter.allow() for _ in range(4)] == [True, True, True, False]
+    clock.now += 0.5
+    assert limiter.allow()
+    assert not limiter.allow()
+    clock.now += 100
+    assert sum(limiter.allow() for _ in range(10)) == 3
+
+
+def test_input_parser_limits_guesses():
+    clock = FakeClock()
+    parser = InputParser(GameRange(1, 100), RateLimiter(1, clock=clock))
+    assert parser.guess("50") == (VALID, 50)
+    assert parser.guess("60") == (RATE_LIMITED, None)
+    clock.now += 1
+    assert parser.guess("101") == (OUT_OF_RANGE, 101)
+    assert InputParser().guess(" -4 ") == (VALID, -4)
+
+
+@pytest.fixture
+def fresh_limiter(monkeypatch):
+    monkeypatch.setattr(input_parser, "_default_limiter", None)
+    monkeypatch.setattr(input_parser, "_limiter_configured", False)
+
+
+@pytest.mark.parametrize("setting, rate", [("5", 5.0), ("0.5", 0.5), ("0", None), ("-1", None)])
+def test_default_limiter_reads_guess_max_rate(fresh_limiter, monkeypatch, setting, rate):
+    monkeypatch.setenv("GUESS_MAX_RATE", setting)
+    limiter = input_parser.default_limiter()
+    assert (limiter.rate if limiter is not None else None) == rate
+
+
+def test_default_limiter_ignores_a_bad_guess_max_rate(fresh_limiter, monkeypatch, capsys):
+    monkeypatch.setenv("GUESS_MAX_RATE", "abc")
+    assert input_parser.default_limiter() is None
+    assert "GUESS_MAX_RATE ignored" in capsys.readouterr().err
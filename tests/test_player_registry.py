@@ -0,0 +1,95 @@
+import random
+
+import pytest
+
+from leaderboard import BLOCK, CompactLeaderboard
+from player_registry import NO_SCORE, PlayerRegistry
+from score_store import ScoreStore
+
+
+def sorted_scores(scores):
+    return sorted(scores.items(), key=lambda entry: (entry[1], entry[0].encode()))
+
+
+def test_from_scores_keeps_the_best_score():
+    registry = PlayerRegistry.from_scores([("ann", 5), ("bob", 3), ("ann", 4), ("ann", 9)])
+    assert dict(registry.items()) == {"ann": 4, "bob": 3}
+    assert registry.get("cat") is None
+    assert "ann" in registry and "cat" not in registry
+
+
+def test_intern_assigns_stable_ids():
+    registry = PlayerRegistry()
+    ids = [registry.intern(f"player{n}") for n in range(1000)]
+    assert ids == list(range(1000))
+    assert registry.intern("player500") == 500
+    assert registry.name(999) == "player999"
+    assert registry.best[10] == NO_SCORE
+
+
+def test_save_and_open_round_trip(tmp_path):
+    path = str(tmp_path / "players")
+    names = ["ann", "Bö", "ç" * 40, "\ud800odd"] + [f"p{n}" for n in range(500)]
+    scores = {name: n % 17 + 1 for n, name in enumerate(names)}
+    registry = PlayerRegistry.from_scores(scores.items())
+    registry.save(path, order=range(len(registry)), source=(1, 2, 3))
+
+    opened = PlayerRegistry.open(path)
+    assert dict(opened.items()) == scores
+    assert opened.source == (1, 2, 3)
+    assert list(opened.order) == list(range(len(registry)))
+    # Changing a mapped registry copies its columns first.
+    opened.set_best(opened.intern("new"), 1)
+    opened.set_best(opened.id("ann"), 0)
+    opened.close()
+    assert opened.get("new") == 1 and opened.get("ann") == 0
+    assert PlayerRegistry.open(path).get("ann") == scores["ann"]
+
+
+def test_open_rejects_other_files(tmp_path):
+    path = tmp_path / "players"
+    path.write_bytes(b"not a registry" * 10)
+    with pytest.raises(ValueError):
+        PlayerRegistry.open(str(path))
+
+
+def test_leaderboard_follows_updates():
+    rng = random.Random(3)
+    registry = PlayerRegistry()
+    leaderboard = CompactLeaderboard(registry)
+    scores = {}
+    # Few distinct scores, so the buckets are split into blocks.
+    for _ in range(6 * BLOCK):
+        name = f"p{rng.randrange(4 * BLOCK)}"
+        score = rng.randint(1, 4)
+        player = registry.intern(name)
+        current = registry.best[player]
+        if score < current:
+            registry.set_best(player, score)
+            leaderboard.update(player, None if current == NO_SCORE else current, score)
+            scores[name] = score
+    expected = sorted_scores(scores)
+    assert leaderboard.top(len(expected)) == expected
+    assert leaderboard.page(BLOCK + 7, 3 * BLOCK) == expected[BLOCK + 7:4 * BLOCK + 7]
+    assert leaderboard.rank(2) == 1 + sum(1 for score in scores.values() if score < 2)
+
+
+def test_store_reopens_from_the_registry_file(tmp_path):
+    path = str(tmp_path / "high_scores.json")
+    store = ScoreStore(path, compact_every=100, fsync=False)
+    scores = {f"p{n}": n % 7 + 1 for n in range(250)}
+    store.record_many(scores.items())  # compacts, saving the registry
+    store.close()
+
+    reopened = ScoreStore(path, fsync=False)
+    assert reopened.players._mapping is not None  # mapped, not parsed from the JSON snapshot
+    assert dict(reopened.items()) == scores
+    reopened.record("late", 1)
+    reopened.close()
+
+    scores["late"] = 1
+    reopened = ScoreStore(path, fsync=False)
+    assert dict(reopened.items()) == scores
+    assert reopened.top(len(scores)) == sorted_scores(scores)
+    assert reopened.rank("late") == 1
+    reopened.close()
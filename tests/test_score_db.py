@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from score_db import SqliteScoreStore
+from score_store import ScoreStore
+
+
+@pytest.fixture
+def db(tmp_path):
+    store = SqliteScoreStore(str(tmp_path / "high_scores.db"))
+    yield store
+    store.close()
+
+
+def test_scores_survive_a_reopen(tmp_path):
+    path = str(tmp_path / "high_scores.db")
+    store = SqliteScoreStore(path)
+    assert store.record("alice", 7) == "new"
+    assert store.record("alice", 9) is None
+    assert store.record("alice", 5) == "improved"
+    assert store.record_many([("bob", 4), ("bob", 3)]) == 1
+    store.close()
+    reopened = SqliteScoreStore(path)
+    assert dict(reopened.items()) == {"alice": 5, "bob": 3}
+    assert reopened.top(1) == [("bob", 3)]
+    assert reopened.rank("alice") == 2
+    reopened.close()
+
+
+def test_import_json_skips_malformed_entries_like_the_json_store(tmp_path, db):
+    path = tmp_path / "high_scores.json"
+    path.write_text(json.dumps({"alice": 5, "bob": None, "carol": -1, "dave": "3", "erin": 2.5,
+                                "frank": True, "gina": 4}))
+    assert db.import_json(str(path)) == 2
+    assert dict(db.items()) == {"alice": 5, "gina": 4}
+    json_store = ScoreStore(str(tmp_path / "other.json"), fsync=False)
+    json_store.import_json(str(path))
+    assert dict(json_store.items()) == dict(db.items())
+    json_store.close()
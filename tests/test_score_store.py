@@ -0,0 +1,113 @@
+import json
+import os
+import stat
+
+import pytest
+
+from score_store import ScoreStore, WriteBehindStore, write_json_atomic
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "high_scores.json")
+
+
+def test_scores_survive_a_reopen(path):
+    store = ScoreStore(path, fsync=False)
+    assert store.record("alice", 7) == "new"
+    assert store.record("alice", 9) is None
+    assert store.record("alice", 5) == "improved"
+    assert store.record_many([("bob", 4), ("carol", 6), ("bob", 3)]) == 3
+    store.close()
+
+    reopened = ScoreStore(path, fsync=False)
+    assert dict(reopened.items()) == {"alice": 5, "bob": 3, "carol": 6}
+    assert reopened.load_error is None
+    reopened.close()
+
+
+def test_compaction_writes_the_json_snapshot(path):
+    store = ScoreStore(path, compact_every=3, fsync=False)
+    store.record_many([("alice", 5), ("bob", 3), ("carol", 6)])
+    with open(path) as f:
+        assert json.load(f) == {"alice": 5, "bob": 3, "carol": 6}
+    assert os.path.getsize(store.log_path) == 0
+    store.close()
+
+
+def test_stores_see_each_others_appends(path):
+    first = ScoreStore(path, fsync=False)
+    second = ScoreStore(path, fsync=False)
+    first.record("alice", 5)
+    assert second.top(1) == [("alice", 5)]
+    assert second.record("alice", 4) == "improved"
+    assert first.top(1) == [("alice", 4)]
+    first.close()
+    second.close()
+
+
+def test_a_torn_log_line_is_ignored(path):
+    store = ScoreStore(path, fsync=False)
+    store.record("alice", 5)
+    store.close()
+    with open(path + ".log", "a") as f:
+        f.write('["bob", 3')
+    reopened = ScoreStore(path, fsync=False)
+    assert dict(reopened.items()) == {"alice": 5}
+    reopened.record("carol", 2)
+    reopened.close()
+    assert dict(ScoreStore(path, fsync=False).items()) == {"alice": 5, "carol": 2}
+
+
+def test_invalid_scores_are_skipped_on_load(path):
+    with open(path, "w") as f:
+        json.dump({"alice": 5, "bob": "three", "carol": -1, "dave": 2.5}, f)
+    store = ScoreStore(path, fsync=False)
+    assert dict(store.items()) == {"alice": 5}
+    assert isinstance(store.load_error, ValueError)
+    store.close()
+
+
+def test_write_json_atomic_keeps_the_file_mode(path):
+    write_json_atomic(path, [("alice", 5)])
+    os.chmod(path, 0o640)
+    write_json_atomic(path, [("alice", 4)])
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    with open(path) as f:
+        assert json.load(f) == {"alice": 4}
+
+
+def test_write_behind_store_merges_updates(path):
+    store = WriteBehindStore(ScoreStore(path, fsync=False), max_pending=100, max_delay=60)
+    for score in (9, 7, 8):
+        store.record("alice", score)
+    assert store.get("alice") == 7
+    store.close()
+    assert dict(ScoreStore(path, fsync=False).items()) == {"alice": 7}
+
+
+def test_changes_returns_only_new_scores(path):
+    store = ScoreStore(path, fsync=False)
+    store.record_many([("alice", 5), ("bob", 3)])
+    cursor, pairs = store.changes()
+    assert sorted(pairs) == [("alice", 5), ("bob", 3)]
+    store.record("alice", 4)
+    store.record("carol", 6)
+    cursor, pairs = store.changes(cursor)
+    assert sorted(pairs) == [("alice", 4), ("carol", 6)]
+    assert store.changes(cursor)[1] == []
+    store.close()
+
+
+def test_write_behind_status_sees_other_processes(path):
+    other = ScoreStore(path, fsync=False)
+    store = WriteBehindStore(ScoreStore(path, fsync=False), max_pending=100, max_delay=60)
+    assert store.record("alice", 5) == "new"
+    store.flush()
+    other.record("alice", 3)
+    other.record("bob", 4)
+    assert store.record("alice", 4) is None
+    assert store.record("bob", 6) is None
+    assert store.record("bob", 2) == "improved"
+    store.close()
+    other.close()
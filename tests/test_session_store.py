@@ -0,0 +1,125 @@
+import pytest
+
+import score_store
+from game_engine import LOST, PLAYING
+from game_io import ScriptedConsole
+from guess_the_number import load_cli
+from rng_service import SessionRng
+from score_store import ScoreStore
+from session_store import SessionJournal, SessionSnapshot, SessionSpool, decode_journal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return SessionJournal(str(tmp_path / "game_session.bin"), compact_every=4)
+
+
+@pytest.fixture
+def scores(tmp_path, monkeypatch):
+    monkeypatch.setattr(score_store, "_default_store", None)
+    store = score_store.configure(ScoreStore(str(tmp_path / "high_scores.json"), fsync=False))
+    yield store
+    store.close()
+
+
+def test_snapshot_encode_decode_round_trip():
+    snapshot = SessionSnapshot("two_player", 2**63 + 1, -20, 2**70, 7, True, ["Ann", "Bö"],
+                               [5, -20, 2**69, 3])
+    assert SessionSnapshot.decode(snapshot.encode()) == snapshot
+
+
+def test_journal_keeps_every_guess_across_compactions(journal):
+    journal.start(SessionSnapshot("single", 99, 1, 1000, players=["ann"]))
+    for guess in range(1, 11):
+        journal.add_guess(guess)
+    journal.close()
+    assert journal.load().guesses == list(range(1, 11))
+
+
+def test_a_torn_guess_is_ignored(journal):
+    journal.start(SessionSnapshot("single", 99, 1, 100, players=["ann"]))
+    journal.add_guess(50)
+    journal.close()
+    with open(journal.path, "ab") as f:
+        f.write(b"\x05\x02")
+    assert journal.load().guesses == [50]
+
+
+def test_finish_removes_the_journal(journal):
+    journal.start(SessionSnapshot("single", 99, 1, 100))
+    journal.finish()
+    assert journal.load() is None
+
+
+def test_other_files_are_rejected():
+    with pytest.raises(ValueError):
+        decode_journal(b"not a session")
+
+
+def test_snapshot_game_restores_attempts_and_turns():
+    snapshot = SessionSnapshot("two_player", 5, 1, 100, max_attempts=2, players=["ann", "bob"])
+    secret = snapshot.secret()
+    snapshot.guesses = [secret + 1, secret + 1, secret + 1]
+    match = snapshot.game()
+    assert match.status == PLAYING
+    assert match.player == 1 == snapshot.current_player
+    snapshot.guesses.append(secret + 1)
+    assert snapshot.game().status == LOST
+
+
+def test_spool_returns_what_was_put(tmp_path):
+    spool = SessionSpool()
+    snapshots = {key: SessionSnapshot("single", key, 1, 100, guesses=[key % 100 + 1]) for key in range(100)}
+    for key, snapshot in snapshots.items():
+        spool.put(key, snapshot)
+    spool.discard(3)
+    assert 3 not in spool
+    assert spool.take(42) == snapshots[42]
+    assert len(spool) == 98
+    spool.close()
+
+
+def test_cli_resumes_an_interrupted_game(journal, scores):
+    cli = load_cli()
+    rng = SessionRng(1234)
+    secret = SessionRng(1234).secret(cli.GameRange(1, 100))[1]
+    wrong = 1 if secret != 1 else 2
+    console = ScriptedConsole([str(wrong), str(wrong)])
+    with pytest.raises(EOFError):
+        cli.guess(100, 5, "ann", console=console, rng=rng, journal=journal)
+    snapshot = journal.load()
+    assert snapshot.guesses == [wrong, wrong]
+    assert snapshot.secret() == secret
+
+    console = ScriptedConsole(["yes", str(secret)])
+    assert cli.resume_game(journal, console=console)
+    assert "Resuming your game between 1 and 100 after 2 guesses." in console.output
+    assert "You have 3 attempts to guess the number." in console.output
+    assert journal.load() is None
+    assert scores.get("ann") == 3
+
+
+def test_cli_drops_a_declined_game(journal, scores):
+    cli = load_cli()
+    journal.start(SessionSnapshot("single", 7, 1, 100, players=["ann"], guesses=[10]))
+    journal.close()
+    assert not cli.resume_game(journal, console=ScriptedConsole(["no"]))
+    assert journal.load() is None
+
+
+def test_journal_syncs_every_write(tmp_path, monkeypatch):
+    import session_store
+    synced = []
+    monkeypatch.setattr(session_store.os, "fsync", synced.append)
+    journal = SessionJournal(str(tmp_path / "game_session.bin"), compact_every=3)
+    journal.start(SessionSnapshot("single", 99, 1, 100))
+    for guess in (50, 25, 37, 31):
+        journal.add_guess(guess)
+    # The start, two deltas, the compaction and one more delta.
+    assert len(synced) == 5
+    journal.finish()
+    unsynced = SessionJournal(str(tmp_path / "other.bin"), fsync=False)
+    unsynced.start(SessionSnapshot("single", 99, 1, 100))
+    unsynced.add_guess(50)
+    unsynced.close()
+    assert len(synced) == 5
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from solver import PARITY_HINTS, WeightedStrategy, middle_candidate, solve
+
+
+def guesses_to_find(next_guess, secret, low, high):
+    guesses = 0
+    while True:
+        guess = next_guess(low, high)
+        guesses += 1
+        if guess == secret:
+            return guesses
+        if guess < secret:
+            low = guess + 1
+        else:
+            high = guess - 1
+
+
+def expected_guesses(next_guess, weights, low):
+    high = low + len(weights) - 1
+    total = sum(weights)
+    return sum(weight * guesses_to_find(next_guess, secret, low, high)
+               for secret, weight in enumerate(weights, start=low)) / total
+
+
+def test_bisection_matches_the_solved_expectation():
+    strategy = solve(100)
+    assert expected_guesses(strategy.next_guess, [1] * 100, 1) == pytest.approx(strategy.expected_guesses)
+
+
+def test_weighted_strategy_beats_bisection_on_a_skewed_prior():
+    weights = [2.0 ** -n for n in range(100)]  # small numbers are far more likely
+    weighted = expected_guesses(WeightedStrategy(1, weights).next_guess, weights, 1)
+    bisection = expected_guesses(middle_candidate, weights, 1)
+    assert weighted < bisection / 2
+
+
+def test_weighted_strategy_keeps_parity_guesses_in_the_candidates():
+    rng = random.Random(4)
+    weights = [rng.choice([0, 0, 1, 50]) for _ in range(60)]
+    strategy = WeightedStrategy(10, weights)
+    for _ in range(2000):
+        low = rng.randint(10, 69)
+        high = rng.randint(low, 69)
+        parity = rng.randint(0, 1)
+        if not any(number % 2 == parity for number in range(low, high + 1)):
+            with pytest.raises(ValueError):
+                strategy.next_guess(low, high, parity)
+            continue
+        guess = strategy.next_guess(low, high, parity)
+        assert low <= guess <= high
+        assert guess % 2 == parity
+
+
+def test_parity_hints_raise_the_win_probability():
+    assert solve(1000, 8, PARITY_HINTS).win_probability > solve(1000, 8).win_probability
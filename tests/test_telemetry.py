@@ -0,0 +1,58 @@
+import pytest
+
+import telemetry
+from telemetry import Aggregator, GUESS_MADE, Histogram, JsonlSink, NullSink, Telemetry, read_jsonl
+
+
+def test_histogram_estimates_percentiles_within_buckets():
+    histogram = Histogram()
+    for micros in range(1, 1001):
+        histogram.add(micros / 1e6)
+    assert histogram.count == 1000
+    assert histogram.percentile(0.5) * 1e6 == pytest.approx(500, rel=0.05)
+    assert histogram.percentile(0.99) * 1e6 == pytest.approx(990, rel=0.05)
+    assert histogram.percentile(1.0) == histogram.maximum
+
+
+def test_null_sinks_disable_the_bus():
+    bus = Telemetry([NullSink()])
+    assert not bus.enabled
+    aggregator = bus.add_sink(Aggregator())
+    assert bus.enabled
+    bus.emit(GUESS_MADE, 0.001, result=1)
+    bus.emit(GUESS_MADE)
+    assert aggregator.count(GUESS_MADE) == 2
+    assert aggregator.summary()[GUESS_MADE]["count"] == 2
+
+
+def test_jsonl_sink_round_trip_and_rotation(tmp_path):
+    path = str(tmp_path / "telemetry.jsonl")
+    sink = JsonlSink(path, max_bytes=400, backups=2)
+    bus = Telemetry([sink])
+    for n in range(20):
+        bus.emit(GUESS_MADE, 0.5, n=n)
+    bus.close()
+    events = list(read_jsonl(path + ".1")) + list(read_jsonl(path))
+    assert [event.data["n"] for event in events] == list(range(20 - len(events), 20))
+    assert all(event.duration == 0.5 for event in events)
+
+
+def test_sink_errors_go_to_stderr(capsys):
+    class Broken:
+        def handle(self, event):
+            raise RuntimeError("boom")
+
+        def close(self):
+            pass
+
+    Telemetry([Broken()]).emit(GUESS_MADE)
+    captured = capsys.readouterr()
+    assert "boom" in captured.err and captured.out == ""
+
+
+def test_unwritable_guess_telemetry_turns_telemetry_off(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("GUESS_TELEMETRY", str(tmp_path / "missing" / "t.jsonl"))
+    monkeypatch.setattr(telemetry, "_default_telemetry", None)
+    bus = telemetry.default_telemetry()
+    assert not bus.enabled
+    assert "GUESS_TELEMETRY ignored" in capsys.readouterr().err
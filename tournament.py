@@ -0,0 +1,279 @@
+"""
+Tournaments between automated guessing strategies.
+
+Every strategy plays the same number of games.  The games are cut into
+shards that run on a process pool; each shard has its own seeded RNG and
+sends back only a small summary, which keeps the pool busy and close to
+linear in the number of cores.  Strategies with an array form (see
+BATCH_STRATEGIES) play a whole shard in lockstep on a BatchGames, one
+numpy step per round of guesses; the others, and ranges beyond 64 bits,
+play one GameState at a time.  The summaries are merged per strategy and
+the best score of every strategy is written to the high score store in a
+single batch.
+
+    python tournament.py --games 1000000 --high 1000 --attempts 12 --hints
+"""
+import argparse
+import math
+import os
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from game_engine import GameState, GameRange, BatchGames, TOO_LOW, TOO_HIGH, CORRECT, WON
+from rng_service import SessionRng
+from solver import solve, middle_candidate, NO_HINTS, PARITY_HINTS, PARITY_HINT_EVERY
+
+GOLDEN_SECTION = 1 - 1 / ((1 + math.sqrt(5)) / 2)
+
+
+def bisection(low, high, parity, rng):
+    """
+    The computer_guess() strategy: always guess the middle.
+    """
+    return (low + high) // 2
+
+
+def random_guess(low, high, parity, rng):
+    return rng.randint(low, high)
+
+
+def golden_section(low, high, parity, rng):
+    """
+    Splits the remaining range at the golden ratio instead of the middle.
+    """
+    return low + int((high - low) * GOLDEN_SECTION)
+
+
+def hint_aware(low, high, parity, rng):
+    """
+    Bisects only the numbers that match the parity hint, once it is known.
+    """
+    return middle_candidate(low, high, parity)
+
+
+STRATEGIES = {
+    "bisection": bisection,
+    "random": random_guess,
+    "golden": golden_section,
+    "hint_aware": hint_aware,
+}
+
+
+# The same strategies over numpy arrays of the bounds of many games, with
+# -1 for an unknown parity.  They pick the same guesses as the originals.
+
+def bisection_batch(lows, highs, parities, rng):
+    return (lows + highs) // 2
+
+
+def golden_section_batch(lows, highs, parities, rng):
+    return lows + ((highs - lows) * GOLDEN_SECTION).astype(lows.dtype)
+
+
+def hint_aware_batch(lows, highs, parities, rng):
+    known = parities >= 0
+    middle = (lows + highs) // 2
+    lows = lows + (known & (lows % 2 != parities))
+    highs = highs - (known & (highs % 2 != parities))
+    return middle + known * (lows + 2 * ((highs - lows) // 4) - middle)
+
+
+BATCH_STRATEGIES = {
+    "bisection": bisection_batch,
+    "golden": golden_section_batch,
+    "hint_aware": hint_aware_batch,
+}
+
+
+class Settings:
+    """
+    The shape of every game in a tournament.
+    """
+    __slots__ = ("low", "high", "max_attempts", "hints_enabled")
+
+    def __init__(self, low=1, high=100, max_attempts=10, hints_enabled=False):
+        self.low = low
+        self.high = high
+        self.max_attempts = max_attempts
+        self.hints_enabled = hints_enabled
+
+
+def play_game(strategy, settings, rng, secret):
+    """
+    Plays one game against the given secret and returns (won, guesses).
+    """
+    game = GameState(secret, settings.max_attempts)
+    low, high, parity = settings.low, settings.high, None
+    while True:
+        guess = strategy(low, high, parity, rng)
+        result = game.step(guess)
+        if result == CORRECT:
+            return True, game.guess_count
+        if game.finished:
+            return False, game.guess_count
+        if game.last_result == TOO_LOW:
+            low = max(low, guess + 1)
+        else:
+            high = min(high, guess - 1)
+        if settings.hints_enabled and game.guess_count == PARITY_HINT_EVERY:
+            parity = game.secret % 2
+
+
+def play_batch(strategy, settings, rng, games):
+    """
+    Plays the games of a numpy-backed BatchGames in lockstep with a
+    strategy from BATCH_STRATEGIES.  Returns (wins, total guesses,
+    histogram of guesses per won game).
+    """
+    np = games.np
+    secrets = games.secrets
+    lows = np.full(len(secrets), settings.low, dtype=np.int64)
+    highs = np.full(len(secrets), settings.high, dtype=np.int64)
+    parities = np.full(len(secrets), -1, dtype=np.int64)
+    while games.active:
+        guesses = strategy(lows, highs, parities, rng)
+        results = games.step(guesses)
+        too_low = results == TOO_LOW
+        too_high = results == TOO_HIGH
+        lows[too_low] = guesses[too_low] + 1
+        highs[too_high] = guesses[too_high] - 1
+        if settings.hints_enabled and games.guess_counts.max() == PARITY_HINT_EVERY:
+            parities = secrets % 2
+    won = games.status == WON
+    counts = games.guess_counts
+    histogram = Counter({guesses: int(wins) for guesses, wins in enumerate(np.bincount(counts[won]))
+                         if wins})
+    return int(won.sum()), int(counts.sum()), histogram
+
+
+def shard_seed(seed, strategy_name, shard):
+    return zlib.crc32(f"{seed}:{strategy_name}:{shard}".encode())
+
+
+def play_shard(strategy_name, settings, games, seed):
+    """
+    Plays games with one strategy.  Runs in a worker process.
+    Returns (strategy name, games, wins, total guesses, histogram of
+    guesses per won game).
+    """
+    strategy = STRATEGIES[strategy_name]
+    rng = SessionRng(seed)
+    # All the secrets of the shard in one block draw.
+    _, secrets = rng.secrets(GameRange(settings.low, settings.high), games)
+    if strategy_name in BATCH_STRATEGIES:
+        batch = BatchGames(secrets, settings.max_attempts)
+        if batch.np is not None:  # numpy is installed and the range fits in 64 bits
+            return (strategy_name, games, *play_batch(BATCH_STRATEGIES[strategy_name], settings, rng, batch))
+    wins = 0
+    total_guesses = 0
+    histogram = Counter()
+    for secret in secrets:
+        won, guesses = play_game(strategy, settings, rng, int(secret))
+        total_guesses += guesses
+        if won:
+            wins += 1
+            histogram[guesses] += 1
+    return strategy_name, games, wins, total_guesses, histogram
+
+
+class Standing:
+    """
+    The merged results of one strategy.
+    """
+    __slots__ = ("games", "wins", "total_guesses", "histogram")
+
+    def __init__(self):
+        self.games = 0
+        self.wins = 0
+        self.total_guesses = 0
+        self.histogram = Counter()
+
+    @property
+    def win_rate(self):
+        return self.wins / self.games if self.games else 0.0
+
+    @property
+    def mean_guesses(self):
+        return self.total_guesses / self.games if self.games else 0.0
+
+    @property
+    def best_score(self):
+        return min(self.histogram) if self.histogram else None
+
+
+def run_tournament(strategy_names, games, settings, workers=None, seed=0,
+                   shard_size=20000, store=None):
+    """
+    Plays games games per strategy and returns {strategy name: Standing}.
+    Args:
+        strategy_names: Names from STRATEGIES.
+        games: Games per strategy.
+        settings: The Settings of every game.
+        workers: Number of worker processes (defaults to the CPU count).
+        seed: Master seed; the same seed replays the same tournament.
+        shard_size: Games per task sent to a worker.
+        store: Optional high score store that receives each strategy's best
+            score as player "bot:<strategy>", in one batch.
+    """
+    tasks = []
+    for name in strategy_names:
+        if name not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {name}")
+        for shard, start in enumerate(range(0, games, shard_size)):
+            tasks.append((name, min(shard_size, games - start), shard_seed(seed, name, shard)))
+    standings = {name: Standing() for name in strategy_names}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_shard, name, settings, count, task_seed)
+                   for name, count, task_seed in tasks]
+        for future in futures:
+            name, played, wins, total_guesses, histogram = future.result()
+            standing = standings[name]
+            standing.games += played
+            standing.wins += wins
+            standing.total_guesses += total_guesses
+            standing.histogram.update(histogram)
+    if store is not None:
+        store.record_many((f"bot:{name}", standing.best_score)
+                          for name, standing in standings.items()
+                          if standing.best_score is not None)
+    return standings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a guessing strategy tournament.")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES),
+                        help="Comma separated strategy names")
+    parser.add_argument("--games", type=int, default=100000, help="Games per strategy")
+    parser.add_argument("--low", type=int, default=1)
+    parser.add_argument("--high", type=int, default=100)
+    parser.add_argument("--attempts", type=int, default=10, help="Attempts per game (0 = unlimited)")
+    parser.add_argument("--hints", action="store_true", help="Reveal parity after the third guess")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", action="store_true", help="Write best scores to the high score store")
+    args = parser.parse_args()
+
+    settings = Settings(args.low, args.high, args.attempts, args.hints)
+    store = None
+    if args.save:
+        from score_store import default_store
+        store = default_store()
+    names = [name.strip() for name in args.strategies.split(",") if name.strip()]
+    started = time.perf_counter()
+    standings = run_tournament(names, args.games, settings, args.workers, args.seed, store=store)
+    elapsed = time.perf_counter() - started
+
+    hint_policy = PARITY_HINTS if args.hints else NO_HINTS
+    optimum = solve(args.high - args.low + 1, args.attempts, hint_policy)
+    print(f"{'strategy':<12} {'win rate':>9} {'mean guesses':>13} {'best':>5}")
+    for name, standing in sorted(standings.items(), key=lambda item: -item[1].win_rate):
+        print(f"{name:<12} {standing.win_rate:>9.2%} {standing.mean_guesses:>13.3f} {standing.best_score or '-':>5}")
+    print(f"optimal      {optimum.win_probability:>9.2%} {optimum.expected_guesses:>13.3f}")
+    total = sum(standing.games for standing in standings.values())
+    print(f"{total} games in {elapsed:.2f}s ({total / elapsed:,.0f} games/s on {args.workers} workers)")
+
+
+if __name__ == "__main__":
+    main()